@@ -0,0 +1,51 @@
+"""
+Microbenchmarks of the client hot paths, run with pytest-benchmark. (pip install -r benchmarks/requirements.txt)
+
+The benchmarks aren't part of the test suite, run them explicitly:
+
+    python -m pytest benchmarks
+
+Results are persisted with `--benchmark-autosave` in `.benchmarks/`, to compare a change with a baseline:
+
+    git checkout master && python -m pytest benchmarks --benchmark-autosave
+    git checkout my-branch && python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+
+Paths which were optimized are also benchmarked next to their former implementation (see `legacy`), in the same
+group, so a single run shows the speed up.
+
+Inputs are generated by `mws.testing.fixtures`, at the sizes of `fixtures.SIZES` unless noted.
+"""
+import pytest
+
+from mws import Products
+from mws.fulfillment_outbound_shipment import Address, CreateFulfillmentOrderItem, FulfillmentOrder
+
+
+@pytest.fixture(scope='session')
+def products_api():
+    return Products('AKIAEXAMPLE', 'secret-key-example-0123456789abcdef', 'A1EXAMPLE')
+
+
+@pytest.fixture(scope='session')
+def fee_estimates(products_api):
+    """
+    A GetMyFeesEstimate payload of 1,000 estimate requests.
+    """
+    return {'Action': 'GetMyFeesEstimate', 'FeesEstimateRequestList': [
+        products_api.gen_fees_estimate_request('ATVPDKIKX0DER', 'B%09d' % i, identifier='request-%d' % i,
+                                               listing_price=10 + i % 90, shipping=i % 7) for i in range(1000)]}
+
+
+@pytest.fixture(scope='session')
+def fulfillment_order():
+    """
+    A fulfillment order of 1,000 items.
+    """
+    items = [CreateFulfillmentOrderItem(seller_sku='SKU-%06d' % i, seller_fulfillment_order_item_id=str(i),
+                                        quantity=1 + i % 5, per_unit_declared_value=9.99) for i in range(1000)]
+    return FulfillmentOrder(seller_fulfillment_order_id='order-1', displayable_order_id='order-1',
+                            displayable_order_date_time='2017-01-01T00:00:00Z',
+                            destination_address=Address(name='Jane Doe', line_1='1 Main St', city='Seattle',
+                                                        state_or_province_code='WA', postal_code='98101',
+                                                        country_code='US'),
+                            items=items)
@@ -0,0 +1,44 @@
+"""
+Former implementations of the hot paths, benchmarked next to the current ones as a baseline.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+from urllib.parse import quote
+
+logger = logging.getLogger('bench')
+
+
+def legacy_calc_signature(api, method, request_description):
+    """
+    `MWS.calc_signature` before `RequestSigner`: keys a new HMAC and builds its debug output on every call.
+    """
+    sig_data = method + '\n' + api.domain.replace('https://', '').lower() + '\n' + api.uri + '\n' + request_description
+    logger.debug('string to sign:\n    {}'.format('\n    '.join(sig_data.split('&'))))
+    x = base64.b64encode(hmac.new(bytes(api.secret_key, encoding='utf-8'), bytes(sig_data, encoding='utf-8'),
+                                  hashlib.sha256).digest())
+    logger.debug(quote(x))
+    return quote(x)
+
+
+def legacy_products_flatten(l_key, l_val, d):
+    """
+    `Products.flatten` before `mws.params`.
+    """
+    nd = {}
+    for k, v in d.items():
+        if isinstance(v, list):
+            for i, request in enumerate(v, 1):
+                for k_, v_ in request.items():
+                    nd['{}.{}.{}.{}'.format(l_key, l_val, i, k_)] = v_
+        else:
+            nd[k] = v
+    return nd
+
+
+def legacy_canonical_query(params):
+    """
+    The canonical query string of `make_request` before `mws.params`, which quoted every value on every call.
+    """
+    return '&'.join(['%s=%s' % (k, quote(params[k], encoding='utf-8', safe='-_.~')) for k in sorted(params)])
@@ -0,0 +1,22 @@
+"""
+Generation of 10,000 row feeds.
+"""
+import pytest
+
+from mws.generators.feeds import InventoryAvailabilityFeed, PriceAndQuantityFeed, ProductPricingFeed
+
+ROWS = [{'sku': 'SKU-%06d' % i, 'price': '%d.99' % (i % 100), 'quantity': i % 50} for i in range(10000)]
+
+
+def generate(feed):
+    contents = feed.generate()
+    if hasattr(contents, 'close'):
+        contents.close()
+
+
+@pytest.mark.benchmark(group='BaseFeed.generate')
+@pytest.mark.parametrize('feed_class', [PriceAndQuantityFeed, InventoryAvailabilityFeed, ProductPricingFeed],
+                         ids=lambda cls: cls.__name__)
+def test_generate(benchmark, feed_class):
+    feed = feed_class('access_key', 'secret_key', 'M_EXAMPLE', data=ROWS)
+    benchmark(generate, feed)
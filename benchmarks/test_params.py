@@ -0,0 +1,55 @@
+import pytest
+
+from mws.params import canonical_query
+
+from .legacy import legacy_canonical_query, legacy_products_flatten
+
+
+@pytest.fixture(scope='module')
+def fee_estimate_params(products_api, fee_estimates):
+    return products_api.flatten('FeesEstimateRequestList', 'FeesEstimateRequest', fee_estimates)
+
+
+@pytest.fixture(scope='module')
+def fulfillment_order_params(fulfillment_order):
+    params = fulfillment_order.flattened()
+    params['Action'] = 'CreateFulfillmentOrder'
+    return params
+
+
+@pytest.mark.benchmark(group='flatten GetMyFeesEstimate')
+def test_products_flatten(benchmark, products_api, fee_estimates):
+    benchmark(products_api.flatten, 'FeesEstimateRequestList', 'FeesEstimateRequest', fee_estimates)
+
+
+@pytest.mark.benchmark(group='flatten GetMyFeesEstimate')
+def test_legacy_products_flatten(benchmark, fee_estimates):
+    benchmark(legacy_products_flatten, 'FeesEstimateRequestList', 'FeesEstimateRequest', fee_estimates)
+
+
+@pytest.mark.benchmark(group='canonical_query GetMyFeesEstimate')
+def test_canonical_query_fee_estimates(benchmark, fee_estimate_params):
+    query = benchmark(canonical_query, fee_estimate_params)
+    assert query == legacy_canonical_query(fee_estimate_params)
+
+
+@pytest.mark.benchmark(group='canonical_query GetMyFeesEstimate')
+def test_legacy_canonical_query_fee_estimates(benchmark, fee_estimate_params):
+    benchmark(legacy_canonical_query, fee_estimate_params)
+
+
+@pytest.mark.benchmark(group='canonical_query CreateFulfillmentOrder')
+def test_canonical_query_fulfillment_order(benchmark, fulfillment_order_params):
+    query = benchmark(canonical_query, fulfillment_order_params)
+    assert query == legacy_canonical_query(fulfillment_order_params)
+
+
+@pytest.mark.benchmark(group='canonical_query CreateFulfillmentOrder')
+def test_legacy_canonical_query_fulfillment_order(benchmark, fulfillment_order_params):
+    benchmark(legacy_canonical_query, fulfillment_order_params)
+
+
+@pytest.mark.benchmark(group='DictParam.flattened')
+def test_dict_param_flattened(benchmark, fulfillment_order):
+    params = benchmark(fulfillment_order.flattened)
+    assert params['Items.member.1000.SellerSKU'] == 'SKU-000999'
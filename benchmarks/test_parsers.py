@@ -0,0 +1,103 @@
+"""
+Full-field extraction with the parser wrappers: load a response and read every field of every record.
+"""
+import inspect
+
+import pytest
+
+from mws.parsers import ErrorResponse
+from mws.parsers.base import BaseElementWrapper
+from mws.parsers.feeds import GetFeedSubmissionListResponse, ProcessingReport, SubmitFeedResponse
+from mws.parsers.fulfillment import GetPrepInstructionsForASINResponse, ListInboundShipmentItemsResponse, \
+    ListInboundShipmentResponse
+from mws.parsers.orders import ListOrderItemsResponse, ListOrdersResponse
+from mws.parsers.orders.listorders import mk_ship_state
+from mws.parsers.products import GetCompetitivePricingForAsinResponse, GetMatchingProductForIdResponse
+from mws.parsers.reports.requestreport import GetReportList, GetReportRequestList, RequestReportResponse
+from mws.testing import fixtures
+
+# Public properties, by wrapper class.
+_properties = {}
+
+
+def read_fields(wrapper):
+    """
+    Read every public property of a wrapper, and of the wrappers it lists.
+
+    :return: Number of fields read.
+    """
+    cls = wrapper.__class__
+    names = _properties.get(cls)
+    if names is None:
+        names = _properties[cls] = [name for name, _ in inspect.getmembers(cls, lambda m: isinstance(m, property))
+                                    if not name.startswith('_')]
+    count = len(names)
+    for name in names:
+        value = getattr(wrapper, name)
+        if isinstance(value, list):
+            count += sum(read_fields(x) for x in value if isinstance(x, BaseElementWrapper))
+    return count
+
+
+REPORT_TYPES = [(str(50000 + n), fixtures.LISTINGS_REPORT) for n in range(100)]
+
+# name -> (response class, response document, methods listing the records)
+PARSERS = {
+    'ListOrders': (ListOrdersResponse, fixtures.list_orders(token='orders-100'), ()),
+    'ListOrderItems': (ListOrderItemsResponse, fixtures.list_order_items(fixtures.order_id(1), count=20), ()),
+    'GetFeedSubmissionList': (GetFeedSubmissionListResponse, fixtures.get_feed_submission_list(),
+                              ('feed_submission_info_list',)),
+    'SubmitFeed': (SubmitFeedResponse, fixtures.submit_feed('50001', '_POST_PRODUCT_PRICING_DATA_'), ()),
+    'GetCompetitivePricingForASIN': (GetCompetitivePricingForAsinResponse, fixtures.competitive_pricing_for_asin(),
+                                     ()),
+    'GetMatchingProductForId': (GetMatchingProductForIdResponse, fixtures.matching_product_for_id(
+        ['B{:09d}'.format(n) for n in range(fixtures.SIZES['pricing'])]), ()),
+    'ListInboundShipments': (ListInboundShipmentResponse, fixtures.list_inbound_shipments(), ()),
+    'ListInboundShipmentItems': (ListInboundShipmentItemsResponse,
+                                 fixtures.list_inbound_shipment_items('FBA00000001'), ()),
+    'GetPrepInstructionsForASIN': (GetPrepInstructionsForASINResponse,
+                                   fixtures.prep_instructions_for_asin(invalid=2),
+                                   ('asin_prep_instructions_list', 'invalid_asin_list')),
+    'RequestReport': (RequestReportResponse, fixtures.request_report('50001', fixtures.LISTINGS_REPORT), ()),
+    'GetReportRequestList': (GetReportRequestList, fixtures.get_report_request_list(REPORT_TYPES), ()),
+    'GetReportList': (GetReportList, fixtures.get_report_list(REPORT_TYPES), ()),
+}
+
+
+@pytest.mark.benchmark(group='parsers')
+@pytest.mark.parametrize('action', sorted(PARSERS))
+def test_parser(benchmark, action):
+    cls, xml, methods = PARSERS[action]
+
+    def extract():
+        response = cls.load(xml)
+        count = read_fields(response)
+        for method in methods:
+            count += sum(read_fields(x) for x in getattr(response, method)())
+        return count
+
+    assert benchmark(extract) > 1
+
+
+@pytest.mark.benchmark(group='parsers')
+def test_processing_report(benchmark):
+    xml = fixtures.processing_report('50001', messages=10000, errors=1000)
+
+    def extract():
+        report = ProcessingReport(xml)
+        return report.summary, report.errors_by_code(), report.failed_skus()
+
+    summary, errors, failed_skus = benchmark(extract)
+    assert len(failed_skus) == 1000
+
+
+@pytest.mark.benchmark(group='parsers')
+def test_error_response(benchmark):
+    xml = fixtures.error_response('InvalidParameterValue', 'Invalid ASIN')
+    benchmark(lambda: read_fields(ErrorResponse.load(xml)))
+
+
+@pytest.mark.benchmark(group='mk_ship_state')
+def test_mk_ship_state(benchmark):
+    states = [state for _, state, _ in fixtures.ADDRESSES] + ['Ontario', '', 'new-york']
+    assert benchmark(lambda: [mk_ship_state(s) for s in states])[:2] == ['IL', 'WA']
@@ -0,0 +1,38 @@
+"""
+Decoding of flat file reports, on a 20,000 row orders report.
+"""
+import pytest
+
+from mws.parsers.reports import FlatFileReader, FlatFileWrapper
+from mws.testing import fixtures
+
+ROWS = 20000
+
+
+@pytest.fixture(scope='module')
+def report():
+    return b''.join(fixtures.flat_file_report(ROWS))
+
+
+def consume(lines):
+    count = 0
+    for _ in lines:
+        count += 1
+    return count
+
+
+@pytest.mark.benchmark(group='flat file')
+def test_flat_file_wrapper_lines(benchmark, report):
+    wrapper = FlatFileWrapper(report.decode('windows-1252'))
+    assert benchmark(lambda: consume(wrapper.lines())) == ROWS
+
+
+@pytest.mark.benchmark(group='flat file')
+def test_flat_file_wrapper_lines_converted(benchmark, report):
+    wrapper = FlatFileWrapper(report.decode('windows-1252'), convert_numerical=True)
+    assert benchmark(lambda: consume(wrapper.lines())) == ROWS
+
+
+@pytest.mark.benchmark(group='flat file')
+def test_flat_file_reader_typed(benchmark, report):
+    assert benchmark(lambda: consume(FlatFileReader(report, fixtures.ORDERS_REPORT, typed=True))) == ROWS
@@ -0,0 +1,38 @@
+import pytest
+
+from mws.params import canonical_query, enumerate_param
+
+from .legacy import legacy_calc_signature
+
+
+@pytest.fixture(scope='module')
+def query(products_api):
+    params = {
+        'AWSAccessKeyId': products_api.access_key, 'SellerId': products_api.account_id, 'SignatureVersion': '2',
+        'Timestamp': '2017-01-01T00:00:00Z', 'Version': products_api.version, 'SignatureMethod': 'HmacSHA256',
+        'Action': 'GetCompetitivePricingForASIN', 'MarketplaceId': 'ATVPDKIKX0DER',
+    }
+    params.update(enumerate_param('ASINList.ASIN', ['B%09d' % i for i in range(20)]))
+    return canonical_query(params)
+
+
+@pytest.mark.benchmark(group='calc_signature')
+def test_calc_signature(benchmark, products_api, query):
+    signature = benchmark(products_api.calc_signature, 'POST', query)
+    assert signature == legacy_calc_signature(products_api, 'POST', query)
+
+
+@pytest.mark.benchmark(group='calc_signature')
+def test_legacy_calc_signature(benchmark, products_api, query):
+    benchmark(legacy_calc_signature, products_api, 'POST', query)
+
+
+@pytest.mark.benchmark(group='prepare_request')
+def test_prepare_request(benchmark, products_api):
+    """
+    Everything `make_request` does before sending: parameter encoding, canonical query and signature.
+    """
+    data = dict(Action='GetCompetitivePricingForASIN', MarketplaceId='ATVPDKIKX0DER')
+    data.update(products_api.enumerate_param('ASINList.ASIN.', ['B%09d' % i for i in range(20)]))
+    prepared = benchmark(products_api.prepare_request, data, 'POST')
+    assert 'Signature=' in prepared.url
@@ -0,0 +1,32 @@
+import pytest
+
+from mws import DictWrapper
+from mws.parsers import ErrorResponse
+from mws.testing import fixtures
+from mws.utils import xml2dict
+
+
+@pytest.fixture(scope='module')
+def list_orders():
+    return fixtures.list_orders()
+
+
+@pytest.mark.benchmark(group='xml2dict')
+def test_xml2dict_fromstring(benchmark, list_orders):
+    # As `DictWrapper` calls it, on the response without namespace.
+    xml = list_orders.replace(b' xmlns="%s"' % fixtures.ORDERS_NS.encode('ascii'), b'')
+    parsed = benchmark(xml2dict().fromstring, xml)
+    assert len(parsed.ListOrdersResponse.ListOrdersResult.Orders.Order) == fixtures.SIZES['orders']
+
+
+@pytest.mark.benchmark(group='xml2dict')
+def test_dict_wrapper(benchmark, list_orders):
+    wrapper = benchmark(DictWrapper, list_orders, 'ListOrdersResult')
+    assert len(wrapper.parsed.Orders.Order) == fixtures.SIZES['orders']
+
+
+@pytest.mark.benchmark(group='ErrorResponse.load')
+def test_error_response_load(benchmark):
+    xml = fixtures.error_response('RequestThrottled', 'Request is throttled')
+    error = benchmark(ErrorResponse.load, xml)
+    assert error.code == 'RequestThrottled'
@@ -0,0 +1,367 @@
+"""
+End-to-end throughput benchmark of the public clients against the local stand-in server, or a replayed cassette.
+
+Each scenario drives `Orders`, `Products`, `Reports` or `Feeds` as an integration would:
+
+    orders    full-day order sync: ListOrders pages, then ListOrderItems of every order with a pool of workers
+    pricing   GetCompetitivePricingForASIN sweep, by batches of 20 ASINs with a pool of workers
+    reports   RequestReport, GetReportRequestList, streamed GetReport and typed rows
+    feeds     SubmitFeed of an inventory feed, GetFeedSubmissionList until processed, GetFeedSubmissionResult
+
+and reports the calls per second, the latency histogram and percentiles of the HTTP calls, the CPU time per call
+and the peak RSS of the client. The server runs in a child process, so its CPU and memory aren't counted.
+
+Usage, from the repository root:
+    python -m benchmarks.throughput [orders pricing reports feeds] [--latency 0.05] [--jitter 0.02] [--workers 6]
+    python -m benchmarks.throughput --record run.cassette   # record the responses of the stand-in
+    python -m benchmarks.throughput --replay run.cassette   # replay them without HTTP, with --latency
+"""
+import argparse
+import bisect
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from mws import Feeds, Orders, Products, Reports
+from mws.generators.feeds import InventoryAvailabilityFeed
+from mws.parsers.feeds import GetFeedSubmissionListResponse, ProcessingReport, SubmitFeedResponse
+from mws.parsers.orders import ListOrderItemsResponse, ListOrdersResponse
+from mws.parsers.products import GetCompetitivePricingForAsinResponse
+from mws.parsers.reports import FlatFileReader
+from mws.quota import QUOTAS, SHARED_QUOTAS, QuotaBucket, call_within_quota
+from mws.testing import StandInServer, fixtures
+from mws.transport import RecordingTransport, ReplayTransport, RequestsTransport, Transport
+
+SCENARIOS = ('orders', 'pricing', 'reports', 'feeds')
+CREDENTIALS = ('AKIAEXAMPLE', 'secret_key', 'A1EXAMPLE')
+MARKETPLACE_ID = fixtures.MARKETPLACE_ID
+
+# Upper bounds of the latency histogram buckets, in seconds.
+BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, float('inf'))
+
+
+class TimedTransport(Transport):
+    """
+    Records the duration of each call sent by another transport.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.durations = []
+        self.actions = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.durations = []
+            self.actions = {}
+
+    def send(self, prepared, stream=False, timeout=15):
+        start = time.perf_counter()
+        response = self.transport.send(prepared, stream=stream, timeout=timeout)
+        duration = time.perf_counter() - start
+        with self._lock:
+            self.durations.append(duration)
+            self.actions[prepared.action] = self.actions.get(prepared.action, 0) + 1
+        return response
+
+
+class PeakRSS(object):
+    """
+    Samples the resident set size of the process in a background thread, to get the peak of a scenario.
+
+    Falls back to the peak of the whole process where /proc isn't available.
+    """
+
+    INTERVAL = 0.01
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def rss(self):
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * self._page_size
+        except (IOError, OSError):
+            # kilobytes on Linux, bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+    def _run(self):
+        while not self._stop.wait(self.INTERVAL):
+            self.peak = max(self.peak, self.rss())
+
+    def __enter__(self):
+        self.peak = self.rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+
+def histogram(durations):
+    """
+    Number of calls by latency bucket.
+    """
+    counts = [0] * len(BUCKETS)
+    for d in durations:
+        counts[bisect.bisect_left(BUCKETS, d)] += 1
+    return counts
+
+
+class Runner(object):
+    """
+    Runs the scenarios with clients sending their requests through a `TimedTransport`.
+    """
+
+    def __init__(self, domain, transport, workers, quota_scale=0):
+        self.domain = domain
+        self.transport = TimedTransport(transport)
+        self.workers = workers
+        self.quota_scale = quota_scale
+        self._quotas = {}
+        self._lock = threading.Lock()
+
+    def client(self, cls):
+        return cls(*CREDENTIALS, domain=self.domain, transport=self.transport)
+
+    def quota(self, action):
+        """
+        The client side bucket of an action, shared by the workers. None if the server doesn't throttle.
+        """
+        if not self.quota_scale:
+            return
+        action = SHARED_QUOTAS.get(action, action)
+        with self._lock:
+            if action not in self._quotas:
+                max_quota, restore_rate = QUOTAS[action]
+                self._quotas[action] = QuotaBucket(max_quota, restore_rate / float(self.quota_scale))
+            return self._quotas[action]
+
+    def call(self, action, f, *args, **kwargs):
+        """
+        Call `f` within the quota of `action`, retrying throttled requests.
+        """
+        return call_within_quota(self.quota(action), f, *args, **kwargs)
+
+    def run(self, scenario, args):
+        """
+        Run a scenario and measure it.
+
+        :return: Dict of the measures.
+        """
+        self.transport.reset()
+        with PeakRSS() as rss:
+            cpu, wall = time.process_time(), time.perf_counter()
+            records = getattr(self, 'run_' + scenario)(args)
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        durations = sorted(self.transport.durations)
+        calls = len(durations)
+        return {
+            'scenario': scenario,
+            'records': records,
+            'calls': calls,
+            'actions': self.transport.actions,
+            'seconds': wall,
+            'calls_per_second': calls / wall if wall else 0.0,
+            'records_per_second': records / wall if wall else 0.0,
+            'p50': percentile(durations, 50),
+            'p90': percentile(durations, 90),
+            'p99': percentile(durations, 99),
+            'max': durations[-1] if durations else 0.0,
+            'histogram': histogram(durations),
+            'cpu_per_call': cpu / calls if calls else 0.0,
+            'cpu_seconds': cpu,
+            'peak_rss': rss.peak,
+        }
+
+    def run_orders(self, args):
+        api = self.client(Orders)
+        response = ListOrdersResponse.load(self.call(
+            'ListOrders', api.list_orders, [MARKETPLACE_ID], lastupdatedafter='2017-01-01T00:00:00Z').original)
+        orders = list(response.orders)
+        while response.next_token:
+            response = ListOrdersResponse.load(self.call(
+                'ListOrdersByNextToken', api.list_orders_by_next_token, response.next_token).original)
+            orders.extend(response.orders)
+
+        def items(order):
+            response = self.call('ListOrderItems', api.list_order_items, order.amazon_order_id)
+            return len(ListOrderItemsResponse.load(response.original).order_items)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            count = sum(executor.map(items, orders))
+        return len(orders) + count
+
+    def run_pricing(self, args):
+        api = self.client(Products)
+        asins = ['B{:09d}'.format(n) for n in range(args.asins)]
+        batches = [asins[i:i + 20] for i in range(0, len(asins), 20)]
+
+        def prices(batch):
+            response = self.call('GetCompetitivePricingForASIN', api.get_competitive_pricing_for_asin,
+                                 MARKETPLACE_ID, batch)
+            results = GetCompetitivePricingForAsinResponse.load(response.original).competitive_pricing_for_asin_results
+            return sum(1 for r in results for p in r.products if p.competitive_prices)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return sum(executor.map(prices, batches))
+
+    def run_reports(self, args):
+        api = self.client(Reports)
+        report_type = fixtures.ORDERS_REPORT
+        response = self.call('RequestReport', api.request_report, report_type, marketplaceids=[MARKETPLACE_ID])
+        report_request_id = response.parsed.ReportRequestInfo.ReportRequestId
+        while True:
+            info = self.call('GetReportRequestList', api.get_report_request_list,
+                             requestids=[report_request_id]).parsed.ReportRequestInfo
+            if info.ReportProcessingStatus == '_DONE_':
+                break
+            time.sleep(args.poll_interval)
+        response = self.call('GetReport', api.get_report, info.GeneratedReportId, stream=True)
+        with FlatFileReader(response, report_type, typed=True) as report:
+            return sum(1 for _ in report)
+
+    def run_feeds(self, args):
+        api = self.client(Feeds)
+        rows = [{'sku': 'SKU-{:06d}'.format(n), 'quantity': n % 50} for n in range(args.feed_rows)]
+        for _ in range(args.feeds):
+            feed = InventoryAvailabilityFeed(*CREDENTIALS, domain=self.domain, data=rows)
+            contents = feed.generate()
+            try:
+                response = self.call('SubmitFeed', api.submit_feed, contents, feed.enumeration_value,
+                                     marketplaceids=[MARKETPLACE_ID])
+            finally:
+                contents.close()
+            feed_submission_id = SubmitFeedResponse.load(response.original).feed_submission_id
+            while True:
+                response = self.call('GetFeedSubmissionList', api.get_feed_submission_list,
+                                     feedids=[feed_submission_id])
+                info = GetFeedSubmissionListResponse.load(response.original).feed_submission_info_list()[0]
+                if info.feed_processing_status == '_DONE_':
+                    break
+                time.sleep(args.poll_interval)
+            response = self.call('GetFeedSubmissionResult', api.get_feed_submission_result, feed_submission_id,
+                                 stream=True)
+            ProcessingReport(response).summary
+        return args.feeds * args.feed_rows
+
+
+def _serve(kwargs, conn):
+    server = StandInServer(**kwargs)
+    conn.send(server.domain)
+    server.httpd.serve_forever()
+
+
+def start_server(kwargs):
+    """
+    Start a stand-in server in a child process.
+
+    :return: (process, domain) tuple.
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(kwargs, child), daemon=True)
+    process.start()
+    return process, parent.recv()
+
+
+def print_result(result):
+    print('{scenario}: {records:,} records, {calls:,} calls in {seconds:.2f} s'.format(**result))
+    print('  throughput    {calls_per_second:10,.1f} calls/s  {records_per_second:12,.1f} records/s'.format(**result))
+    print('  latency       p50 {:.1f} ms  p90 {:.1f} ms  p99 {:.1f} ms  max {:.1f} ms'.format(
+        result['p50'] * 1000, result['p90'] * 1000, result['p99'] * 1000, result['max'] * 1000))
+    print('  cpu           {:.3f} ms/call  ({:.2f} s)'.format(result['cpu_per_call'] * 1000, result['cpu_seconds']))
+    print('  peak rss      {:.1f} MB'.format(result['peak_rss'] / 1024.0 / 1024.0))
+    print('  calls         {}'.format(', '.join('{} {}'.format(k, v) for k, v in sorted(result['actions'].items()))))
+    largest = max(result['histogram']) or 1
+    lower = 0
+    for bound, count in zip(BUCKETS, result['histogram']):
+        if count:
+            label = '> {:g} ms'.format(lower * 1000) if bound == float('inf') else '<= {:g} ms'.format(bound * 1000)
+            print('  {:>12} {:8,} {}'.format(label, count, '#' * int(round(40.0 * count / largest))))
+        lower = bound
+    print('')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='Scenarios to run among {}, all by default.'.format(', '.join(SCENARIOS)))
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds each response is delayed by.')
+    parser.add_argument('--jitter', type=float, default=0.02, help='Random seconds added to the latency.')
+    parser.add_argument('--workers', type=int, default=6, help='Concurrent requests of the orders and pricing '
+                                                               'scenarios.')
+    parser.add_argument('--quota-scale', type=float, default=0,
+                        help='Enforce the MWS quotas, restored this many times faster. Not enforced by default.')
+    parser.add_argument('--orders', type=int, default=2000, help='Orders of the day.')
+    parser.add_argument('--items-per-order', type=int, default=2)
+    parser.add_argument('--asins', type=int, default=10000, help='ASINs of the pricing sweep.')
+    parser.add_argument('--report-rows', type=int, default=200000)
+    parser.add_argument('--feeds', type=int, default=5, help='Feeds submitted.')
+    parser.add_argument('--feed-rows', type=int, default=10000)
+    parser.add_argument('--poll-interval', type=float, default=0.1)
+    parser.add_argument('--record', metavar='PATH', help='Record the responses to a cassette.')
+    parser.add_argument('--replay', metavar='PATH', help='Replay the responses of a cassette instead of calling '
+                                                         'the stand-in server.')
+    parser.add_argument('--json', metavar='PATH', help='Save the results to a JSON file.')
+    args = parser.parse_args()
+    for scenario in args.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error('unknown scenario: {}'.format(scenario))
+
+    process = None
+    if args.replay:
+        domain = 'https://mws.amazonservices.com'
+        transport = ReplayTransport(args.replay, latency=args.latency)
+    else:
+        quotas = {action: (max_quota, restore_rate / args.quota_scale)
+                  for action, (max_quota, restore_rate) in QUOTAS.items()} if args.quota_scale else None
+        process, domain = start_server(dict(
+            secret_key=CREDENTIALS[1], latency=args.latency, jitter=args.jitter, quotas=quotas,
+            throttle=bool(args.quota_scale), volume={
+                'orders': args.orders, 'items_per_order': args.items_per_order, 'report_rows': args.report_rows}))
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(args.workers, 10))
+        session.mount('http://', adapter)
+        transport = RequestsTransport(session)
+        if args.record:
+            transport = RecordingTransport(args.record, transport)
+
+    runner = Runner(domain, transport, args.workers, args.quota_scale)
+    results = []
+    try:
+        for scenario in args.scenarios or SCENARIOS:
+            result = runner.run(scenario, args)
+            print_result(result)
+            results.append(result)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'args': vars(args), 'buckets': [str(b) for b in BUCKETS], 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
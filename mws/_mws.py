@@ -11,11 +11,12 @@ except ImportError:
     from urllib import quote  # Python 2.X
 
 import hashlib
-import hmac
 import base64
 import logging
 import datetime
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 
 try:
@@ -24,10 +25,14 @@ except ImportError:
     from xml.parsers.expat import ExpatError as XMLError
 from time import strftime, gmtime
 from lxml.etree import XMLSyntaxError
-from requests import request
-from requests.exceptions import HTTPError
 
+from . import params as request_params
+from .params import canonical_query
+from .quota import QuotaBucket, call_within_quota
+from .signing import RequestSigner
+from .transport import default_transport
 from .utils import xml2dict
+from .reportstore import StoringStreamWrapper
 
 
 __all__ = [
@@ -69,11 +74,20 @@ class MWSError(Exception):
 
 
 def calc_md5(string):
-    """Calculates the MD5 encryption for the given string
+    """Calculates the base64 encoded MD5 digest of the given bytes, or of the contents of a binary file object.
+    File objects are read in chunks and rewound to their initial position.
     """
     md = hashlib.md5()
-    md.update(string)
-    return base64.encodebytes(md.digest()).strip('\n')
+    if hasattr(string, 'read'):
+        position = string.tell()
+        for chunk in iter(lambda: string.read(64 * 1024), b''):
+            md.update(chunk)
+        string.seek(position)
+    else:
+        if isinstance(string, str):
+            string = string.encode('utf-8')
+        md.update(string)
+    return base64.b64encode(md.digest()).decode('ascii')
 
 
 def remove_empty(d):
@@ -87,9 +101,14 @@ def remove_empty(d):
     return d
 
 
+NAMESPACE_REGEX = re.compile(' xmlns(:ns2)?="[^"]+"|(ns2:)|(xml:)')
+NAMESPACE_REGEX_BYTES = re.compile(b' xmlns(:ns2)?="[^"]+"|(ns2:)|(xml:)')
+
+
 def remove_namespace(xml):
-    regex = re.compile(' xmlns(:ns2)?="[^"]+"|(ns2:)|(xml:)')
-    return regex.sub('', xml)
+    if isinstance(xml, bytes):
+        return NAMESPACE_REGEX_BYTES.sub(b'', xml)
+    return NAMESPACE_REGEX.sub('', xml)
 
 
 class DictWrapper(object):
@@ -97,7 +116,7 @@ class DictWrapper(object):
         self.original = xml
         self._rootkey = rootkey
         self._mydict = xml2dict().fromstring(remove_namespace(xml))
-        self._response_dict = self._mydict.get(self._mydict.keys()[0],
+        self._response_dict = self._mydict.get(next(iter(self._mydict)),
                                                self._mydict)
 
     @property
@@ -124,6 +143,102 @@ class DataWrapper(object):
         return self.original
 
 
+class StreamWrapper(object):
+    """
+        Wrapper for a response body which is streamed instead of being loaded in memory, ie. large reports.
+        The hash sent by Amazon is validated once the whole body has been read.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, response):
+        self.response = response
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        md = hashlib.md5()
+        for chunk in self.response.iter_content(chunk_size):
+            md.update(chunk)
+            yield chunk
+        if 'content-md5' in self.response.headers:
+            if self.response.headers['content-md5'] != base64.b64encode(md.digest()).decode('ascii'):
+                raise MWSError("Wrong Contentlength, maybe amazon error...")
+
+    @property
+    def parsed(self):
+        return self.iter_content()
+
+
+class PreparedRequest(object):
+    """
+    A signed request, returned by `MWS.prepare_request`. Unpacks as a (method, url, headers, body) tuple.
+    """
+
+    # Seconds during which Amazon accepts a request after its Timestamp.
+    VALIDITY = 15 * 60
+
+    __slots__ = ('method', 'url', 'headers', 'body', 'action', 'expires')
+
+    def __init__(self, method, url, headers, body, action, expires):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.action = action
+        self.expires = expires
+
+    def __iter__(self):
+        return iter((self.method, self.url, self.headers, self.body))
+
+    def expired(self, margin=0):
+        """
+        Check whether Amazon would refuse the request because its signature is too old.
+
+        :param margin: Seconds the request is considered expired before its actual expiry, ie. for clock skew.
+        """
+        return time.time() + margin >= self.expires
+
+    def decode(self, status_code, headers, content):
+        """
+        Decode the response of the request. See `decode_response`.
+        """
+        return decode_response(status_code, headers, content, self.action)
+
+    def __repr__(self):
+        return '<PreparedRequest {} {}>'.format(self.method, self.action)
+
+
+def decode_response(status_code, headers, content, action=None):
+    """
+    Decode the response of a request, as `MWS.make_request` does.
+
+    :param status_code: The HTTP status code.
+    :param headers: Dict of the response headers.
+    :param content: The response body, bytes.
+    :param action: The Action of the request.
+    :return: `DictWrapper` for XML responses, `DataWrapper` otherwise. (ie. reports)
+        Raises `ErrorResponse` if Amazon answered with an error, `MWSError` for other HTTP errors.
+    """
+    # Error responses start with the ErrorResponse element, successful responses aren't parsed twice.
+    if status_code >= 400 or b'<ErrorResponse' in content[:512]:
+        from .parsers.errors import ErrorResponse
+        try:
+            err = ErrorResponse.load(content)
+        except XMLSyntaxError:
+            pass
+        else:
+            if err.message:
+                raise err
+
+    if status_code >= 400:
+        raise MWSError(content.decode('utf-8', 'replace'))
+
+    # I do not check the headers to decide which content structure to server simply because sometimes
+    # Amazon's MWS API returns XML error responses with "text/plain" as the Content-Type.
+    try:
+        return DictWrapper(content, action + "Result" if action else None)
+    except XMLError:
+        return DataWrapper(content, headers)
+
+
 class MWS(object):
     """ Base Amazon API class """
 
@@ -151,7 +266,14 @@ class MWS(object):
     # Which is the name of the parameter for that specific account type.
     ACCOUNT_TYPE = "SellerId"
 
-    def __init__(self, access_key, secret_key, account_id, region='US', domain='', uri="", version="", auth_token=""):
+    # Transport sending the requests, see `mws.transport`. Set it on MWS to change the transport of every client.
+    # Defaults to a `RequestsTransport`.
+    transport = None
+
+    def __init__(self, access_key, secret_key, account_id, region='US', domain='', uri="", version="", auth_token="",
+                 transport=None):
+        if transport is not None:
+            self.transport = transport
         self.access_key = access_key
         self.secret_key = secret_key
         self.account_id = account_id
@@ -159,6 +281,7 @@ class MWS(object):
         self.version = version or self.VERSION
         self.uri = uri or self.URI
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._signer = None
 
         if domain:
             self.domain = domain
@@ -171,10 +294,26 @@ class MWS(object):
             }
             raise MWSError(error_msg)
 
-    def make_request(self, extra_data, method="GET", **kwargs):
-        """Make request to Amazon MWS API with these parameters
+    def prepare_request(self, extra_data, method="GET", body='', extra_headers=None):
+        """
+        Build and sign a request without sending it.
+
+        The returned request can be sent by any HTTP client, ie. by workers which don't hold the secret key, and its
+        response decoded with `decode_response`. Amazon refuses requests whose Timestamp is more than 15 minutes
+        old: send it before its `expires` time.
+
+        Usage:
+            >>> prepared = api.prepare_request(dict(Action='GetCompetitivePricingForASIN', ...), 'POST')
+            >>> method, url, headers, body = prepared
+            >>> response = requests.request(method, url, data=body, headers=headers)
+            >>> parsed = decode_response(response.status_code, response.headers, response.content, prepared.action)
+
+        :param extra_data: Dict of the request parameters, including the Action.
+        :param method: The HTTP method.
+        :param body: The request body. (ex. the feed of SubmitFeed)
+        :param extra_headers: Dict of headers added to the request.
+        :return: `PreparedRequest`
         """
-
         # Remove all keys with an empty value because
         # Amazon's MWS does not allow such a thing.
         extra_data = remove_empty(extra_data)
@@ -190,57 +329,46 @@ class MWS(object):
         if self.auth_token:
             params['MWSAuthToken'] = self.auth_token
 
-        # Convert any datetime objects in params to string format
-        for k, v in extra_data.items():
-            if isinstance(v, datetime.datetime):
-                extra_data[k] = self.get_datetimestamp(v)
-
         params.update(extra_data)
-        try:
-            request_description = '&'.join(['%s=%s' % (k, quote(params[k], encoding='utf-8', safe='-_.~')) for k in sorted(params)])
-        except TypeError:
-            self.logger.error('url params:\n    {}'.format('\n    '.format(' = '.join(x) for x in params.items())))
-            raise
+        # Datetime objects and numbers are formatted by the encoder.
+        request_description = canonical_query(params)
         signature = self.calc_signature(method, request_description)
         url = '%s%s?%s&Signature=%s' % (self.domain, self.uri, request_description, quote(signature))
         headers = {'User-Agent': 'python-amazon-mws/0.0.1 (Language=Python)'}
-        headers.update(kwargs.get('extra_headers', {}))
+        if extra_headers:
+            headers.update(extra_headers)
+        return PreparedRequest(method, url, headers, body, extra_data.get('Action'),
+                               time.time() + PreparedRequest.VALIDITY)
 
-        self.logger.debug('request_url: {}'.format(url))
-
-        try:
-            # Some might wonder as to why i don't pass the params dict as the params argument to request.
-            # My answer is, here i have to get the url parsed string of params in order to sign it, so
-            # if i pass the params dict as params to request, request will repeat that step because it will need
-            # to convert the dict to a url parsed string, so why do it twice if i can just pass the full url :).
-            response = request(method, url, data=kwargs.get('body', ''), headers=headers, timeout=15)
+    def make_request(self, extra_data, method="GET", **kwargs):
+        """Make request to Amazon MWS API with these parameters
+        """
+        prepared = self.prepare_request(extra_data, method, kwargs.get('body', ''), kwargs.get('extra_headers'))
+        self.logger.debug('request_url: %s', prepared.url)
+
+        # Some might wonder as to why i don't pass the params dict as the params argument to request.
+        # My answer is, here i have to get the url parsed string of params in order to sign it, so
+        # if i pass the params dict as params to request, request will repeat that step because it will need
+        # to convert the dict to a url parsed string, so why do it twice if i can just pass the full url :).
+        stream = kwargs.get('stream', False)
+        transport = self.transport or default_transport
+        response = transport.send(prepared, stream=stream, timeout=15)
+        if self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug('response headers:\n    {}'.format('\n    '.join([' = '.join(x) for x in response.headers.items()])))
 
-            try:
-                from .parsers.errors import ErrorResponse
-                err = ErrorResponse.load(response.content)
-                if err.message:
-                    raise err
-            except XMLSyntaxError:
-                pass
-
-            response.raise_for_status()
-            # When retrieving data from the response object,
-            # be aware that response.content returns the content in bytes while response.text calls
-            # response.content and converts it to unicode.
-            data = response.content
-
-            # I do not check the headers to decide which content structure to server simply because sometimes
-            # Amazon's MWS API returns XML error responses with "text/plain" as the Content-Type.
-            try:
-                parsed_response = DictWrapper(data, extra_data.get("Action") + "Result")
-            except XMLError:
-                parsed_response = DataWrapper(data, response.headers)
-
-        except HTTPError as e:
-            error = MWSError(str(e.response.text))
-            error.response = e.response
-            raise error
+        # Streamed bodies are handed over unread, unless Amazon answered with an error.
+        if stream and response.ok:
+            parsed_response = StreamWrapper(response)
+            parsed_response.response = response
+            return parsed_response
+
+        try:
+            parsed_response = decode_response(response.status_code, response.headers, response.content,
+                                              prepared.action)
+        except (MWSError, ValueError) as e:
+            # Store the response object in the error for quick access
+            e.response = response
+            raise
 
         # Store the response object in the parsed_response for quick access
         parsed_response.response = response
@@ -257,11 +385,17 @@ class MWS(object):
     def calc_signature(self, method, request_description):
         """Calculate MWS signature to interface with Amazon
         """
-        sig_data = method + '\n' + self.domain.replace('https://', '').lower() + '\n' + self.uri + '\n' + request_description
-        self.logger.debug('string to sign:\n    {}'.format('\n    '.join(sig_data.split('&'))))
-        x = base64.b64encode(hmac.new(bytes(self.secret_key, encoding='utf-8'), bytes(sig_data, encoding='utf-8'), hashlib.sha256).digest())
-        self.logger.debug(quote(x))
-        return quote(x)
+        return self.signer.sign(method, request_description)
+
+    @property
+    def signer(self):
+        """
+        The `RequestSigner` of the client, created again if the key, domain or uri were changed.
+        """
+        signer = self._signer
+        if signer is None or not signer.matches(self.secret_key, self.domain, self.uri):
+            signer = self._signer = RequestSigner(self.secret_key, self.domain, self.uri)
+        return signer
 
     def get_datetimestamp(self, dt=None):
         """
@@ -293,13 +427,7 @@ class MWS(object):
                 MarketplaceIdList.Id.3: 4343
             }
         """
-        params = {}
-        if values is not None:
-            if not param.endswith('.'):
-                param = "%s." % param
-            for num, value in enumerate(values):
-                params['%s%d' % (param, (num + 1))] = value
-        return params
+        return request_params.enumerate_param(param, values)
 
 
 class Feeds(MWS):
@@ -312,11 +440,17 @@ class Feeds(MWS):
         """
         Uploads a feed ( xml or .tsv ) to the seller's inventory.
         Can be used for creating/updating products on Amazon.
+
+        :param feed: The feed contents, as text, bytes or a binary file object. File objects are streamed.
+            Text is encoded with the charset of `content_type`, utf-8 by default.
         """
         data = dict(Action='SubmitFeed',
                     FeedType=feed_type,
                     PurgeAndReplace=purge)
         data.update(self.enumerate_param('MarketplaceIdList.Id.', marketplaceids))
+        if isinstance(feed, str):
+            charset = re.search(r'charset=([\w-]+)', content_type)
+            feed = feed.encode(charset.group(1) if charset else 'utf-8')
         md = calc_md5(feed)
         return self.make_request(data, method="POST", body=feed,
                                  extra_headers={'Content-MD5': md, 'Content-Type': content_type})
@@ -357,9 +491,16 @@ class Feeds(MWS):
         data.update(self.enumerate_param('FeedTypeList.Type.', feedtypes))
         return self.make_request(data)
 
-    def get_feed_submission_result(self, feedid):
+    def get_feed_submission_result(self, feedid, stream=False):
+        """
+        Returns the processing report of a feed submission.
+
+        :param feedid: The FeedSubmissionId.
+        :param stream: Stream the report instead of loading it in memory. The returned wrapper can be read with
+            `ProcessingReport`, which parses large reports in constant memory.
+        """
         data = dict(Action='GetFeedSubmissionResult', FeedSubmissionId=feedid)
-        return self.make_request(data)
+        return self.make_request(data, stream=stream)
 
 
 class Reports(MWS):
@@ -367,11 +508,37 @@ class Reports(MWS):
 
     ACCOUNT_TYPE = "Merchant"
 
+    def __init__(self, *args, **kwargs):
+        """
+        :param report_store: (Optional) `ReportStore` consulted by `get_report` before downloading a report, and
+            where downloaded reports are saved.
+        """
+        self.report_store = kwargs.pop('report_store', None)
+        MWS.__init__(self, *args, **kwargs)
+
     ## REPORTS ###
 
-    def get_report(self, report_id):
+    def get_report(self, report_id, stream=False):
+        """
+        Returns the contents of a report.
+
+        :param report_id: The ReportId of the report.
+        :param stream: Stream the report instead of loading it in memory. The returned wrapper's `iter_content`
+            yields the report in chunks, which can be read with `FlatFileReader`.
+        """
+        if self.report_store is not None:
+            stored = self.report_store.load(report_id)
+            if stored is not None:
+                self.logger.debug('report_id={} read from the report store'.format(report_id))
+                return stored
         data = dict(Action='GetReport', ReportId=report_id)
-        return self.make_request(data)
+        response = self.make_request(data, stream=stream)
+        if self.report_store is not None:
+            if isinstance(response, StreamWrapper):
+                response = StoringStreamWrapper(response, self.report_store, report_id)
+            elif isinstance(response, DataWrapper):
+                self.report_store.put(report_id, response.original)
+        return response
 
     def get_report_count(self, report_types=(), acknowledged=None, fromdate=None, todate=None):
         data = dict(Action='GetReportCount',
@@ -510,15 +677,12 @@ class Products(MWS):
         nd = {}
         for k, v in d.items():
             if isinstance(v, dict):
-                for k_, v_ in v.items():
-                    nd[k_] = self.flatten(l_key, l_val, v_)
+                nd.update(request_params.flatten(v, k, request_params.ENUMERATED))
             elif isinstance(v, list):
                 # enumerate the list parameters so that its formatted in the correct way for the url parameters.
                 # ex. FeesEstimateRequestList.FeesEstimateRequest.1.IdValue
                 # <List Key>.<List Value>.<Enumeration Index>.<Dict Key>
-                for i, fee_estimate_request in enumerate(v, 1):
-                    for k_, v_ in fee_estimate_request.items():
-                        nd['{}.{}.{}.{}'.format(l_key, l_val, i, k_)] = v_
+                nd.update(request_params.enumerate_param('{}.{}'.format(l_key, l_val), v))
             else:
                 nd[k] = v
         return nd
@@ -805,6 +969,64 @@ class OutboundShipments(MWS):
     VERSION = "2010-10-01"
     # To be completed
 
+    # Number of orders sent concurrently by `create_fulfillment_orders`.
+    MAX_WORKERS = 6
+
+    # How many times a throttled request is retried before giving up.
+    MAX_RETRIES = 5
+
+    def create_fulfillment_order(self, order):
+        """
+        Requests that Amazon ship items from the seller's inventory in Amazon's fulfillment network to a
+        destination address.
+
+        :param order: `FulfillmentOrder`
+        """
+        data = dict(Action='CreateFulfillmentOrder')
+        data.update(order.flattened())
+        return self.make_request(data, "POST")
+
+    def _create_fulfillment_order(self, order, quota):
+        return call_within_quota(quota, self.create_fulfillment_order, order, max_retries=self.MAX_RETRIES)
+
+    def create_fulfillment_orders(self, orders, max_workers=MAX_WORKERS, quota=None):
+        """
+        Send many fulfillment orders concurrently, within the CreateFulfillmentOrder quota.
+
+        Orders are read from the iterable as workers become available, so it can be a generator. Throttled
+        requests are retried, other errors are yielded with their order.
+
+        Usage:
+            >>> api = OutboundShipments('access_key', 'secret_key', 'account_id')
+            >>> for order, response, error in api.create_fulfillment_orders(orders):
+            >>>     if error is not None:
+            >>>         print order.seller_fulfillment_order_id, error
+
+        :param orders: Iterable of `FulfillmentOrder`.
+        :param max_workers: Number of concurrent requests.
+        :param quota: `QuotaBucket` shared by the workers. Defaults to a bucket with the CreateFulfillmentOrder
+            quota.
+        :return: Generator yielding an (order, response, error) tuple per order, in completion order. Either the
+            response or the error is None.
+        """
+        quota = quota or QuotaBucket.for_action('CreateFulfillmentOrder')
+        orders = iter(orders)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while True:
+                # Keep twice as many orders in flight as workers, so that the workers never wait for the caller.
+                for order in orders:
+                    running[executor.submit(self._create_fulfillment_order, order, quota)] = order
+                    if len(running) >= max_workers * 2:
+                        break
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    order = running.pop(future)
+                    error = future.exception()
+                    yield order, (future.result() if error is None else None), error
+
 
 class Recommendations(MWS):
 
@@ -1,5 +1,6 @@
 import datetime
 from ._mws import MWS
+from .params import flatten, format_value
 
 
 def remove_empty(d):
@@ -55,6 +56,12 @@ def from_iso_8601_format(dt_str):
 
 
 class DictParam(dict):
+    """
+    Base class of the request elements. The values are stored in the dict itself, keyed by their API name.
+    """
+
+    # No per instance __dict__: orders are created by the thousand.
+    __slots__ = ()
 
     def __init__(self, **kwargs):
         super(DictParam, self).__init__(**kwargs)
@@ -67,52 +74,12 @@ class DictParam(dict):
         """
         Return all nested elements in a flattened dict to be able to easily convert to url params.
 
-        Flatten all elements which have a flatten attribute. If the element is a list, we enumerate the
-        params and create a prefix based on the list index.
-        :return:
-        """
-
-        def _flatten(k_, v_):
-            """
-            Flatten the object if possible, else just add the object to the dict.
-
-            :param k_:
-            :param v_:
-            :return:
-            """
-            d_ = {}
-
-            # Check if v can be flattened.
-            if hasattr(v_, 'flattened'):
-                for kf, vf in v_.flattened().items():
-                    # Dont add any elements with a falsey value.
-                    if not vf:
-                        continue
-                    # Generate the key so that it matches API specs for the encoded URL params.
-                    # (ex. DeliveryWindow.EndDateTime)
-                    kf = '{}.{}'.format(k_, kf)
-                    d_[kf] = str(vf)
-            else:
-                # Set original value since nothing needs to be flattened.
-                d_[k_] = str(v_)
-            return d_
-
-        d = {}
-        for k, v in self.items():
-            # Dont add any elements with a falsey value.
-            if not v:
-                continue
-
-            # If v is a list, enumerate the params so that we can match the format for a list in url params
-            # (ex. Items.member.1.PerUnitDeclaredValue.CurrencyCode)
-            if type(v) is list:
-                for i, e in enumerate(v):
-                    i += 1
-                    pfx = '{}.member.{}'.format(k, i)
-                    d.update(_flatten(pfx, e))
-            else:
-                d.update(_flatten(k, v))
-        return d
+        Nested elements are prefixed with their key, list elements with their key and 1 based index.
+        (ex. DeliveryWindow.EndDateTime, Items.member.1.PerUnitDeclaredValue.CurrencyCode)
+        Elements with a falsey value are dropped.
+        :return:
+        """
+        return {k: format_value(v) for k, v in flatten(self).items()}
 
 
 class Currency(DictParam):
@@ -120,6 +87,8 @@ class Currency(DictParam):
     Wrapper for Currency elements.
     """
 
+    __slots__ = ()
+
     def __init__(self, value=0.0, currency_code='USD', **kwargs):
         """
         Currency type and amount.
@@ -190,6 +159,8 @@ class CODSettings(DictParam):
     Wrapper for COD Settings elements.
     """
 
+    __slots__ = ()
+
     def __init__(self, is_cod_required=False, cod_charge=0, cod_charge_tax=0,
                  shipping_charge=0, shipping_charge_tax=0):
         """
@@ -292,6 +263,8 @@ class DeliveryWindow(DictParam):
     Wrapper for DeliveryWindow element.
     """
 
+    __slots__ = ()
+
     def __init__(self, start_date_time=None, end_date_time=None):
         """
         Specifies the time range within which your Scheduled Delivery fulfillment order should be delivered.
@@ -346,6 +319,8 @@ class Address(DictParam):
     Wrapper for Address elements.
     """
 
+    __slots__ = ()
+
     max_name_len = 50
     max_line_1_len = 60
     max_line_2_len = 60
@@ -530,6 +505,8 @@ class CreateFulfillmentOrderItem(DictParam):
     Wrapper for CreateFulfillmentOrderItem element.
     """
 
+    __slots__ = ()
+
     max_seller_sku_len = 50
     max_seller_fulfillment_order_item_id_len = 50
     max_gift_message_len = 512
@@ -689,11 +666,14 @@ class CreateFulfillmentOrderItem(DictParam):
         return cls()
 
 
-class CreateFulfillmentOrder(DictParam, MWS):
+class FulfillmentOrder(DictParam):
+    """
+    A fulfillment order, sent with `OutboundShipments.create_fulfillment_order`.
 
-    URI = '/FulfillmentOutboundShipment/2010-10-01/'
-    VERSION = '2010-10-01'
-    NS = "{http://mws.amazonaws.com/FulfillmentOutboundShipment/2010-10-01/}"
+    http://docs.developer.amazonservices.com/en_US/fba_outbound/FBAOutbound_CreateFulfillmentOrder.html.
+    """
+
+    __slots__ = ()
 
     valid_fulfillment_action_values = {
         'Ship',
@@ -719,14 +699,11 @@ class CreateFulfillmentOrder(DictParam, MWS):
     max_displayable_order_comment_len = 1000
     max_email_len = 60
 
-    def __init__(self, access_key, secret_key, account_id, region='US', domain='', uri="", version="2010-10-01",
-                 auth_token="", marketplace_id='ATVPDKIKX0DER', seller_fulfillment_order_id='',
-                 fulfillment_action='Ship', displayable_order_id='1', displayable_order_date_time='',
-                 displayable_order_comment='', shipping_speed_category='Standard', destination_address=None,
-                 fulfillment_policy='FillOrKill', notification_email_list=(), cod_settings=None, items=(),
-                 delivery_window=None):
+    def __init__(self, marketplace_id='ATVPDKIKX0DER', seller_fulfillment_order_id='', fulfillment_action='Ship',
+                 displayable_order_id='1', displayable_order_date_time='', displayable_order_comment='',
+                 shipping_speed_category='Standard', destination_address=None, fulfillment_policy='FillOrKill',
+                 notification_email_list=(), cod_settings=None, items=(), delivery_window=None):
         super(DictParam, self).__init__()
-        MWS.__init__(self, access_key, secret_key, account_id, region, domain, uri, version, auth_token)
         self.marketplace_id = marketplace_id
         self.seller_fulfillment_order_id = seller_fulfillment_order_id
         self.fulfillment_action = fulfillment_action
@@ -960,6 +937,24 @@ class CreateFulfillmentOrder(DictParam, MWS):
     def delivery_window(self, val):
         self['DeliveryWindow'] = DeliveryWindow.load(val)
 
+
+class CreateFulfillmentOrder(FulfillmentOrder, MWS):
+    """
+    A fulfillment order bundled with its own client.
+
+    Kept for compatibility: every instance carries the credentials and a logger, to send many orders use
+    `FulfillmentOrder` with a single `OutboundShipments` client instead.
+    """
+
+    URI = '/FulfillmentOutboundShipment/2010-10-01/'
+    VERSION = '2010-10-01'
+    NS = "{http://mws.amazonaws.com/FulfillmentOutboundShipment/2010-10-01/}"
+
+    def __init__(self, access_key, secret_key, account_id, region='US', domain='', uri="", version="2010-10-01",
+                 auth_token="", **kwargs):
+        FulfillmentOrder.__init__(self, **kwargs)
+        MWS.__init__(self, access_key, secret_key, account_id, region, domain, uri, version, auth_token)
+
     def request(self):
         data = dict(
             Action='CreateFulfillmentOrder'
@@ -0,0 +1,247 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from mws.parsers.feeds.watcher import FeedSubmissionWatcher
+from mws.quota import QuotaBucket
+from .feeds import PriceAndQuantityFeed
+
+
+class FeedBatch(object):
+    """
+    The updates combined in one feed submission by a `FeedAggregator`.
+    """
+
+    def __init__(self, feed_class, marketplace_id, created_at):
+        self.feed_class = feed_class
+        self.marketplace_id = marketplace_id
+        self.created_at = created_at
+        # sku -> fields, in the order the skus were first updated
+        self.updates = OrderedDict()
+        self.size = 0
+        self.feed_submission_id = None
+        # Resolved with the processing report once the feed is processed.
+        self.future = Future()
+
+    @property
+    def feed_type(self):
+        return self.feed_class.enumeration_value
+
+    def rows(self):
+        return [dict(fields, sku=sku) for sku, fields in self.updates.items()]
+
+    def __len__(self):
+        return len(self.updates)
+
+    def __repr__(self):
+        return '<FeedBatch {} {} skus={} feed_submission_id={}>'.format(
+            self.feed_type, self.marketplace_id, len(self.updates), self.feed_submission_id)
+
+
+def _row_size(sku, fields):
+    return len(sku) + sum(len(str(v)) + 1 for v in fields.values())
+
+
+class FeedAggregator(object):
+    """
+    Coalesce many small listing updates into few feed submissions.
+
+    Updates are buffered per feed type and marketplace. Updating a SKU which is already buffered overwrites
+    its fields, so only the last write of each field is submitted. A buffer is submitted as one feed as soon as
+    it holds `max_skus` SKUs, about `max_bytes` of data, or when its first update is `max_age` seconds old.
+    Submissions are made from a background thread, within the SubmitFeed quota.
+
+    Feed classes must accept a `data` keyword argument: a list of dicts with a `sku` key and the updated fields.
+    (ex. `PriceAndQuantityFeed`)
+
+    Usage:
+        >>> aggregator = FeedAggregator('access_key', 'secret_key', 'account_id')
+        >>> batch = aggregator.update('MySku123', price='12.99')
+        >>> aggregator.update('MySku123', quantity=4)
+        >>> aggregator.flush()
+        >>> print batch.feed_submission_id, batch.future.result()
+    """
+
+    MAX_SKUS = 10000
+    MAX_BYTES = 5 * 1024 * 1024
+    MAX_AGE = 60
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token='',
+                 feed_class=PriceAndQuantityFeed, max_skus=MAX_SKUS, max_bytes=MAX_BYTES, max_age=MAX_AGE,
+                 watcher=None, quota=None, clock=time.monotonic):
+        """
+
+        :param feed_class: Default feed class of the updates.
+        :param max_skus: Number of SKUs which triggers a submission.
+        :param max_bytes: Approximate feed size which triggers a submission.
+        :param max_age: Seconds after which buffered updates are submitted.
+        :param watcher: `FeedSubmissionWatcher` to use. Defaults to the watcher shared for these credentials.
+        :param quota: `QuotaBucket` for SubmitFeed, to share it with other feed producers.
+        """
+        self.mws_access_key = mws_access_key
+        self.mws_secret_key = mws_secret_key
+        self.mws_account_id = mws_account_id
+        self.mws_auth_token = mws_auth_token
+        self.feed_class = feed_class
+        self.max_skus = max_skus
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.watcher = watcher
+        self.quota = quota or QuotaBucket.for_action('SubmitFeed')
+        self._clock = clock
+        self._buffers = OrderedDict()
+        # (feed type, marketplace id, sku) -> last batch the sku was submitted in
+        self._submissions = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def update(self, sku, marketplace_id='ATVPDKIKX0DER', feed_class=None, **fields):
+        """
+        Buffer an update.
+
+        :param sku: The SKU to update.
+        :param marketplace_id: The marketplace of the listing.
+        :param feed_class: Feed class of the update. Defaults to the aggregator's feed class.
+        :param fields: Updated fields. (ex. price='12.99', quantity=4)
+        :return: The `FeedBatch` the update will be submitted in.
+        """
+        feed_class = feed_class or self.feed_class
+        key = (feed_class, marketplace_id)
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError('{} is closed'.format(self.__class__.__name__))
+            batch = self._buffers.get(key)
+            created = batch is None
+            if created:
+                batch = self._buffers[key] = FeedBatch(feed_class, marketplace_id, self._clock())
+            previous = batch.updates.get(sku)
+            if previous is not None:
+                batch.size -= _row_size(sku, previous)
+                previous.update(fields)
+                fields = previous
+            else:
+                fields = batch.updates[sku] = dict(fields)
+            batch.size += _row_size(sku, fields)
+            if len(batch) >= self.max_skus or batch.size >= self.max_bytes or created:
+                self._condition.notify()
+            self._start()
+        return batch
+
+    def submission_for(self, sku, marketplace_id='ATVPDKIKX0DER', feed_class=None):
+        """
+        Return the last batch a SKU was submitted in, or None.
+
+        :return: `FeedBatch`
+        """
+        feed_class = feed_class or self.feed_class
+        with self._condition:
+            return self._submissions.get((feed_class.enumeration_value, marketplace_id, sku))
+
+    @property
+    def pending(self):
+        """
+        Number of SKUs waiting to be submitted.
+        """
+        with self._condition:
+            return sum(len(batch) for batch in self._buffers.values())
+
+    def _is_due(self, batch, now):
+        return len(batch) >= self.max_skus or batch.size >= self.max_bytes or now - batch.created_at >= self.max_age
+
+    def _take(self, force=False):
+        """
+        Remove the batches to submit from the buffers. Must be called with the condition held.
+        """
+        now = self._clock()
+        batches = [batch for batch in self._buffers.values() if force or self._is_due(batch, now)]
+        for batch in batches:
+            del self._buffers[(batch.feed_class, batch.marketplace_id)]
+        return batches
+
+    def flush(self):
+        """
+        Submit every buffered update now.
+
+        :return: List of the submitted `FeedBatch`.
+        """
+        with self._condition:
+            batches = self._take(force=True)
+        for batch in batches:
+            self._submit(batch)
+        return batches
+
+    def _submit(self, batch):
+        feed = batch.feed_class(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                auth_token=self.mws_auth_token, marketplace_ids=(batch.marketplace_id,),
+                                data=batch.rows())
+        watcher = self.watcher or FeedSubmissionWatcher.shared(self.mws_access_key, self.mws_secret_key,
+                                                               self.mws_account_id, self.mws_auth_token)
+        try:
+            self.quota.acquire()
+            future = feed.submit(watcher=watcher)
+        except Exception as e:
+            self.logger.exception('Submitting %s failed' % batch)
+            batch.future.set_exception(e)
+            return
+        batch.feed_submission_id = feed.feed_submission_id
+        self.logger.info('Submitted %s' % batch)
+        with self._condition:
+            for sku in batch.updates:
+                self._submissions[(batch.feed_type, batch.marketplace_id, sku)] = batch
+        future.add_done_callback(lambda f: self._resolve(batch, f))
+
+    @staticmethod
+    def _resolve(batch, future):
+        try:
+            batch.future.set_result(future.result())
+        except Exception as e:
+            batch.future.set_exception(e)
+
+    def _start(self):
+        # Must be called with the condition held.
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.__class__.__name__)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        self._thread = None
+                        return
+                    batches = self._take()
+                    if batches:
+                        break
+                    if not self._buffers:
+                        self._condition.wait()
+                        continue
+                    oldest = min(batch.created_at for batch in self._buffers.values())
+                    self._condition.wait(max(0, oldest + self.max_age - self._clock()))
+            for batch in batches:
+                self._submit(batch)
+
+    def close(self):
+        """
+        Submit the buffered updates and stop the background thread.
+
+        :return:
+        """
+        with self._condition:
+            self._stopped = True
+            thread = self._thread
+            self._condition.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
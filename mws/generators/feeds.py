@@ -1,8 +1,14 @@
 import abc
-import time
 import logging
+import tempfile
+from concurrent.futures import Future
 
-from mws.parsers.feeds.submitfeedresponse import SubmitFeedResponse, GetFeedSubmissionListResponse
+from lxml import etree
+
+from mws._mws import calc_md5
+from mws.generators.state import failed_skus
+from mws.parsers.feeds.submitfeedresponse import SubmitFeedResponse
+from mws.parsers.feeds.watcher import FeedSubmissionWatcher
 
 
 # flat file feeds
@@ -11,7 +17,17 @@ class BaseFeed(object):
     __metaclass__ = abc.ABCMeta
     enumeration_value = ""
 
-    def __init__(self, access_key, secret_key, account_id, region="US", domain='', uri='', version='', auth_token='', marketplace_ids=('ATVPDKIKX0DER',), content_type='text/xml', purge_and_replace=False):
+    # Fields of `data` compared with the `state_store`, feeds without any are always submitted in full.
+    state_fields = ()
+
+    def __init__(self, access_key, secret_key, account_id, region="US", domain='', uri='', version='', auth_token='', marketplace_ids=('ATVPDKIKX0DER',), content_type='text/xml', purge_and_replace=False, state_store=None, journal=None):
+        """
+
+        :param state_store: (Optional) `FeedStateStore`. Only the rows which changed since the last accepted feed
+            are submitted, and the state is updated from the processing report.
+        :param journal: (Optional) `FeedJournal` recording the submission, so that it can be resumed after a crash.
+            Contents identical to a recent submission aren't uploaded again.
+        """
         self.marketplace_ids = marketplace_ids
         self.content_type = content_type
         self.purge_and_replace = purge_and_replace
@@ -19,6 +35,9 @@ class BaseFeed(object):
         self.secret_key = secret_key
         self.account_id = account_id
         self.auth_token = auth_token
+        self.state_store = state_store
+        self.journal = journal
+        self.feed_submission_id = None
         self.logger = logging.getLogger(self.__class__.__name__)
 
     @abc.abstractmethod
@@ -39,21 +58,90 @@ class BaseFeed(object):
             return 'true'
         return 'false'
 
-    def upload(self):
-        response = SubmitFeedResponse.request(self.access_key, self.secret_key, self.account_id, self.generate(), self.enumeration_value, self.auth_token, self.marketplace_ids, self.content_type, self._purge_and_replace)
-        done = False
-        status = ''
-        feed_submission_id = None
-        while not done:
-            feed_submission_id = response.feed_submission_id
-            time.sleep(60)  # sleep before querying since it takes time to process and so that when the report is _DONE_ the loop is immediately broken.
-            r = GetFeedSubmissionListResponse.request(self.access_key, self.secret_key, self.account_id, self.auth_token, (feed_submission_id,))
-            request_result = r.feed_submission_info_list()[0]
-            status = request_result.feed_processing_status
-            self.logger.debug('feed_submission_id=%s report_processing_status=%s' % (feed_submission_id, status))
-            done = bool(request_result._completed_processing_date)
-        if status != '_DONE_':
-            raise ValueError("GetFeedSubmissionListResult for feed_submission_id=%s returned %s" % (feed_submission_id, status))
+    def submit(self, callback=None, watcher=None):
+        """
+        Submit the feed without waiting for it to be processed.
+
+        The submission is polled together with the other submissions made with the same credentials, see
+        `FeedSubmissionWatcher`.
+        :param callback: Optional callable, called with the future once the feed is processed.
+        :param watcher: `FeedSubmissionWatcher` to use. Defaults to the watcher shared for these credentials.
+        When a `journal` is set and the same contents were submitted recently, that submission is watched instead of
+        uploading the feed again.
+        :return: Future resolved with the processing report once the feed is _DONE_, or with None if nothing changed
+            since the last accepted feed.
+        """
+        tracked = self.state_store is not None and self.state_fields and not self.purge_and_replace
+        if tracked:
+            self.data = self.state_store.diff(self.data, self.marketplace_ids, self.state_fields)
+            if not self.data:
+                self.logger.debug('Nothing changed, %s not submitted' % self.enumeration_value)
+                future = Future()
+                future.set_result(None)
+                if callback is not None:
+                    callback(future)
+                return future
+        watcher = watcher or FeedSubmissionWatcher.shared(self.access_key, self.secret_key, self.account_id, self.auth_token)
+        contents = self.generate()
+        try:
+            entry_id = None
+            if self.journal is not None:
+                content_md5 = calc_md5(contents)
+                entry = self.journal.find(content_md5, self.enumeration_value, self.marketplace_ids)
+                if entry is not None:
+                    self.feed_submission_id = entry.feed_submission_id
+                    self.logger.debug('Same contents as feed_submission_id=%s, not submitted' % self.feed_submission_id)
+                    future = self.journal.watch(self.feed_submission_id, self.enumeration_value, watcher)
+                    return self._add_callbacks(future, tracked, callback)
+                entry_id = self.journal.begin(content_md5, self.enumeration_value, self.marketplace_ids)
+            try:
+                response = SubmitFeedResponse.request(self.access_key, self.secret_key, self.account_id, contents, self.enumeration_value, self.auth_token, self.marketplace_ids, self.content_type, self.purge_and_replace)
+            except Exception:
+                if entry_id is not None:
+                    self.journal.failed(entry_id)
+                raise
+        finally:
+            if hasattr(contents, 'close'):
+                contents.close()
+        self.feed_submission_id = response.feed_submission_id
+        self.logger.debug('feed_submission_id=%s submitted' % self.feed_submission_id)
+        if entry_id is not None:
+            self.journal.submitted(entry_id, self.feed_submission_id)
+        if tracked:
+            self.state_store.record(self.feed_submission_id, self.data, self.marketplace_ids, self.state_fields)
+        if self.journal is not None:
+            future = self.journal.watch(self.feed_submission_id, self.enumeration_value, watcher)
+        else:
+            future = watcher.watch(self.feed_submission_id, self.enumeration_value)
+        return self._add_callbacks(future, tracked, callback)
+
+    def _add_callbacks(self, future, tracked, callback):
+        if tracked:
+            feed_submission_id = self.feed_submission_id
+            future.add_done_callback(lambda f: self.state_store.complete(feed_submission_id, f))
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    @staticmethod
+    def failed_skus(processing_report):
+        """
+        Return the SKUs reported with an error in a processing report.
+
+        :param processing_report: `ProcessingReport`, or the processing report contents.
+        :return: Set of SKUs.
+        """
+        return failed_skus(processing_report)
+
+    def upload(self, timeout=None):
+        """
+        Submit the feed and wait for it to be processed.
+        Blocking method.
+
+        :param timeout: Maximum number of seconds to wait. Waits indefinitely if None.
+        :return: The processing report.
+        """
+        return self.submit().result(timeout)
 
 
 class UpdateInboundShipmentPlanFeed(BaseFeed):
@@ -78,3 +166,180 @@ class UpdateInboundShipmentPlanFeed(BaseFeed):
         column_headers = "MerchantSKU\tQuantity\n"
         column_data = "\n".join(["{sku}\t{quantity}".format(sku=x[0], quantity=x[1]) for x in self.data])
         return feed_header + column_headers + column_data
+
+
+class PriceAndQuantityFeed(BaseFeed):
+    """
+    Flat file feed updating the price and quantity of existing listings.
+    Cells left empty are left unchanged by Amazon.
+    """
+
+    enumeration_value = '_POST_FLAT_FILE_PRICEANDQUANTITYONLY_UPDATE_DATA_'
+    state_fields = ('price', 'quantity')
+
+    columns = ('sku', 'price', 'quantity', 'handling-time')
+
+    def __init__(self, *args, **kwargs):
+        """
+
+        :param data: a list of dicts with a `sku` and any of `price`, `quantity` and `handling_time`.
+            ex. [{'sku': 'MySku123', 'price': '12.99'}, {'sku': 'MySku999', 'quantity': 0}]
+        """
+        self.data = kwargs.pop('data')
+        kwargs['content_type'] = 'text/tab-separated-values; charset=iso-8859-1'
+        BaseFeed.__init__(self, *args, **kwargs)
+
+    def generate(self):
+        keys = [x.replace('-', '_') for x in self.columns]
+        lines = ['\t'.join(self.columns)]
+        for row in self.data:
+            lines.append('\t'.join('' if row.get(key) is None else str(row[key]) for key in keys))
+        return '\n'.join(lines) + '\n'
+
+
+# xml feeds
+class BaseXMLFeed(BaseFeed):
+    """
+    Base class of the XML feeds, written incrementally from an iterator of messages.
+
+    `generate` writes the AmazonEnvelope to a spooled temporary file, which stays in memory up to
+    `SPOOL_MAX_SIZE` bytes and is moved to disk beyond. Only one message is held in memory at a time, so feeds
+    of millions of messages can be generated from a generator. The file is streamed by `submit`.
+
+    Subclasses define `message_type` and build the payload of each message in `message_element`.
+    """
+
+    message_type = ''
+    operation_type = 'Update'
+
+    DOCUMENT_VERSION = '1.01'
+    SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
+    def __init__(self, *args, **kwargs):
+        """
+
+        :param data: an iterable of dicts, one per message. See `message_element`.
+        """
+        self.data = kwargs.pop('data')
+        self.message_count = 0
+        kwargs.setdefault('content_type', 'text/xml')
+        BaseFeed.__init__(self, *args, **kwargs)
+
+    @abc.abstractmethod
+    def message_element(self, row):
+        """
+        Build the payload of a message.
+
+        :param row: an item of `data`.
+        :return: lxml Element, ex. <Inventory>
+        """
+        raise NotImplementedError("method `message_element` is not implemented")
+
+    @staticmethod
+    def sub_element(parent, tag, value, **attrib):
+        """
+        Append a child element with a text value to `parent`. Nothing is appended if the value is None.
+        """
+        if value is None:
+            return
+        element = etree.SubElement(parent, tag, **attrib)
+        element.text = str(value)
+        return element
+
+    def write(self, f):
+        """
+        Write the feed to a binary file object.
+
+        :param f: file object
+        :return: The number of messages written.
+        """
+        self.message_count = 0
+        with etree.xmlfile(f, encoding='utf-8') as xf:
+            xf.write_declaration()
+            with xf.element('AmazonEnvelope', {'{http://www.w3.org/2001/XMLSchema-instance}noNamespaceSchemaLocation': 'amzn-envelope.xsd'},
+                            nsmap={'xsi': 'http://www.w3.org/2001/XMLSchema-instance'}):
+                header = etree.Element('Header')
+                self.sub_element(header, 'DocumentVersion', self.DOCUMENT_VERSION)
+                self.sub_element(header, 'MerchantIdentifier', self.account_id)
+                xf.write(header)
+                message_type = etree.Element('MessageType')
+                message_type.text = self.message_type
+                xf.write(message_type)
+                if self.purge_and_replace:
+                    purge = etree.Element('PurgeAndReplace')
+                    purge.text = 'true'
+                    xf.write(purge)
+                for row in self.data:
+                    self.message_count += 1
+                    message = etree.Element('Message')
+                    self.sub_element(message, 'MessageID', self.message_count)
+                    self.sub_element(message, 'OperationType', self.operation_type)
+                    message.append(self.message_element(row))
+                    xf.write(message)
+        return self.message_count
+
+    def generate(self):
+        """
+        Write the feed to a spooled temporary file.
+
+        :return: The file, rewound to its beginning.
+        """
+        f = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE)
+        try:
+            self.write(f)
+        except Exception:
+            f.close()
+            raise
+        f.seek(0)
+        return f
+
+
+class InventoryAvailabilityFeed(BaseXMLFeed):
+    """
+    Update the quantity available of listings fulfilled by the merchant.
+    """
+
+    enumeration_value = '_POST_INVENTORY_AVAILABILITY_DATA_'
+    message_type = 'Inventory'
+    state_fields = ('quantity',)
+
+    def message_element(self, row):
+        """
+
+        :param row: dict with a `sku`, `quantity` and optionally `fulfillment_latency` (days).
+            ex. {'sku': 'MySku123', 'quantity': 5}
+        """
+        inventory = etree.Element('Inventory')
+        self.sub_element(inventory, 'SKU', row['sku'])
+        self.sub_element(inventory, 'Quantity', row.get('quantity'))
+        self.sub_element(inventory, 'FulfillmentLatency', row.get('fulfillment_latency'))
+        return inventory
+
+
+class ProductPricingFeed(BaseXMLFeed):
+    """
+    Update the price of listings.
+    """
+
+    enumeration_value = '_POST_PRODUCT_PRICING_DATA_'
+    message_type = 'Price'
+    state_fields = ('price',)
+
+    def __init__(self, *args, **kwargs):
+        """
+
+        :param currency: Default currency of the prices. ex. USD, EUR, GBP
+        """
+        self.currency = kwargs.pop('currency', 'USD')
+        BaseXMLFeed.__init__(self, *args, **kwargs)
+
+    def message_element(self, row):
+        """
+
+        :param row: dict with a `sku`, `price` and optionally `currency`.
+            ex. {'sku': 'MySku123', 'price': '12.99'}
+        """
+        price = etree.Element('Price')
+        self.sub_element(price, 'SKU', row['sku'])
+        self.sub_element(price, 'StandardPrice', row['price'], currency=row.get('currency') or self.currency)
+        return price
@@ -0,0 +1,232 @@
+import logging
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_md5 TEXT NOT NULL,
+    feed_type TEXT NOT NULL,
+    marketplace_ids TEXT NOT NULL,
+    status TEXT NOT NULL,
+    feed_submission_id TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_content ON submissions (content_md5, feed_type, marketplace_ids);
+CREATE INDEX IF NOT EXISTS submissions_status ON submissions (status);
+"""
+
+# The entry is written before SubmitFeed is called.
+SUBMITTING = 'submitting'
+# SubmitFeed returned a FeedSubmissionId, the feed is being processed.
+SUBMITTED = 'submitted'
+# The feed was processed.
+DONE = 'done'
+# SubmitFeed failed, or the feed wasn't processed. (ex. _CANCELLED_)
+FAILED = 'failed'
+
+
+class JournalEntry(object):
+    """
+    A feed submission recorded in a `FeedJournal`.
+    """
+
+    __slots__ = ('id', 'content_md5', 'feed_type', 'marketplace_ids', 'status', 'feed_submission_id', 'created_at',
+                 'updated_at')
+
+    def __init__(self, id, content_md5, feed_type, marketplace_ids, status, feed_submission_id, created_at,
+                 updated_at):
+        self.id = id
+        self.content_md5 = content_md5
+        self.feed_type = feed_type
+        self.marketplace_ids = tuple(marketplace_ids.split(',')) if marketplace_ids else ()
+        self.status = status
+        self.feed_submission_id = feed_submission_id
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return '<JournalEntry {} {} feed_submission_id={} status={}>'.format(
+            self.id, self.feed_type, self.feed_submission_id, self.status)
+
+
+class FeedJournal(object):
+    """
+    Write-ahead journal of feed submissions, so that a process which dies while a feed is submitted or processed
+    doesn't lose its FeedSubmissionId.
+
+    Each submission is recorded with the MD5 of its contents, its feed type and marketplaces before SubmitFeed is
+    called, then with the FeedSubmissionId SubmitFeed returned, and once the feed is processed. On restart,
+    `resume` watches again the submissions which were still being processed. Feeds with the same contents as a
+    submission being processed, or processed less than `window` seconds ago, aren't uploaded again: the existing
+    submission is watched instead. See `BaseFeed.submit`.
+
+    Usage:
+        >>> journal = FeedJournal('feed-journal.sqlite')
+        >>> journal.resume(watcher)  # on start up
+        >>> feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id', data=rows, journal=journal)
+        >>> feed.upload()
+    """
+
+    # Seconds during which processed contents aren't submitted again.
+    WINDOW = 24 * 60 * 60
+
+    def __init__(self, path, window=WINDOW, clock=time.time):
+        """
+
+        :param path: Path of the SQLite database.
+        :param window: Seconds during which contents already processed aren't submitted again.
+        """
+        self.path = path
+        self.window = window
+        self._clock = clock
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        with self._lock, self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def _entries(self, where, params=()):
+        with self._lock:
+            rows = self._db.execute('SELECT * FROM submissions WHERE {} ORDER BY id'.format(where), params).fetchall()
+        return [JournalEntry(*row) for row in rows]
+
+    def get(self, entry_id):
+        """
+        Return an entry by id, or None.
+
+        :return: `JournalEntry`
+        """
+        entries = self._entries('id = ?', (entry_id,))
+        return entries[0] if entries else None
+
+    def begin(self, content_md5, feed_type, marketplace_ids=()):
+        """
+        Record a feed about to be submitted. Committed before returning, so it survives a crash during SubmitFeed.
+
+        :param content_md5: Base64 encoded MD5 of the feed contents. (see `calc_md5`)
+        :param feed_type: The feed enumeration value.
+        :param marketplace_ids: Marketplaces the feed is submitted to.
+        :return: Id of the entry.
+        """
+        now = self._clock()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'INSERT INTO submissions (content_md5, feed_type, marketplace_ids, status, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (content_md5, feed_type, ','.join(marketplace_ids), SUBMITTING, now, now))
+        return cursor.lastrowid
+
+    def _update(self, where, params, status, feed_submission_id=None):
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE submissions SET status = ?, feed_submission_id = COALESCE(?, feed_submission_id), '
+                'updated_at = ? WHERE {}'.format(where), (status, feed_submission_id, self._clock()) + params)
+
+    def submitted(self, entry_id, feed_submission_id):
+        """
+        Record the FeedSubmissionId returned by SubmitFeed.
+
+        :param entry_id: Id returned by `begin`.
+        :param feed_submission_id: The FeedSubmissionId.
+        :return:
+        """
+        self._update('id = ?', (entry_id,), SUBMITTED, feed_submission_id)
+
+    def failed(self, entry_id):
+        """
+        Record that SubmitFeed failed.
+
+        :param entry_id: Id returned by `begin`.
+        :return:
+        """
+        self._update('id = ?', (entry_id,), FAILED)
+
+    def completed(self, feed_submission_id, processed=True):
+        """
+        Record the outcome of a submitted feed.
+
+        :param feed_submission_id: The FeedSubmissionId.
+        :param processed: False if the feed wasn't processed. (ex. _CANCELLED_)
+        :return:
+        """
+        self._update('feed_submission_id = ?', (feed_submission_id,), DONE if processed else FAILED)
+
+    def find(self, content_md5, feed_type, marketplace_ids=()):
+        """
+        Return the last submission of the same contents which is being processed, or was processed less than
+        `window` seconds ago.
+
+        :return: `JournalEntry` or None.
+        """
+        entries = self._entries(
+            'content_md5 = ? AND feed_type = ? AND marketplace_ids = ? AND (status = ? OR (status = ? AND updated_at >= ?))',
+            (content_md5, feed_type, ','.join(marketplace_ids), SUBMITTED, DONE, self._clock() - self.window))
+        return entries[-1] if entries else None
+
+    def outstanding(self):
+        """
+        Submissions which were still being processed.
+
+        :return: List of `JournalEntry`.
+        """
+        return self._entries('status = ?', (SUBMITTED,))
+
+    def interrupted(self):
+        """
+        Submissions for which the process died during SubmitFeed. Amazon may or may not have received them,
+        their FeedSubmissionId is unknown.
+
+        :return: List of `JournalEntry`.
+        """
+        return self._entries('status = ?', (SUBMITTING,))
+
+    def watch(self, feed_submission_id, feed_type, watcher, callback=None):
+        """
+        Watch a submission and record its outcome once processed.
+
+        :param watcher: `FeedSubmissionWatcher`
+        :param callback: Optional callable, called with the future once the submission is processed.
+        :return: The future returned by the watcher.
+        """
+        future = watcher.watch(feed_submission_id, feed_type)
+        future.add_done_callback(lambda f: self._complete(feed_submission_id, f))
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def _complete(self, feed_submission_id, future):
+        if future.cancelled():
+            # The watcher was stopped, the submission is still outstanding.
+            return
+        self.completed(feed_submission_id, future.exception() is None)
+
+    def resume(self, watcher, callback=None, state_store=None):
+        """
+        Watch again the submissions which were still being processed, ie. after a restart.
+
+        Interrupted submissions are marked as failed, so that their contents can be submitted again.
+
+        :param watcher: `FeedSubmissionWatcher`
+        :param callback: Optional callable, called with each future once the submission is processed.
+        :param state_store: (Optional) `FeedStateStore` the feeds were submitted with, their pending values are
+            accepted or rejected once processed.
+        :return: Dict of FeedSubmissionId to the future returned by the watcher.
+        """
+        for entry in self.interrupted():
+            self.logger.warning('%s was interrupted during SubmitFeed, its outcome is unknown' % entry)
+        self._update('status = ?', (SUBMITTING,), FAILED)
+        futures = {}
+        for entry in self.outstanding():
+            future = futures[entry.feed_submission_id] = self.watch(entry.feed_submission_id, entry.feed_type, watcher)
+            if state_store is not None:
+                future.add_done_callback(lambda f, i=entry.feed_submission_id: state_store.complete(i, f))
+            if callback is not None:
+                future.add_done_callback(callback)
+        return futures
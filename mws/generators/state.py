@@ -0,0 +1,221 @@
+import json
+import sqlite3
+import threading
+from decimal import Decimal, InvalidOperation
+
+from mws.parsers.feeds.processingreport import ProcessingReport
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accepted (
+    sku TEXT NOT NULL,
+    marketplace_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    feed_submission_id TEXT,
+    PRIMARY KEY (sku, marketplace_id, field)
+);
+CREATE TABLE IF NOT EXISTS pending (
+    feed_submission_id TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    marketplace_id TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS pending_submission ON pending (feed_submission_id);
+"""
+
+
+def failed_skus(processing_report):
+    """
+    Return the SKUs reported with an error in a processing report.
+
+    :param processing_report: `ProcessingReport`, or the processing report contents.
+    :return: Set of SKUs.
+    """
+    if not isinstance(processing_report, ProcessingReport):
+        processing_report = ProcessingReport(processing_report)
+    return processing_report.failed_skus()
+
+
+def normalize(field, value):
+    """
+    Text form of a field value, so that equal values compare equal. (ex. 12.9, '12.90' and Decimal('12.90'), or
+    5, 5.0 and '5.0')
+    """
+    if value is None:
+        return None
+    try:
+        number = Decimal(str(value))
+    except (ValueError, InvalidOperation):
+        return str(value)
+    if not number.is_finite():
+        return str(value)
+    if number == number.to_integral_value():
+        return '{:f}'.format(number.to_integral_value())
+    return '{:f}'.format(number.normalize())
+
+
+class FeedStateStore(object):
+    """
+    Last value accepted by Amazon for the fields of each SKU and marketplace, used to only submit what changed.
+
+    Values submitted in a feed are pending until its processing report is received, they are then accepted, but
+    for the SKUs which failed. See `BaseFeed.submit`.
+
+    Usage:
+        >>> store = FeedStateStore('feed-state.sqlite')
+        >>> feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id', data=rows, state_store=store)
+        >>> feed.upload()  # only the SKUs which quantity changed since the last accepted feed are submitted
+    """
+
+    # Number of rows inserted per statement.
+    BATCH_SIZE = 10000
+
+    def __init__(self, path=':memory:'):
+        """
+
+        :param path: Path of the SQLite database. The state is kept in memory by default.
+        """
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def get(self, sku, marketplace_id='ATVPDKIKX0DER'):
+        """
+        Return the accepted values of a SKU.
+
+        :return: Dict of field to value.
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT field, value FROM accepted WHERE sku = ? AND marketplace_id = ?',
+                                    (sku, marketplace_id)).fetchall()
+        return dict(rows)
+
+    def diff(self, rows, marketplace_ids=('ATVPDKIKX0DER',), fields=('price', 'quantity')):
+        """
+        Keep the rows which have at least one field different from the accepted state in any of the
+        marketplaces. Unchanged fields are removed from the returned rows, other keys are left as is.
+        Rows without any of the compared fields (ex. only a `handling_time`) can't be compared and are kept.
+
+        The comparison is made in bulk in SQLite, so the accepted state of every SKU is never loaded in memory.
+
+        :param rows: Iterable of dicts with a `sku` key. (ex. `data` of `InventoryAvailabilityFeed`)
+        :param marketplace_ids: Marketplaces the rows are submitted to.
+        :param fields: Fields compared with the accepted state.
+        :return: List of dicts.
+        """
+        marketplace_ids = list(marketplace_ids)
+        with self._lock, self._db:
+            db = self._db
+            db.execute('CREATE TEMP TABLE IF NOT EXISTS incoming (seq INTEGER PRIMARY KEY, sku TEXT, row TEXT)')
+            db.execute('CREATE TEMP TABLE IF NOT EXISTS incoming_values (seq INTEGER, field TEXT, value TEXT)')
+            db.execute('DELETE FROM incoming')
+            db.execute('DELETE FROM incoming_values')
+
+            rows_batch, values_batch = [], []
+            for seq, row in enumerate(rows):
+                rows_batch.append((seq, row['sku'], json.dumps(row, default=str)))
+                for field in fields:
+                    if row.get(field) is not None:
+                        values_batch.append((seq, field, normalize(field, row[field])))
+                if len(rows_batch) >= self.BATCH_SIZE:
+                    db.executemany('INSERT INTO incoming VALUES (?, ?, ?)', rows_batch)
+                    db.executemany('INSERT INTO incoming_values VALUES (?, ?, ?)', values_batch)
+                    rows_batch, values_batch = [], []
+            db.executemany('INSERT INTO incoming VALUES (?, ?, ?)', rows_batch)
+            db.executemany('INSERT INTO incoming_values VALUES (?, ?, ?)', values_batch)
+
+            # A field changed unless its accepted value is the same in every marketplace. Rows without values are
+            # kept by the LEFT JOIN, with no changed field.
+            query = '''
+                SELECT i.seq, i.row, group_concat(v.field, ',')
+                FROM incoming i LEFT JOIN incoming_values v ON v.seq = i.seq
+                WHERE (SELECT COUNT(*) FROM accepted a
+                       WHERE a.sku = i.sku AND a.field = v.field AND a.value = v.value
+                       AND a.marketplace_id IN ({})) < ?
+                GROUP BY i.seq ORDER BY i.seq
+            '''.format(', '.join('?' * len(marketplace_ids)))
+            changed = []
+            for _, row, changed_fields in db.execute(query, marketplace_ids + [len(marketplace_ids)]):
+                row = json.loads(row)
+                changed_fields = changed_fields.split(',') if changed_fields else []
+                for field in fields:
+                    if field not in changed_fields:
+                        row.pop(field, None)
+                changed.append(row)
+            db.execute('DELETE FROM incoming')
+            db.execute('DELETE FROM incoming_values')
+        return changed
+
+    def record(self, feed_submission_id, rows, marketplace_ids=('ATVPDKIKX0DER',), fields=('price', 'quantity')):
+        """
+        Record the values submitted in a feed, pending until the feed is processed.
+
+        :param feed_submission_id: The FeedSubmissionId of the feed.
+        :param rows: Iterable of dicts with a `sku` key.
+        :param marketplace_ids: Marketplaces the feed was submitted to.
+        :param fields: Fields tracked in the state.
+        :return:
+        """
+        values = ((feed_submission_id, row['sku'], marketplace_id, field, normalize(field, row[field]))
+                  for row in rows for field in fields if row.get(field) is not None
+                  for marketplace_id in marketplace_ids)
+        with self._lock, self._db:
+            self._db.executemany('INSERT INTO pending VALUES (?, ?, ?, ?, ?)', values)
+
+    def accept(self, feed_submission_id, failed_skus=()):
+        """
+        Accept the values of a processed feed, but for the SKUs which failed.
+
+        :param feed_submission_id: The FeedSubmissionId of the feed.
+        :param failed_skus: SKUs reported with an error in the processing report.
+        :return: Number of accepted values.
+        """
+        with self._lock, self._db:
+            db = self._db
+            db.execute('CREATE TEMP TABLE IF NOT EXISTS failed (sku TEXT PRIMARY KEY)')
+            db.execute('DELETE FROM failed')
+            db.executemany('INSERT OR IGNORE INTO failed VALUES (?)', ((sku,) for sku in failed_skus))
+            cursor = db.execute('''
+                INSERT OR REPLACE INTO accepted (sku, marketplace_id, field, value, feed_submission_id)
+                SELECT sku, marketplace_id, field, value, feed_submission_id FROM pending
+                WHERE feed_submission_id = ? AND sku NOT IN (SELECT sku FROM failed)
+                ORDER BY rowid
+            ''', (feed_submission_id,))
+            accepted = cursor.rowcount
+            db.execute('DELETE FROM pending WHERE feed_submission_id = ?', (feed_submission_id,))
+            db.execute('DELETE FROM failed')
+        return accepted
+
+    def reject(self, feed_submission_id):
+        """
+        Forget the values of a feed which wasn't processed. (ex. _CANCELLED_)
+
+        :param feed_submission_id: The FeedSubmissionId of the feed.
+        :return:
+        """
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM pending WHERE feed_submission_id = ?', (feed_submission_id,))
+
+    def complete(self, feed_submission_id, future):
+        """
+        Accept or reject the values of a feed once its processing report is fetched.
+
+        :param feed_submission_id: The FeedSubmissionId of the feed.
+        :param future: Future returned by the `FeedSubmissionWatcher`.
+        :return:
+        """
+        if future.cancelled():
+            # The watcher was stopped, the feed may still be processed.
+            return
+        try:
+            processing_report = future.result()
+        except Exception:
+            self.reject(feed_submission_id)
+            return
+        self.accept(feed_submission_id, failed_skus(processing_report))
@@ -0,0 +1,73 @@
+from concurrent.futures import Future
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.generators.aggregator import FeedAggregator
+from mws.generators.feeds import PriceAndQuantityFeed
+
+
+class FakeWatcher(object):
+
+    def watch(self, feed_submission_id, feed_type=None, callback=None):
+        future = Future()
+        future.set_result('processing report of %s' % feed_submission_id)
+        return future
+
+
+class TestFeedAggregator(TestCase):
+
+    def setUp(self):
+        self.submitted = []
+        self.submit = mock.patch.object(PriceAndQuantityFeed, 'submit', autospec=True, side_effect=self.fake_submit)
+        self.submit.start()
+
+    def tearDown(self):
+        self.submit.stop()
+
+    def fake_submit(self, feed, callback=None, watcher=None):
+        self.submitted.append(feed)
+        feed.feed_submission_id = str(len(self.submitted))
+        return watcher.watch(feed.feed_submission_id, feed.enumeration_value)
+
+    def aggregator(self, **kwargs):
+        return FeedAggregator('access_key', 'secret_key', 'account_id', watcher=FakeWatcher(), quota=mock.Mock(),
+                              **kwargs)
+
+    def test_last_write_per_sku(self):
+        with self.aggregator(max_age=3600) as aggregator:
+            batch = aggregator.update('SKU-1', price='10.00', quantity=1)
+            aggregator.update('SKU-2', quantity=5)
+            aggregator.update('SKU-1', price='9.50')
+            aggregator.update('SKU-3', 'A1F83G8C2ARO7P', quantity=2)
+            self.assertEqual(aggregator.pending, 3)
+        self.assertEqual(len(self.submitted), 2)
+        feed = self.submitted[0]
+        self.assertEqual(feed.marketplace_ids, ('ATVPDKIKX0DER',))
+        self.assertEqual(feed.generate(), 'sku\tprice\tquantity\thandling-time\n'
+                                          'SKU-1\t9.50\t1\t\n'
+                                          'SKU-2\t\t5\t\n')
+        self.assertEqual(self.submitted[1].marketplace_ids, ('A1F83G8C2ARO7P',))
+        self.assertEqual(batch.feed_submission_id, '1')
+        self.assertEqual(batch.future.result(1), 'processing report of 1')
+        self.assertIs(aggregator.submission_for('SKU-2'), batch)
+        self.assertIsNone(aggregator.submission_for('SKU-3'))
+
+    def test_flush_on_count(self):
+        aggregator = self.aggregator(max_skus=2, max_age=3600)
+        first = aggregator.update('SKU-1', quantity=1)
+        aggregator.update('SKU-2', quantity=1)
+        self.assertEqual(first.future.result(5), 'processing report of 1')
+        second = aggregator.update('SKU-3', quantity=1)
+        self.assertIsNot(first, second)
+        aggregator.close()
+        self.assertEqual([len(feed.data) for feed in self.submitted], [2, 1])
+
+    def test_flush_on_age(self):
+        aggregator = self.aggregator(max_age=0.05)
+        batch = aggregator.update('SKU-1', quantity=1)
+        self.assertEqual(batch.future.result(5), 'processing report of 1')
+        aggregator.close()
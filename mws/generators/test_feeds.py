@@ -0,0 +1,112 @@
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from lxml import etree
+
+from mws import calc_md5
+from mws.generators.feeds import InventoryAvailabilityFeed, PriceAndQuantityFeed, ProductPricingFeed
+from mws.generators.journal import FeedJournal, DONE
+from mws.generators.state import FeedStateStore
+from mws.testing import fixtures
+
+
+class TestXMLFeeds(TestCase):
+
+    def test_inventory_feed(self):
+        rows = ({'sku': 'SKU-%d' % i, 'quantity': i} for i in range(3))
+        feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'M_EXAMPLE', data=rows)
+        f = feed.generate()
+        root = etree.parse(f).getroot()
+        f.close()
+        self.assertEqual(feed.message_count, 3)
+        self.assertEqual(root.tag, 'AmazonEnvelope')
+        self.assertEqual(root.findtext('Header/MerchantIdentifier'), 'M_EXAMPLE')
+        self.assertEqual(root.findtext('MessageType'), 'Inventory')
+        self.assertIsNone(root.find('PurgeAndReplace'))
+        messages = root.findall('Message')
+        self.assertEqual([m.findtext('MessageID') for m in messages], ['1', '2', '3'])
+        self.assertEqual(messages[2].findtext('Inventory/SKU'), 'SKU-2')
+        self.assertEqual(messages[2].findtext('Inventory/Quantity'), '2')
+        self.assertIsNone(messages[2].find('Inventory/FulfillmentLatency'))
+
+    def test_pricing_feed(self):
+        feed = ProductPricingFeed('access_key', 'secret_key', 'M_EXAMPLE', currency='EUR',
+                                  data=[{'sku': 'S&1', 'price': '12.99'}, {'sku': 'S2', 'price': 3, 'currency': 'GBP'}])
+        root = etree.fromstring(feed.generate().read())
+        prices = root.findall('Message/Price/StandardPrice')
+        self.assertEqual(root.findtext('Message/Price/SKU'), 'S&1')
+        self.assertEqual([(p.text, p.get('currency')) for p in prices], [('12.99', 'EUR'), ('3', 'GBP')])
+
+    def test_md5_of_file(self):
+        f = io.BytesIO(b'x' * 100000)
+        f.seek(10)
+        self.assertEqual(calc_md5(f), calc_md5(b'x' * 99990))
+        self.assertEqual(f.tell(), 10)
+
+
+class TestTrackedFeeds(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'journal.sqlite')
+        self.journal = FeedJournal(self.path)
+        self.addCleanup(lambda: self.journal.close())
+        self.store = FeedStateStore()
+        self.rows = [{'sku': 'SKU-1', 'price': '10.00', 'quantity': 1}]
+        self.response = mock.Mock(feed_submission_id='7')
+
+    def feed(self):
+        return PriceAndQuantityFeed('access_key', 'secret_key', 'account_id', data=self.rows,
+                                    state_store=self.store, journal=self.journal)
+
+    def test_duplicate_submission_updates_state(self):
+        watcher = mock.Mock()
+        watcher.watch.return_value = Future()
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', return_value=self.response) as request:
+            self.feed().submit(watcher=watcher)
+            # The watcher is stopped before the feed is processed.
+            watcher.watch.return_value.cancel()
+            watcher.watch.return_value = Future()
+            future = self.feed().submit(watcher=watcher)
+        self.assertEqual(request.call_count, 1)
+        future.set_result(fixtures.processing_report('7'))
+        self.assertEqual(self.journal.get(1).status, DONE)
+        self.assertEqual(self.store.get('SKU-1'), {'price': '10', 'quantity': '1'})
+        self.assertEqual(self.store.diff(self.rows, ('ATVPDKIKX0DER',), ('price', 'quantity')), [])
+
+    def test_resume_updates_state(self):
+        watcher = mock.Mock()
+        watcher.watch.return_value = Future()
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', return_value=self.response):
+            self.feed().submit(watcher=watcher)
+        watcher.watch.return_value.cancel()
+
+        # Restart
+        self.journal.close()
+        self.journal = FeedJournal(self.path)
+        watcher.watch.return_value = Future()
+        futures = self.journal.resume(watcher, state_store=self.store)
+        futures['7'].set_result(fixtures.processing_report('7'))
+        self.assertEqual(self.store.get('SKU-1'), {'price': '10', 'quantity': '1'})
+
+        self.rows[0]['price'] = '12.00'
+        self.response.feed_submission_id = '8'
+        watcher.watch.return_value = Future()
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', return_value=self.response):
+            self.feed().submit(watcher=watcher)
+        watcher.watch.return_value.cancel()
+        self.journal.close()
+        self.journal = FeedJournal(self.path)
+        watcher.watch.return_value = Future()
+        self.journal.resume(watcher, state_store=self.store)['8'].set_exception(ValueError('_CANCELLED_'))
+        self.assertEqual(self.store.get('SKU-1'), {'price': '10', 'quantity': '1'})
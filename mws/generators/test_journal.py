@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.generators.feeds import InventoryAvailabilityFeed
+from mws.generators.journal import FeedJournal, DONE, FAILED, SUBMITTED
+
+
+class TestFeedJournal(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal.sqlite')
+        self.now = 1000.0
+        self.journal = FeedJournal(self.path, window=3600, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def test_find(self):
+        entry_id = self.journal.begin('md5', '_POST_PRODUCT_PRICING_DATA_', ['ATVPDKIKX0DER'])
+        # Not submitted yet
+        self.assertIsNone(self.journal.find('md5', '_POST_PRODUCT_PRICING_DATA_', ['ATVPDKIKX0DER']))
+        self.journal.submitted(entry_id, '42')
+        entry = self.journal.find('md5', '_POST_PRODUCT_PRICING_DATA_', ['ATVPDKIKX0DER'])
+        self.assertEqual(entry.feed_submission_id, '42')
+        self.assertEqual(entry.marketplace_ids, ('ATVPDKIKX0DER',))
+        self.assertIsNone(self.journal.find('md5', '_POST_PRODUCT_PRICING_DATA_', ['A1F83G8C2ARO7P']))
+        self.assertIsNone(self.journal.find('other', '_POST_PRODUCT_PRICING_DATA_', ['ATVPDKIKX0DER']))
+
+        self.journal.completed('42')
+        self.assertEqual(self.journal.get(entry_id).status, DONE)
+        self.assertIsNotNone(self.journal.find('md5', '_POST_PRODUCT_PRICING_DATA_', ['ATVPDKIKX0DER']))
+        self.now += 3601
+        self.assertIsNone(self.journal.find('md5', '_POST_PRODUCT_PRICING_DATA_', ['ATVPDKIKX0DER']))
+
+    def test_resume(self):
+        self.journal.submitted(self.journal.begin('md5-1', '_POST_PRODUCT_PRICING_DATA_'), '1')
+        self.journal.submitted(self.journal.begin('md5-2', '_POST_PRODUCT_PRICING_DATA_'), '2')
+        self.journal.completed('2')
+        interrupted = self.journal.begin('md5-3', '_POST_PRODUCT_PRICING_DATA_')
+        self.journal.close()
+
+        # Restart
+        self.journal = FeedJournal(self.path)
+        self.assertEqual([e.id for e in self.journal.interrupted()], [interrupted])
+        future = Future()
+        watcher = mock.Mock()
+        watcher.watch.return_value = future
+        futures = self.journal.resume(watcher)
+        self.assertEqual(list(futures), ['1'])
+        watcher.watch.assert_called_once_with('1', '_POST_PRODUCT_PRICING_DATA_')
+        self.assertEqual(self.journal.get(interrupted).status, FAILED)
+
+        future.set_exception(ValueError('_CANCELLED_'))
+        self.assertEqual(self.journal.outstanding(), [])
+        self.assertIsNone(self.journal.find('md5-1', '_POST_PRODUCT_PRICING_DATA_'))
+
+    def test_feed_skips_identical_contents(self):
+        watcher = mock.Mock()
+        watcher.watch.return_value = Future()
+        rows = [{'sku': 'SKU-1', 'quantity': 1}]
+        response = mock.Mock(feed_submission_id='7')
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', return_value=response) as request:
+            InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id', data=rows,
+                                      journal=self.journal).submit(watcher=watcher)
+            self.assertEqual(self.journal.outstanding()[0].feed_submission_id, '7')
+            feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id', data=rows, journal=self.journal)
+            feed.submit(watcher=watcher)
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(feed.feed_submission_id, '7')
+        self.assertEqual(watcher.watch.call_count, 2)
+
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', side_effect=IOError):
+            feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id',
+                                             data=[{'sku': 'SKU-1', 'quantity': 2}], journal=self.journal)
+            self.assertRaises(IOError, feed.submit, watcher=watcher)
+        self.assertEqual([e.status for e in self.journal._entries('1')], [SUBMITTED, FAILED])
@@ -0,0 +1,110 @@
+from decimal import Decimal
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.generators.feeds import BaseFeed, InventoryAvailabilityFeed, PriceAndQuantityFeed
+from mws.generators.state import FeedStateStore, normalize
+
+PROCESSING_REPORT = b'''<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
+  <Header><DocumentVersion>1.02</DocumentVersion><MerchantIdentifier>M_EXAMPLE</MerchantIdentifier></Header>
+  <MessageType>ProcessingReport</MessageType>
+  <Message>
+    <MessageID>1</MessageID>
+    <ProcessingReport>
+      <DocumentTransactionID>2291326430</DocumentTransactionID>
+      <StatusCode>Complete</StatusCode>
+      <ProcessingSummary>
+        <MessagesProcessed>2</MessagesProcessed><MessagesSuccessful>1</MessagesSuccessful>
+        <MessagesWithError>1</MessagesWithError><MessagesWithWarning>0</MessagesWithWarning>
+      </ProcessingSummary>
+      <Result>
+        <MessageID>2</MessageID><ResultCode>Error</ResultCode><ResultMessageCode>13013</ResultMessageCode>
+        <ResultDescription>This SKU does not exist in the Amazon.com catalog.</ResultDescription>
+        <AdditionalInfo><SKU>SKU-2</SKU></AdditionalInfo>
+      </Result>
+    </ProcessingReport>
+  </Message>
+</AmazonEnvelope>'''
+
+
+class TestFeedStateStore(TestCase):
+
+    def setUp(self):
+        self.store = FeedStateStore()
+        self.store.record('1', [{'sku': 'SKU-1', 'price': '10.00', 'quantity': 1},
+                                {'sku': 'SKU-2', 'price': 5, 'quantity': 2}])
+
+    def test_normalize(self):
+        self.assertEqual(normalize('price', '12.90'), normalize('price', Decimal('12.9')))
+        self.assertEqual(normalize('price', 10), '10')
+        self.assertEqual(normalize('price', '10.00'), '10')
+        self.assertEqual(normalize('quantity', '3'), '3')
+        self.assertEqual(normalize('quantity', '5.0'), normalize('quantity', 5))
+        self.assertEqual(normalize('quantity', 5.0), '5')
+        self.assertEqual(normalize('price', '1E+2'), '100')
+        self.assertEqual(normalize('price', 'n/a'), 'n/a')
+
+    def test_pending_values_not_accepted(self):
+        self.assertEqual(self.store.get('SKU-1'), {})
+        rows = [{'sku': 'SKU-1', 'quantity': 1}]
+        self.assertEqual(self.store.diff(rows), rows)
+
+    def test_diff(self):
+        self.assertEqual(self.store.accept('1', failed_skus=['SKU-2']), 2)
+        self.assertEqual(self.store.get('SKU-1'), {'price': '10', 'quantity': '1'})
+        rows = [
+            {'sku': 'SKU-1', 'price': 10, 'quantity': 1},
+            {'sku': 'SKU-1', 'price': '10.0', 'quantity': 3, 'fulfillment_latency': 2},
+            {'sku': 'SKU-2', 'price': 5, 'quantity': 2},
+            {'sku': 'SKU-3', 'quantity': 0},
+        ]
+        self.assertEqual(self.store.diff(rows), [
+            {'sku': 'SKU-1', 'quantity': 3, 'fulfillment_latency': 2},
+            {'sku': 'SKU-2', 'price': 5, 'quantity': 2},
+            {'sku': 'SKU-3', 'quantity': 0},
+        ])
+        # Rows without any compared field are passed through.
+        self.assertEqual(self.store.diff([{'sku': 'SKU-1', 'fulfillment_latency': 2}, rows[0]]),
+                         [{'sku': 'SKU-1', 'fulfillment_latency': 2}])
+        self.assertEqual(self.store.diff([{'sku': 'SKU-1', 'price': '10.00', 'quantity': '1.0'}]), [])
+        # SKU-1 was never accepted in the UK marketplace
+        self.assertEqual(len(self.store.diff(rows[:1], ('ATVPDKIKX0DER', 'A1F83G8C2ARO7P'))), 1)
+
+    def test_reject(self):
+        self.store.reject('1')
+        self.assertEqual(self.store.accept('1'), 0)
+        self.assertEqual(self.store.get('SKU-1'), {})
+
+    def test_feed_submits_changes_only(self):
+        self.store.accept('1')
+        watcher = mock.Mock()
+        response = mock.Mock(feed_submission_id='2')
+        rows = [{'sku': 'SKU-1', 'quantity': 1}, {'sku': 'SKU-2', 'quantity': 7}]
+        feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id', data=rows, state_store=self.store)
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', return_value=response) as request:
+            feed.submit(watcher=watcher)
+        self.assertEqual(feed.data, [{'sku': 'SKU-2', 'quantity': 7}])
+        self.assertEqual(request.call_count, 1)
+        future = watcher.watch.return_value
+        future.cancelled.return_value = False
+        update_state = future.add_done_callback.call_args_list[0][0][0]
+        future.result.return_value = PROCESSING_REPORT
+        update_state(future)
+        self.assertEqual(self.store.get('SKU-2'), {'price': '5', 'quantity': '2'})
+
+        feed = InventoryAvailabilityFeed('access_key', 'secret_key', 'account_id', data=rows, state_store=self.store)
+        future.result.return_value = b'<AmazonEnvelope/>'
+        with mock.patch('mws.generators.feeds.SubmitFeedResponse.request', return_value=response):
+            feed.submit(watcher=watcher)
+            update_state(future)
+        self.assertEqual(self.store.get('SKU-2'), {'price': '5', 'quantity': '7'})
+        feed = PriceAndQuantityFeed('access_key', 'secret_key', 'account_id', data=rows, state_store=self.store)
+        self.assertIsNone(feed.submit(watcher=watcher).result())
+
+    def test_failed_skus(self):
+        self.assertEqual(BaseFeed.failed_skus(PROCESSING_REPORT), {'SKU-2'})
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Encoding of the request parameters.
+
+Parameters are built as nested dicts and lists, flattened into the dotted keys Amazon expects
+(ie. `FeesEstimateRequestList.FeesEstimateRequest.1.IdValue`), then sorted and percent encoded into the canonical
+query string which is signed. See
+http://docs.developer.amazonservices.com/en_US/dev_guide/DG_ClientLibraries.html#DG_OwnClientLibrary__Signatures
+"""
+import datetime
+from decimal import Decimal
+from urllib.parse import quote
+
+# Characters left as is by the percent encoding. (RFC 3986 unreserved characters)
+SAFE = '-_.~'
+
+# Values which are never flattened.
+SCALARS = (str, bytes, int, float, Decimal, datetime.date)
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# Key of the Nth element of a list.
+ENUMERATED = '{}.{}'
+MEMBER = '{}.member.{}'
+
+# Percent encoded names and values, by text, emptied once they hold MAX_CACHED entries. Names are few and repeated
+# in every request, as are many values. (ex. marketplace ids, currency codes, booleans)
+_quoted_keys = {}
+_quoted_values = {}
+MAX_CACHED = 8192
+
+
+def quote_key(key):
+    """
+    Percent encode a parameter name.
+    """
+    quoted = _quoted_keys.get(key)
+    if quoted is None:
+        quoted = quote(key, safe=SAFE)
+        if len(_quoted_keys) >= MAX_CACHED:
+            _quoted_keys.clear()
+        _quoted_keys[key] = quoted
+    return quoted
+
+
+def quote_value(value):
+    """
+    Percent encode a parameter value.
+    """
+    quoted = _quoted_values.get(value)
+    if quoted is None:
+        quoted = quote(value, encoding='utf-8', safe=SAFE)
+        if len(_quoted_values) >= MAX_CACHED:
+            _quoted_values.clear()
+        _quoted_values[value] = quoted
+    return quoted
+
+
+def format_value(value):
+    """
+    Text form of a parameter value. Datetimes are formatted as ISO 8601 timestamps.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return str(value)
+
+
+def _flatten_into(params, key, value, list_format):
+    if isinstance(value, SCALARS):
+        params[key] = value
+    elif hasattr(value, 'items'):
+        prefix = key + '.' if key else ''
+        for k, v in value.items():
+            # Amazon doesn't allow empty values.
+            if not v:
+                continue
+            if isinstance(v, SCALARS):
+                params[prefix + k] = v
+            else:
+                _flatten_into(params, prefix + k, v, list_format)
+    elif isinstance(value, (list, tuple)):
+        for i, v in enumerate(value, 1):
+            if v:
+                _flatten_into(params, list_format.format(key, i), v, list_format)
+    else:
+        params[key] = value
+
+
+def flatten(value, key='', list_format=MEMBER):
+    """
+    Flatten nested dicts and lists into a dict of dotted keys. Elements with a falsey value are dropped.
+
+    ex. flatten({'Items': [{'SellerSKU': 'sku-1', 'PerUnitPrice': {'Value': 1}}]}) returns
+    {'Items.member.1.SellerSKU': 'sku-1', 'Items.member.1.PerUnitPrice.Value': 1}
+
+    :param value: Dict, list or single value.
+    :param key: Key prefix of the flattened keys.
+    :param list_format: Format of the key of a list element, given the list key and the 1 based index.
+    :return: Dict of dotted key to value.
+    """
+    params = {}
+    _flatten_into(params, key, value, list_format)
+    return params
+
+
+def enumerate_param(param, values):
+    """
+    Enumerate the values of a list parameter.
+
+    ex. enumerate_param('MarketplaceIdList.Id', (123, 345)) returns
+    {'MarketplaceIdList.Id.1': 123, 'MarketplaceIdList.Id.2': 345}
+
+    Dict values are flattened. (ex. `FeesEstimateRequestList.FeesEstimateRequest.1.IdValue`)
+
+    :param param: The list parameter name, with or without a trailing dot.
+    :param values: Iterable of values, or None.
+    :return: Dict of enumerated key to value.
+    """
+    if values is None:
+        return {}
+    param = param.rstrip('.')
+    params = {}
+    for num, value in enumerate(values, 1):
+        key = ENUMERATED.format(param, num)
+        if hasattr(value, 'items'):
+            _flatten_into(params, key, value, ENUMERATED)
+        else:
+            params[key] = value
+    return params
+
+
+def canonical_query(params):
+    """
+    Build the canonical query string of a request: parameters sorted by name, names and values percent encoded.
+
+    :param params: Dict of parameter name to value. Values which aren't text are formatted with `format_value`.
+    :return: The query string, which is also the end of the string to sign.
+    """
+    keys, values = _quoted_keys, _quoted_values
+    parts = []
+    for k in sorted(params):
+        v = params[k]
+        if v.__class__ is not str:
+            v = format_value(v)
+        qk = keys.get(k) or quote_key(k)
+        qv = values.get(v) or quote_value(v)
+        parts.append(qk + '=' + qv)
+    return '&'.join(parts)
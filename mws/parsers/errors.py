@@ -38,8 +38,10 @@ class ErrorResponse(ValueError, BaseElementWrapper, BaseResponseMixin):
         :param xml_string:
         :return:
         """
-        ptn = '\s+xmlns=\".*?\"'
-        xml_string = re.sub(ptn, '', xml_string)
+        if isinstance(xml_string, bytes):
+            xml_string = re.sub(br'\s+xmlns=".*?"', b'', xml_string)
+        else:
+            xml_string = re.sub(r'\s+xmlns=".*?"', '', xml_string)
         tree = etree.fromstring(xml_string)
         return cls(tree)
 
@@ -0,0 +1,3 @@
+from .submitfeedresponse import SubmitFeedResponse, GetFeedSubmissionListResponse, FeedSubmissionInfo
+from .processingreport import ProcessingReport, ProcessingSummary, ProcessingResult
+from .watcher import FeedSubmissionWatcher
@@ -0,0 +1,213 @@
+import io
+from collections import OrderedDict
+
+from lxml import etree
+
+from mws.utils import IterStream
+
+TAGS = ('{*}DocumentTransactionID', '{*}StatusCode', '{*}ProcessingSummary', '{*}Result')
+
+
+def _text(element, tag):
+    child = element.find(tag)
+    if child is None:
+        # Processing reports aren't namespaced, but be lenient.
+        child = element.find('{*}' + tag)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip()
+
+
+class ProcessingSummary(object):
+    """
+    Message counts of a processing report.
+    """
+
+    def __init__(self, messages_processed=0, messages_successful=0, messages_with_error=0, messages_with_warning=0):
+        self.messages_processed = messages_processed
+        self.messages_successful = messages_successful
+        self.messages_with_error = messages_with_error
+        self.messages_with_warning = messages_with_warning
+
+    @classmethod
+    def from_element(cls, element):
+        return cls(*[int(_text(element, tag) or 0) for tag in (
+            'MessagesProcessed', 'MessagesSuccessful', 'MessagesWithError', 'MessagesWithWarning')])
+
+    def __repr__(self):
+        return '<ProcessingSummary processed={} successful={} errors={} warnings={}>'.format(
+            self.messages_processed, self.messages_successful, self.messages_with_error, self.messages_with_warning)
+
+
+class ProcessingResult(object):
+    """
+    A `<Result>` of a processing report: an error or warning about one message of the feed.
+    """
+
+    __slots__ = ('message_id', 'result_code', 'result_message_code', 'result_description', 'sku')
+
+    def __init__(self, message_id, result_code, result_message_code, result_description, sku):
+        self.message_id = message_id
+        self.result_code = result_code
+        self.result_message_code = result_message_code
+        self.result_description = result_description
+        self.sku = sku
+
+    @classmethod
+    def from_element(cls, element):
+        info = element.find('AdditionalInfo')
+        if info is None:
+            info = element.find('{*}AdditionalInfo')
+        return cls(_text(element, 'MessageID'), _text(element, 'ResultCode'), _text(element, 'ResultMessageCode'),
+                   _text(element, 'ResultDescription'), _text(info, 'SKU') if info is not None else None)
+
+    @property
+    def is_error(self):
+        return self.result_code == 'Error'
+
+    def __repr__(self):
+        return '<ProcessingResult message_id={} {} {} sku={}>'.format(
+            self.message_id, self.result_code, self.result_message_code, self.sku)
+
+
+class ProcessingReport(object):
+    """
+    Streaming parser for the processing report of a feed submission. (GetFeedSubmissionResult)
+
+    The report is read with `iterparse` and every element is discarded once read, so that reports with hundreds
+    of thousands of results are parsed in constant memory. The summary comes first in the report: reading it
+    doesn't parse the results.
+
+    Usage:
+        >>> report = ProcessingReport(api.get_feed_submission_result(feed_submission_id, stream=True))
+        >>> print report.status_code, report.summary.messages_with_error
+        >>> for code, results in report.errors_by_code().items():
+        >>>     requeue([result.sku for result in results])
+    """
+
+    def __init__(self, source):
+        """
+
+        :param source: The report as bytes, a path, a binary file object, a streamed `GetFeedSubmissionResult`
+            response or an iterator of byte chunks. Streamed sources can only be read once.
+        """
+        self.source = source
+        self._file = None
+        self._start = None
+        self._events = None
+        self._consumed = False
+        self.document_transaction_id = None
+        self.status_code = None
+        self._summary = None
+
+    def _open(self):
+        source = self.source
+        if self._file is not None:
+            if self._start is None:
+                raise ValueError('The processing report was streamed and can only be read once')
+            self._file.seek(self._start)
+            return self._file
+        if isinstance(source, (bytes, bytearray)):
+            self._file = io.BytesIO(source)
+            self._start = 0
+        elif isinstance(source, str):
+            self._file = io.open(source, 'rb')
+            self._start = 0
+        elif hasattr(source, 'iter_content'):
+            self._file = io.BufferedReader(IterStream(source.iter_content()))
+        elif hasattr(source, 'read'):
+            self._file = source
+            if source.seekable():
+                self._start = source.tell()
+        else:
+            self._file = io.BufferedReader(IterStream(source))
+        return self._file
+
+    def _parse(self):
+        """
+        Generator yielding the `ProcessingResult` of the report, after reading the header elements.
+        """
+        for _, element in etree.iterparse(self._open(), events=('end',), tag=TAGS):
+            tag = etree.QName(element).localname
+            if tag == 'Result':
+                result = ProcessingResult.from_element(element)
+                element.clear()
+                yield result
+            elif tag == 'ProcessingSummary':
+                self._summary = ProcessingSummary.from_element(element)
+                element.clear()
+            elif tag == 'StatusCode':
+                self.status_code = element.text
+            elif tag == 'DocumentTransactionID':
+                self.document_transaction_id = element.text
+            # Drop the elements already read.
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    def _advance_to_results(self):
+        """
+        Parse the report up to its first result, so that the summary is known.
+        """
+        if self._events is not None:
+            return
+        self._events = self._parse()
+        self._pending = next(self._events, None)
+
+    @property
+    def summary(self):
+        """
+        The `ProcessingSummary` of the report, None if the report has none.
+        """
+        self._advance_to_results()
+        return self._summary
+
+    def results(self):
+        """
+        Generator yielding the `ProcessingResult` of every message with an error or warning.
+
+        Seekable sources can be read any number of times, streamed sources once.
+        :return:
+        """
+        if self._consumed:
+            self._events = None
+        self._advance_to_results()
+        self._consumed = True
+        events, pending = self._events, self._pending
+        if pending is not None:
+            yield pending
+            for result in events:
+                yield result
+
+    def __iter__(self):
+        return self.results()
+
+    def errors(self):
+        """
+        Generator yielding the results which are errors.
+        """
+        return (result for result in self.results() if result.is_error)
+
+    def warnings(self):
+        """
+        Generator yielding the results which are warnings.
+        """
+        return (result for result in self.results() if result.result_code == 'Warning')
+
+    def errors_by_code(self):
+        """
+        Group the errors by ResultMessageCode.
+
+        :return: OrderedDict of ResultMessageCode to list of `ProcessingResult`, in order of first occurrence.
+        """
+        grouped = OrderedDict()
+        for result in self.errors():
+            grouped.setdefault(result.result_message_code, []).append(result)
+        return grouped
+
+    def failed_skus(self):
+        """
+        The SKUs reported with an error.
+
+        :return: Set of SKUs.
+        """
+        return {result.sku for result in self.errors() if result.sku}
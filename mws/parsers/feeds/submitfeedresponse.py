@@ -1,6 +1,7 @@
 from mws.parsers import ErrorResponse
 from mws.parsers.base import BaseElementWrapper, BaseResponseMixin, first_element
 from mws import Feeds
+from dateutil import parser
 
 namespaces = {
     'a': 'http://mws.amazonaws.com/doc/2009-01-01/'
@@ -12,32 +13,50 @@ class FeedSubmissionInfo(BaseElementWrapper):
     @property
     @first_element
     def feed_processing_status(self):
-        return self.element.xpath('//a:FeedProcessingStatus/text()', namespaces=namespaces)
+        return self.element.xpath('./a:FeedProcessingStatus/text()', namespaces=namespaces)
 
     @property
     @first_element
     def feed_type(self):
-        return self.element.xpath('//a:FeedType/text()', namespaces=namespaces)
+        return self.element.xpath('./a:FeedType/text()', namespaces=namespaces)
 
     @property
     @first_element
     def feed_submission_id(self):
-        return self.element.xpath('//a:FeedSubmissionId/text()', namespaces=namespaces)
+        return self.element.xpath('./a:FeedSubmissionId/text()', namespaces=namespaces)
 
     @property
     @first_element
     def _started_processing_date(self):
-        return self.element.xpath('//a:StartedProcessingDate/text()', namespaces=namespaces)
+        return self.element.xpath('./a:StartedProcessingDate/text()', namespaces=namespaces)
 
     @property
     @first_element
     def _completed_processing_date(self):
-        return self.element.xpath('//a:CompletedProcessingDate/text()', namespaces=namespaces)
+        return self.element.xpath('./a:CompletedProcessingDate/text()', namespaces=namespaces)
 
     @property
     @first_element
     def _submitted_date(self):
-        return self.element.xpath('//a:SubmittedDate/text()', namespaces=namespaces)
+        return self.element.xpath('./a:SubmittedDate/text()', namespaces=namespaces)
+
+    @property
+    def started_processing_date(self):
+        if not self._started_processing_date:
+            return
+        return parser.parse(self._started_processing_date)
+
+    @property
+    def completed_processing_date(self):
+        if not self._completed_processing_date:
+            return
+        return parser.parse(self._completed_processing_date)
+
+    @property
+    def submitted_date(self):
+        if not self._submitted_date:
+            return
+        return parser.parse(self._submitted_date)
 
 
 class GetFeedSubmissionListResponse(BaseElementWrapper, BaseResponseMixin):
@@ -46,8 +65,6 @@ class GetFeedSubmissionListResponse(BaseElementWrapper, BaseResponseMixin):
     def request(cls, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token=None, feed_submission_id_list=(), max_count=None, feedtypes=(), processingstatuses=(), fromdate=None, todate=None):
         api = Feeds(mws_access_key, mws_secret_key, mws_account_id, auth_token=mws_auth_token)
         response = api.get_feed_submission_list(feed_submission_id_list, max_count, feedtypes, processingstatuses, fromdate, todate)
-        with open('GetFeedSubmissionListResponse.xml', 'wb') as f:
-            f.write(response.original)
         err = ErrorResponse.load(response.original)
         if err.message:
             raise err
@@ -100,6 +117,4 @@ class SubmitFeedResponse(BaseElementWrapper, BaseResponseMixin):
         err = ErrorResponse.load(response.original)
         if err.message:
             raise err
-        with open('SubmitFeedResponse.xml', 'wb') as f:
-            f.write(response.original)
         return cls.load(response.original, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token)
@@ -0,0 +1,102 @@
+import io
+from unittest import TestCase
+
+from mws.parsers.feeds.processingreport import ProcessingReport
+
+PROCESSING_REPORT = b'''<?xml version="1.0" encoding="UTF-8"?>
+<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd">
+  <Header>
+    <DocumentVersion>1.02</DocumentVersion>
+    <MerchantIdentifier>M_EXAMPLE_123456</MerchantIdentifier>
+  </Header>
+  <MessageType>ProcessingReport</MessageType>
+  <Message>
+    <MessageID>1</MessageID>
+    <ProcessingReport>
+      <DocumentTransactionID>4200000000</DocumentTransactionID>
+      <StatusCode>Complete</StatusCode>
+      <ProcessingSummary>
+        <MessagesProcessed>4</MessagesProcessed>
+        <MessagesSuccessful>1</MessagesSuccessful>
+        <MessagesWithError>2</MessagesWithError>
+        <MessagesWithWarning>1</MessagesWithWarning>
+      </ProcessingSummary>
+      <Result>
+        <MessageID>2</MessageID>
+        <ResultCode>Error</ResultCode>
+        <ResultMessageCode>13013</ResultMessageCode>
+        <ResultDescription>This SKU does not exist in the Amazon.com catalog.</ResultDescription>
+        <AdditionalInfo>
+          <SKU>SKU-2</SKU>
+        </AdditionalInfo>
+      </Result>
+      <Result>
+        <MessageID>3</MessageID>
+        <ResultCode>Warning</ResultCode>
+        <ResultMessageCode>5000</ResultMessageCode>
+        <ResultDescription>The update is a no-op.</ResultDescription>
+        <AdditionalInfo>
+          <SKU>SKU-3</SKU>
+        </AdditionalInfo>
+      </Result>
+      <Result>
+        <MessageID>4</MessageID>
+        <ResultCode>Error</ResultCode>
+        <ResultMessageCode>13013</ResultMessageCode>
+        <ResultDescription>This SKU does not exist in the Amazon.com catalog.</ResultDescription>
+        <AdditionalInfo>
+          <SKU>SKU-4</SKU>
+        </AdditionalInfo>
+      </Result>
+    </ProcessingReport>
+  </Message>
+</AmazonEnvelope>'''
+
+
+class TestProcessingReport(TestCase):
+
+    def test_summary(self):
+        report = ProcessingReport(PROCESSING_REPORT)
+        self.assertEqual(report.summary.messages_processed, 4)
+        self.assertEqual(report.summary.messages_successful, 1)
+        self.assertEqual(report.summary.messages_with_error, 2)
+        self.assertEqual(report.summary.messages_with_warning, 1)
+        self.assertEqual(report.status_code, 'Complete')
+        self.assertEqual(report.document_transaction_id, '4200000000')
+
+    def test_results(self):
+        report = ProcessingReport(PROCESSING_REPORT)
+        results = list(report.results())
+        self.assertEqual([r.message_id for r in results], ['2', '3', '4'])
+        self.assertEqual([r.result_code for r in results], ['Error', 'Warning', 'Error'])
+        self.assertEqual(results[0].result_message_code, '13013')
+        self.assertEqual(results[0].sku, 'SKU-2')
+        self.assertEqual([r.sku for r in report.warnings()], ['SKU-3'])
+        # Seekable sources are read again.
+        self.assertEqual(len(list(report)), 3)
+
+    def test_errors_by_code(self):
+        grouped = ProcessingReport(PROCESSING_REPORT).errors_by_code()
+        self.assertEqual(list(grouped), ['13013'])
+        self.assertEqual([r.sku for r in grouped['13013']], ['SKU-2', 'SKU-4'])
+        self.assertEqual(ProcessingReport(PROCESSING_REPORT).failed_skus(), {'SKU-2', 'SKU-4'})
+
+    def test_file(self):
+        f = io.BytesIO(PROCESSING_REPORT)
+        report = ProcessingReport(f)
+        self.assertEqual(report.summary.messages_with_error, 2)
+        self.assertEqual(len(list(report.errors())), 2)
+        self.assertEqual(len(list(report.errors())), 2)
+
+    def test_stream(self):
+        chunks = [PROCESSING_REPORT[i:i + 100] for i in range(0, len(PROCESSING_REPORT), 100)]
+        report = ProcessingReport(iter(chunks))
+        # The summary is read first, the results follow in the same pass.
+        self.assertEqual(report.summary.messages_processed, 4)
+        self.assertEqual(report.failed_skus(), {'SKU-2', 'SKU-4'})
+        self.assertRaises(ValueError, list, report.results())
+
+    def test_no_results(self):
+        report = ProcessingReport(b'<AmazonEnvelope/>')
+        self.assertIsNone(report.summary)
+        self.assertEqual(list(report.results()), [])
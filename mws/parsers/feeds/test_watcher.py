@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws import Feeds
+from mws.parsers.feeds.submitfeedresponse import GetFeedSubmissionListResponse
+from mws.parsers.feeds.watcher import FeedSubmissionWatcher
+from mws.polling import PolledJob
+
+RESPONSE = b'''<?xml version="1.0"?>
+<GetFeedSubmissionListResponse xmlns="http://mws.amazonaws.com/doc/2009-01-01/">
+  <GetFeedSubmissionListResult>
+    <HasNext>false</HasNext>
+    <FeedSubmissionInfo>
+      <FeedSubmissionId>2291326430</FeedSubmissionId>
+      <FeedType>_POST_PRODUCT_PRICING_DATA_</FeedType>
+      <SubmittedDate>2009-02-20T02:10:35+00:00</SubmittedDate>
+      <FeedProcessingStatus>_DONE_</FeedProcessingStatus>
+      <CompletedProcessingDate>2009-02-20T02:15:35+00:00</CompletedProcessingDate>
+    </FeedSubmissionInfo>
+    <FeedSubmissionInfo>
+      <FeedSubmissionId>2291326431</FeedSubmissionId>
+      <FeedType>_POST_INVENTORY_AVAILABILITY_DATA_</FeedType>
+      <SubmittedDate>2009-02-20T02:11:35+00:00</SubmittedDate>
+      <FeedProcessingStatus>_IN_PROGRESS_</FeedProcessingStatus>
+    </FeedSubmissionInfo>
+  </GetFeedSubmissionListResult>
+</GetFeedSubmissionListResponse>'''
+
+
+class TestFeedSubmissionWatcher(TestCase):
+
+    def setUp(self):
+        self.watcher = FeedSubmissionWatcher('access_key', 'secret_key', 'account_id', quota=mock.Mock())
+        self.watcher.result_quota = mock.Mock()
+
+    def tearDown(self):
+        self.watcher.stop()
+
+    def test_poll(self):
+        response = GetFeedSubmissionListResponse.load(RESPONSE)
+        with mock.patch.object(GetFeedSubmissionListResponse, 'request', return_value=response) as request:
+            infos = self.watcher.poll(['2291326430', '2291326431'])
+        self.assertEqual(request.call_args[1]['feed_submission_id_list'], ['2291326430', '2291326431'])
+        self.assertEqual(self.watcher.status_of(infos['2291326430']), '_DONE_')
+        self.assertEqual(self.watcher.status_of(infos['2291326431']), '_IN_PROGRESS_')
+        self.assertEqual(self.watcher.kind_of(infos['2291326431']), '_POST_INVENTORY_AVAILABILITY_DATA_')
+        self.assertEqual(infos['2291326430'].completed_processing_date.minute, 15)
+        self.assertIsNone(infos['2291326431'].completed_processing_date)
+
+    def test_resolve_with_processing_report(self):
+        job = PolledJob('2291326430', None, 30, 0)
+        info = mock.Mock(feed_processing_status='_DONE_')
+        response = mock.Mock()
+        response.iter_content.return_value = iter([b'<AmazonEnvelope><Message><ProcessingReport>',
+                                                   b'<StatusCode>Complete</StatusCode>',
+                                                   b'</ProcessingReport></Message></AmazonEnvelope>'])
+        with mock.patch.object(Feeds, 'get_feed_submission_result', return_value=response) as get_result:
+            self.watcher.resolve(job, info)
+            report = job.future.result(5)
+        get_result.assert_called_once_with('2291326430', stream=True)
+        self.assertEqual(list(report.results()), [])
+        self.assertEqual(report.status_code, 'Complete')
+
+    def test_cancelled(self):
+        job = PolledJob('2291326430', None, 30, 0)
+        self.watcher.resolve(job, mock.Mock(feed_processing_status='_CANCELLED_'))
+        self.assertRaises(ValueError, job.future.result, 0)
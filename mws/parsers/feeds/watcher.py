@@ -0,0 +1,134 @@
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from mws import Feeds
+from mws.polling import CredentialsPoller
+from mws.quota import QuotaBucket
+from .processingreport import ProcessingReport
+from .submitfeedresponse import GetFeedSubmissionListResponse
+
+
+class FeedSubmissionWatcher(CredentialsPoller):
+    """
+    Watches many feed submissions at once with batched GetFeedSubmissionList calls.
+
+    Once a submission is _DONE_ its processing report is downloaded with GetFeedSubmissionResult and the future
+    returned by `watch` is resolved with it, as a `ProcessingReport`.
+
+    Usage:
+        >>> watcher = FeedSubmissionWatcher('access_key', 'secret_key', 'account_id')
+        >>> future = watcher.watch(feed_submission_id, '_POST_PRODUCT_PRICING_DATA_')
+        >>> processing_report = future.result()
+        >>> print processing_report.summary.messages_with_error
+    """
+
+    POLL_ACTION = 'GetFeedSubmissionList'
+
+    TERMINAL_STATUSES = frozenset(['_DONE_', '_CANCELLED_'])
+
+    # Amazon doesn't start processing a feed before a couple minutes.
+    INITIAL_INTERVAL = 30
+
+    # Rough time in seconds Amazon takes to process each feed type.
+    EXPECTED_DURATIONS = {
+        '_POST_PRODUCT_PRICING_DATA_': 300,
+        '_POST_INVENTORY_AVAILABILITY_DATA_': 300,
+        '_POST_FLAT_FILE_PRICEANDQUANTITYONLY_UPDATE_DATA_': 300,
+        '_POST_FLAT_FILE_INVLOADER_DATA_': 300,
+        '_POST_PRODUCT_DATA_': 900,
+        '_POST_PRODUCT_RELATIONSHIP_DATA_': 900,
+        '_POST_PRODUCT_IMAGE_DATA_': 900,
+        '_POST_FLAT_FILE_LISTINGS_DATA_': 900,
+        '_POST_ORDER_FULFILLMENT_DATA_': 300,
+        '_POST_FLAT_FILE_FULFILLMENT_DATA_': 300,
+        '_POST_FLAT_FILE_FBA_UPDATE_INBOUND_PLAN_': 120,
+    }
+    DEFAULT_EXPECTED_DURATION = 300
+
+    # Number of processing reports downloaded concurrently.
+    RESULT_WORKERS = 2
+
+    # Processing reports larger than this are spooled to disk.
+    SPOOL_SIZE = 10 * 1024 * 1024
+
+    _shared = {}
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token=None, fetch_results=True,
+                 **kwargs):
+        """
+
+        :param fetch_results: Resolve the futures with the processing report of the submissions. If False, they
+        are resolved with the `FeedSubmissionInfo` returned by GetFeedSubmissionList.
+        """
+        CredentialsPoller.__init__(self, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token, **kwargs)
+        self.fetch_results = fetch_results
+        self.result_quota = QuotaBucket.for_action('GetFeedSubmissionResult')
+        self._results = None
+
+    def watch(self, feed_submission_id, feed_type=None, callback=None):
+        """
+        Start watching a feed submission.
+
+        :param feed_submission_id: The FeedSubmissionId returned by SubmitFeed.
+        :param feed_type: The feed enumeration value, used to pick the polling interval.
+        :param callback: Optional callable, called with the future once the submission is processed.
+        :return: Future resolved with the processing report once the submission is _DONE_.
+        Raises ValueError if the submission is _CANCELLED_.
+        """
+        return self.register(feed_submission_id, feed_type, callback)
+
+    def poll(self, job_ids):
+        response = GetFeedSubmissionListResponse.request(self.mws_access_key, self.mws_secret_key,
+                                                         self.mws_account_id, self.mws_auth_token,
+                                                         feed_submission_id_list=job_ids, max_count=len(job_ids))
+        return {info.feed_submission_id: info for info in response.feed_submission_info_list()}
+
+    def status_of(self, info):
+        return info.feed_processing_status
+
+    def kind_of(self, info):
+        return info.feed_type
+
+    def resolve(self, job, info):
+        if info.feed_processing_status != '_DONE_':
+            job.future.set_exception(ValueError("GetFeedSubmissionListResult for feed_submission_id=%s returned %s" % (
+                job.job_id, info.feed_processing_status)))
+        elif not self.fetch_results:
+            job.future.set_result(info)
+        else:
+            # Downloaded outside of the polling thread, so that other submissions are still polled meanwhile.
+            with self._condition:
+                if self._results is None:
+                    self._results = ThreadPoolExecutor(max_workers=self.RESULT_WORKERS)
+            self._results.submit(self._fetch_result, job)
+
+    def fetch_result(self, feed_submission_id):
+        """
+        Download the processing report of a feed submission.
+
+        :param feed_submission_id: The FeedSubmissionId.
+        :return: `ProcessingReport`
+        """
+        self.result_quota.acquire()
+        api = Feeds(self.mws_access_key, self.mws_secret_key, self.mws_account_id, auth_token=self.mws_auth_token)
+        response = api.get_feed_submission_result(feed_submission_id, stream=True)
+        # Spooled so that the report can be read any number of times once the connection is released.
+        contents = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+        for chunk in response.iter_content():
+            contents.write(chunk)
+        contents.seek(0)
+        return ProcessingReport(contents)
+
+    def _fetch_result(self, job):
+        try:
+            job.future.set_result(self.fetch_result(job.job_id))
+        except Exception as e:
+            self.logger.exception('GetFeedSubmissionResult for feed_submission_id=%s failed' % job.job_id)
+            job.future.set_exception(e)
+
+    def stop(self, wait=True):
+        CredentialsPoller.stop(self, wait)
+        with self._condition:
+            results, self._results = self._results, None
+        if results is not None:
+            results.shutdown(wait=wait)
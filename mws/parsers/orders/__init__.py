@@ -1,2 +1,3 @@
 from .listorderitems import ListOrderItemsResponse
 from .listorders import ListOrdersResponse
+from .backfill import ListOrdersBackfill
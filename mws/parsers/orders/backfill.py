@@ -0,0 +1,159 @@
+import datetime
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from mws.quota import QuotaBucket, call_within_quota
+from .listorders import ListOrdersResponse
+
+
+class ListOrdersBackfill(object):
+    """
+    Page through ListOrders for a large CreatedAfter/CreatedBefore range using concurrent sub-windows.
+
+    A single ListOrders + NextToken chain is strictly serial since every token depends on the previous page.
+    The range is split into `windows` sub-windows which are paged through concurrently. A window which keeps
+    returning NextTokens after `split_after_pages` pages is dense, so its chain is abandoned and the window is
+    split in two halves which are queued again. Orders are de-duplicated by AmazonOrderId, which also covers the
+    orders already read from an abandoned chain and orders created exactly on a window boundary.
+
+    Usage:
+        >>> backfill = ListOrdersBackfill('access_key', 'secret_key', 'account_id', ['ATVPDKIKX0DER'],
+        >>>                               datetime.datetime(2016, 1, 1), datetime.datetime(2017, 1, 1))
+        >>> for order in backfill:
+        >>>     print order.amazon_order_id
+    """
+
+    # ListOrders max request quota. More workers would only be waiting on the quota.
+    MAX_WORKERS = 6
+
+    # Number of NextTokens followed before a window is considered dense and split.
+    SPLIT_AFTER_PAGES = 5
+
+    # Windows shorter than twice this are never split.
+    MIN_WINDOW = datetime.timedelta(minutes=30)
+
+    # How many times a throttled request is retried before giving up.
+    MAX_RETRIES = 5
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, marketplace_ids, created_after,
+                 created_before, windows=MAX_WORKERS, max_workers=MAX_WORKERS, split_after_pages=SPLIT_AFTER_PAGES,
+                 min_window=MIN_WINDOW, mws_auth_token=None, quota=None, **list_orders_kwargs):
+        """
+
+        :param marketplace_ids: List of marketplace ids to request orders for.
+        :param created_after: Datetime object of the start of the range.
+        :param created_before: Datetime object of the end of the range.
+            Must be at least two minutes before the current time.
+        :param windows: Number of sub-windows the range is initially split into.
+        :param max_workers: Number of concurrent NextToken chains.
+        :param split_after_pages: Number of pages after which a window is split.
+        :param min_window: Timedelta. A window is only split if both halves are at least this long.
+        :param quota: QuotaBucket shared by the workers. Defaults to a bucket with the ListOrders quota.
+        :param list_orders_kwargs: Other filters passed to `ListOrdersResponse.request`.
+            (ex. orderstatus, fulfillment_channels, max_results)
+        """
+        if created_before <= created_after:
+            raise ValueError('`created_before` must be after `created_after`')
+        self.mws_access_key = mws_access_key
+        self.mws_secret_key = mws_secret_key
+        self.mws_account_id = mws_account_id
+        self.mws_auth_token = mws_auth_token
+        self.marketplace_ids = marketplace_ids
+        self.created_after = created_after
+        self.created_before = created_before
+        self.windows = max(1, windows)
+        self.max_workers = max_workers
+        self.split_after_pages = split_after_pages
+        self.min_window = min_window
+        self.quota = quota or QuotaBucket.for_action('ListOrders')
+        self.list_orders_kwargs = list_orders_kwargs
+        self.splits = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @staticmethod
+    def _round(dt):
+        return dt.replace(microsecond=0)
+
+    def plan(self):
+        """
+        Split the requested range into evenly sized sub-windows.
+
+        :return: List of (created_after, created_before) tuples.
+        """
+        step = (self.created_before - self.created_after) / self.windows
+        bounds = [self.created_after] + [self._round(self.created_after + step * i) for i in range(1, self.windows)]
+        bounds.append(self.created_before)
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    def split(self, window):
+        """
+        Split a window in two halves.
+
+        :param window: (created_after, created_before) tuple.
+        :return: List of two windows.
+        """
+        start, end = window
+        middle = self._round(start + (end - start) / 2)
+        return [(start, middle), (middle, end)]
+
+    def _can_split(self, window):
+        start, end = window
+        return end - start >= self.min_window * 2
+
+    def _call(self, f, *args, **kwargs):
+        """
+        Call an api method once the quota allows it, retrying when Amazon throttles the request anyway.
+        """
+        return call_within_quota(self.quota, f, self.mws_access_key, self.mws_secret_key, self.mws_account_id, *args,
+                                 mws_auth_token=self.mws_auth_token, max_retries=self.MAX_RETRIES, **kwargs)
+
+    def fetch_window(self, window):
+        """
+        Page through the orders of a single window.
+
+        :param window: (created_after, created_before) tuple.
+        :return: Tuple of the window, the orders read and whether the window is dense and must be split.
+        """
+        start, end = window
+        response = self._call(ListOrdersResponse.request, self.marketplace_ids, created_after=start,
+                              created_before=end, **self.list_orders_kwargs)
+        orders = response.orders
+        pages = 0
+        while response.next_token:
+            pages += 1
+            if pages >= self.split_after_pages and self._can_split(window):
+                self.logger.debug('Splitting dense window %s - %s after %s pages' % (start, end, pages))
+                return window, orders, True
+            response = self._call(ListOrdersResponse.from_next_token, response.next_token)
+            orders.extend(response.orders)
+        return window, orders, False
+
+    def orders(self):
+        """
+        Generator yielding each order of the range exactly once, in the order the windows complete.
+
+        :return:
+        """
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = set(executor.submit(self.fetch_window, w) for w in self.plan())
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, orders, dense = future.result()
+                    if dense:
+                        self.splits += 1
+                        pending.update(executor.submit(self.fetch_window, w) for w in self.split(window))
+                    for order in orders:
+                        if order.amazon_order_id in seen:
+                            continue
+                        seen.add(order.amazon_order_id)
+                        yield order
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def __iter__(self):
+        return self.orders()
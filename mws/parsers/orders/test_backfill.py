@@ -0,0 +1,73 @@
+import datetime
+from unittest import TestCase, mock
+
+from mws.parsers.orders import ListOrdersBackfill, ListOrdersResponse
+from mws.quota import QuotaBucket
+
+START = datetime.datetime(2016, 1, 1)
+END = datetime.datetime(2016, 1, 11)
+
+# one order every 6 hours, plus a dense burst on Jan 3rd
+ORDER_DATES = [START + datetime.timedelta(hours=6 * i) for i in range(40)] + \
+              [datetime.datetime(2016, 1, 3, 12, i) for i in range(30)]
+
+PAGE_SIZE = 3
+
+
+def _page(orders, token):
+    body = ''.join('<Order><AmazonOrderId>{}</AmazonOrderId></Order>'.format(o) for o in orders)
+    next_token = '<NextToken>{}</NextToken>'.format(token) if token else ''
+    xml = '<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01"><ListOrdersResult>' \
+          '{}<Orders>{}</Orders></ListOrdersResult></ListOrdersResponse>'.format(next_token, body)
+    return ListOrdersResponse.load(xml)
+
+
+def _orders_between(start, end):
+    return ['{:%Y%m%d%H%M}'.format(d) for d in ORDER_DATES if start <= d <= end]
+
+
+def fake_request(access_key, secret_key, account_id, marketplace_ids, created_after=None, created_before=None,
+                 mws_auth_token=None):
+    return fake_next_token(access_key, secret_key, account_id, '{:%Y%m%d%H%M%S}|{:%Y%m%d%H%M%S}|0'.format(
+        created_after, created_before))
+
+
+def fake_next_token(access_key, secret_key, account_id, next_token, mws_auth_token=None):
+    start, end, offset = next_token.split('|')
+    offset = int(offset)
+    orders = _orders_between(datetime.datetime.strptime(start, '%Y%m%d%H%M%S'),
+                             datetime.datetime.strptime(end, '%Y%m%d%H%M%S'))
+    token = None
+    if offset + PAGE_SIZE < len(orders):
+        token = '{}|{}|{}'.format(start, end, offset + PAGE_SIZE)
+    return _page(orders[offset:offset + PAGE_SIZE], token)
+
+
+@mock.patch.object(ListOrdersResponse, 'from_next_token', side_effect=fake_next_token)
+@mock.patch.object(ListOrdersResponse, 'request', side_effect=fake_request)
+class TestListOrdersBackfill(TestCase):
+
+    def backfill(self, **kwargs):
+        return ListOrdersBackfill('access', 'secret', 'account', ['ATVPDKIKX0DER'], START, END,
+                                  quota=QuotaBucket(1000, 0), **kwargs)
+
+    def test_plan(self, *mocks):
+        windows = self.backfill(windows=4).plan()
+        self.assertEqual(len(windows), 4)
+        self.assertEqual(windows[0][0], START)
+        self.assertEqual(windows[-1][1], END)
+        for (_, end), (start, _) in zip(windows, windows[1:]):
+            self.assertEqual(end, start)
+
+    def test_all_orders_once(self, *mocks):
+        backfill = self.backfill(windows=3, split_after_pages=2)
+        ids = [o.amazon_order_id for o in backfill]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids), set(_orders_between(START, END)))
+        self.assertGreater(backfill.splits, 0)
+
+    def test_no_split_for_small_windows(self, *mocks):
+        backfill = self.backfill(windows=1, split_after_pages=1, min_window=datetime.timedelta(days=30))
+        ids = [o.amazon_order_id for o in backfill]
+        self.assertEqual(set(ids), set(_orders_between(START, END)))
+        self.assertEqual(backfill.splits, 0)
@@ -1 +1,8 @@
 from .requestreport import RequestReportResponse
+from .flatfile import FlatFileReader, FlatFileWrapper
+from .columns import ReportFrame
+from .parallel import ParallelFlatFileReader
+from .watcher import ReportRequestWatcher
+from .acquire import ReportAcquirer
+from .sharded import ShardedReportRequest
+from .pipeline import ReportPipeline, ReportJob
@@ -0,0 +1,159 @@
+import datetime
+import logging
+
+import mws
+from mws.quota import QuotaBucket
+from .requestreport import GetReportList, GetReportRequestList, RequestReportResponse
+
+
+def _as_utc(dt):
+    """
+    Make a datetime timezone aware. Naive datetimes are considered UTC, like in `MWS.get_datetimestamp`.
+    """
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=datetime.timezone.utc)
+    return dt
+
+
+class ReportAcquirer(object):
+    """
+    Get a report, reusing a recent enough report of the same type when Amazon already generated one.
+
+    Reports scheduled with ManageReportSchedule, or requested recently by another job, are found with
+    GetReportList. A report is reused when it became available less than `max_staleness` ago and, if a date
+    range is requested, when its own date range covers it. Otherwise a new report is requested with RequestReport
+    and waited on.
+
+    Reports requested for specific marketplaces can't be matched, since GetReportList doesn't return the
+    marketplaces of a report, and are always requested.
+
+    Usage:
+        >>> acquirer = ReportAcquirer('access_key', 'secret_key', 'account_id',
+        >>>                           max_staleness=datetime.timedelta(hours=1))
+        >>> report_id = acquirer.acquire('_GET_MERCHANT_LISTINGS_ALL_DATA_')
+        >>> contents = acquirer.api.get_report(report_id).original
+    """
+
+    MAX_STALENESS = datetime.timedelta(hours=4)
+
+    # Number of recent reports looked at.
+    MAX_COUNT = 100
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token=None,
+                 max_staleness=MAX_STALENESS, acknowledged=None, report_store=None):
+        """
+
+        :param max_staleness: timedelta, maximum age of a reused report. Reports are never reused if None.
+        :param acknowledged: Only reuse reports which are acknowledged if True, unacknowledged if False.
+        Reuse any report if None.
+        :param report_store: (Optional) `ReportStore` in which the metadata of the listed reports is recorded.
+        """
+        self.mws_access_key = mws_access_key
+        self.mws_secret_key = mws_secret_key
+        self.mws_account_id = mws_account_id
+        self.mws_auth_token = mws_auth_token
+        self.max_staleness = max_staleness
+        self.acknowledged = acknowledged
+        self.report_store = report_store
+        self.list_quota = QuotaBucket.for_action('GetReportList')
+        self.request_list_quota = QuotaBucket.for_action('GetReportRequestList')
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def api(self):
+        return mws.Reports(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                           auth_token=self.mws_auth_token, report_store=self.report_store)
+
+    @staticmethod
+    def covers(report_request_info, start_date=None, end_date=None):
+        """
+        Whether the date range of a report covers the requested date range.
+
+        :param report_request_info: The `ReportRequestInfo` of the report.
+        :param start_date: Requested start date. Any start date is accepted if None.
+        :param end_date: Requested end date. Any end date is accepted if None.
+        :return: bool
+        """
+        if start_date is not None:
+            if report_request_info.start_date is None or \
+                    _as_utc(report_request_info.start_date) > _as_utc(start_date):
+                return False
+        if end_date is not None:
+            if report_request_info.end_date is None or _as_utc(report_request_info.end_date) < _as_utc(end_date):
+                return False
+        return True
+
+    def find(self, report_type, start_date=None, end_date=None, now=None):
+        """
+        Look for a recent report which can be reused.
+
+        :param report_type: The report enumeration value.
+        :param start_date: Datetime object of report start date
+        :param end_date: Datetime object of report end date
+        :param now: Current time, defaults to utcnow.
+        :return: The `ReportInfo` of the most recent matching report, or None.
+        """
+        if self.max_staleness is None:
+            return None
+        now = now or datetime.datetime.utcnow()
+        acknowledged = None if self.acknowledged is None else ('true' if self.acknowledged else 'false')
+        self.list_quota.acquire()
+        reports = GetReportList.request(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                        max_count=self.MAX_COUNT, types=(report_type,), acknowledged=acknowledged,
+                                        fromdate=now - self.max_staleness,
+                                        mws_auth_token=self.mws_auth_token).report_info_list
+        if self.report_store is not None:
+            self.report_store.record_report_list(reports)
+        if not reports:
+            return None
+        if start_date is None and end_date is None:
+            return reports[0]
+
+        # GetReportList doesn't return the date range of the reports, their requests do.
+        self.request_list_quota.acquire()
+        requests = GetReportRequestList.request(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                                mws_auth_token=self.mws_auth_token, max_count=len(reports),
+                                                report_request_ids=[x.report_request_id for x in reports])
+        requests = requests.get_report_request_list
+        if self.report_store is not None:
+            self.report_store.record_report_requests(requests)
+        requests = {x.report_request_id: x for x in requests}
+        for report in reports:
+            request = requests.get(report.report_request_id)
+            if request is not None and self.covers(request, start_date, end_date):
+                return report
+        return None
+
+    def acquire(self, report_type, start_date=None, end_date=None, marketplace_ids=(), timeout=None):
+        """
+        Return the ReportId of a recent matching report, requesting a new report if there isn't any.
+
+        :param report_type: The report enumeration value.
+        :param start_date: Datetime object of report start date
+        :param end_date: Datetime object of report end date
+        :param marketplace_ids: (Optional) List of marketplaces to request the report for
+        :param timeout: Maximum number of seconds to wait for a requested report.
+        :return: The ReportId.
+        """
+        if not marketplace_ids:
+            report = self.find(report_type, start_date, end_date)
+            if report is not None:
+                self.logger.info('Reusing report_id=%s (%s) available since %s' % (
+                    report.report_id, report_type, report.available_date))
+                return report.report_id
+        response = RequestReportResponse.request(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                                 report_type, start_date, end_date, self.mws_auth_token,
+                                                 marketplace_ids)
+        self.logger.info('Requested %s (request_id=%s)' % (report_type, response.report_request_id))
+        return response.wait(timeout)
+
+    def download(self, report_type, start_date=None, end_date=None, marketplace_ids=(), timeout=None):
+        """
+        Return the contents of a recent matching report, requesting a new report if there isn't any.
+
+        :return:
+        """
+        report_id = self.acquire(report_type, start_date, end_date, marketplace_ids, timeout)
+        return self.api.get_report(report_id).original
@@ -0,0 +1,308 @@
+"""
+Columnar storage for flat file reports.
+
+Numeric and date columns are stored in typed `array`s instead of lists of boxed Python objects, and text
+columns are dictionary encoded as long as they have few distinct values (ex. fulfillment channel, condition
+or status). Columns convert to NumPy arrays without copying when NumPy is installed.
+"""
+import datetime
+from array import array
+from collections import OrderedDict
+
+from . import schemas
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = float('nan')
+
+# Text columns with more distinct values than this are stored as plain lists.
+MAX_CATEGORIES = 1024
+
+
+def _epoch_seconds(dt):
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    return dt.timestamp()
+
+
+def to_int(t):
+    try:
+        return int(t)
+    except ValueError:
+        return None
+
+
+def to_float(t):
+    try:
+        return float(t)
+    except ValueError:
+        return None
+
+
+def timestamp_converter(offset):
+    """
+    Build the converter of report datetimes to seconds since the epoch, for a file.
+
+    Datetimes are decoded as by the typed lines of `FlatFileReader`, `offset` included, and those without timezone
+    are then considered UTC.
+
+    :param offset: timedelta subtracted from every datetime. See `schemas.utc_offset`.
+    :return:
+    """
+    to_date = schemas.date_converter(offset)
+
+    def to_timestamp(t):
+        dt = to_date(t)
+        if not isinstance(dt, datetime.datetime):
+            return None
+        return _epoch_seconds(dt)
+
+    return to_timestamp
+
+
+# Converter without offset.
+to_timestamp = timestamp_converter(datetime.timedelta(0))
+
+
+class NumericColumn(object):
+    """
+    Column of numbers stored in an `array`.
+
+    Integer columns use 64 bit integers and are promoted to doubles when a cell is empty, empty cells being NaN.
+    """
+
+    kind = 'numeric'
+
+    def __init__(self, typecode='q', values=None):
+        self.values = array(typecode) if values is None else values
+
+    def append(self, value):
+        try:
+            self.values.append(value)
+        except (TypeError, OverflowError):
+            if self.values.typecode != 'd':
+                self.values = array('d', self.values)
+            self.values.append(NAN if value is None else value)
+
+    def extend(self, other):
+        if other.values.typecode != self.values.typecode:
+            if self.values.typecode != 'd':
+                self.values = array('d', self.values)
+            self.values.extend(array('d', other.values))
+        else:
+            self.values.extend(other.values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def to_numpy(self):
+        return numpy.frombuffer(self.values, dtype='i8' if self.values.typecode == 'q' else 'f8')
+
+
+class DateColumn(NumericColumn):
+    """
+    Column of datetimes stored as seconds since the epoch (UTC) in an array of doubles. Empty cells are NaN.
+    """
+
+    kind = 'date'
+
+    def __init__(self, typecode='d', values=None):
+        NumericColumn.__init__(self, typecode, values)
+
+    def __getitem__(self, i):
+        value = self.values[i]
+        if value != value:
+            return None
+        return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            yield self[i]
+
+    def to_numpy(self):
+        return numpy.frombuffer(self.values, dtype='f8').astype('datetime64[s]')
+
+
+class StringColumn(object):
+    """
+    Column of text, dictionary encoded as long as it has at most `max_categories` distinct values.
+
+    While encoded, `categories` holds the distinct values and `codes` the index of each cell's value.
+    """
+
+    kind = 'str'
+
+    def __init__(self, max_categories=MAX_CATEGORIES):
+        self.max_categories = max_categories
+        self.categories = []
+        self.codes = array('i')
+        self.values = None
+        self._index = {}
+
+    @property
+    def is_categorical(self):
+        return self.values is None
+
+    def _decode(self):
+        categories = self.categories
+        self.values = [categories[code] for code in self.codes]
+        self.categories, self.codes, self._index = None, None, None
+
+    def append(self, value):
+        if self.values is not None:
+            self.values.append(value)
+            return
+        code = self._index.get(value)
+        if code is None:
+            if len(self.categories) >= self.max_categories:
+                self._decode()
+                self.values.append(value)
+                return
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def extend(self, other):
+        if self.values is None and other.values is None:
+            remap = []
+            for value in other.categories:
+                code = self._index.get(value)
+                if code is None:
+                    code = self._index[value] = len(self.categories)
+                    self.categories.append(value)
+                remap.append(code)
+            self.codes.extend(array('i', [remap[code] for code in other.codes]))
+            if len(self.categories) > self.max_categories:
+                self._decode()
+            return
+        if self.values is None:
+            self._decode()
+        self.values.extend(other)
+
+    def __len__(self):
+        if self.values is not None:
+            return len(self.values)
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        if self.values is not None:
+            return self.values[i]
+        return self.categories[self.codes[i]]
+
+    def __iter__(self):
+        if self.values is not None:
+            return iter(self.values)
+        categories = self.categories
+        return (categories[code] for code in self.codes)
+
+    def to_numpy(self):
+        """
+        Return the column as a NumPy object array. Use `codes` and `categories` directly for the encoded form.
+        """
+        if self.values is not None:
+            return numpy.array(self.values, dtype=object)
+        return numpy.array(self.categories, dtype=object)[numpy.frombuffer(self.codes, dtype='i4')]
+
+
+# schema type -> (column factory, cell converter)
+COLUMN_TYPES = {
+    schemas.INT: (lambda max_categories: NumericColumn('q'), to_int),
+    schemas.DECIMAL: (lambda max_categories: NumericColumn('d'), to_float),
+    schemas.DATE: (lambda max_categories: DateColumn(), to_timestamp),
+    schemas.STR: (StringColumn, schemas.to_str),
+}
+
+
+class ReportFrame(object):
+    """
+    The columns of a report, by name.
+    """
+
+    def __init__(self, columns):
+        """
+
+        :param columns: OrderedDict of column name to column.
+        """
+        self.columns = columns
+
+    @classmethod
+    def build(cls, fieldnames, rows, schema, columns=None, max_categories=MAX_CATEGORIES, offset=None):
+        """
+        Build the columns of a report while iterating over its rows.
+
+        :param fieldnames: The report's column headers.
+        :param rows: Iterator of rows of raw cells.
+        :param schema: Dict of column name to type.
+        :param columns: Names of the columns to keep. Other cells are never converted. Defaults to all columns.
+        :param max_categories: Text columns with more distinct values are stored as plain lists.
+        :param offset: timedelta subtracted from every datetime, as in the typed lines of the report.
+        :return: ReportFrame
+        """
+        if columns is None:
+            columns = fieldnames
+        missing = set(columns) - set(fieldnames)
+        if missing:
+            raise KeyError('Unknown columns: {}'.format(', '.join(sorted(missing))))
+
+        frame = OrderedDict()
+        plan = []
+        for name in columns:
+            kind = schema.get(name, schemas.STR)
+            factory, convert = COLUMN_TYPES[kind]
+            if kind == schemas.DATE and offset:
+                convert = timestamp_converter(offset)
+            column = frame[name] = factory(max_categories)
+            plan.append((fieldnames.index(name), column, convert))
+
+        for row in rows:
+            width = len(row)
+            for i, column, convert in plan:
+                column.append(convert(row[i]) if i < width else None)
+        return cls(frame)
+
+    def extend(self, other):
+        """
+        Append the rows of another frame with the same columns.
+
+        :param other: ReportFrame
+        :return:
+        """
+        for name, column in self.columns.items():
+            column.extend(other.columns[name])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def keys(self):
+        return self.columns.keys()
+
+    def items(self):
+        return self.columns.items()
+
+    def to_numpy(self):
+        """
+        Return a dict of column name to NumPy array.
+        """
+        if numpy is None:
+            raise ImportError('numpy is required to convert a ReportFrame to arrays')
+        return OrderedDict((name, column.to_numpy()) for name, column in self.columns.items())
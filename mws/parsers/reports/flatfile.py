@@ -0,0 +1,306 @@
+import csv
+import io
+import re
+from itertools import chain, islice
+
+from dateutil import parser
+
+from mws.utils import IterStream
+from . import schemas
+from .columns import ReportFrame, MAX_CATEGORIES
+
+DATETIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\+\d{2}:\d{2})?')
+DECIMAL_RE = re.compile(r'^\d+\.\d+$')
+INTEGER_RE = re.compile(r'^\d+$')
+
+
+def iter_lines(text):
+    """
+    Lazily split a string into lines, keeping the line endings.
+
+    Unlike `str.splitlines` this doesn't build a list of every line of the report.
+    :param text:
+    :return:
+    """
+    start = 0
+    end = text.find('\n')
+    while end != -1:
+        yield text[start:end + 1]
+        start = end + 1
+        end = text.find('\n', start)
+    if start < len(text):
+        yield text[start:]
+
+
+class FlatFileReader(object):
+    """
+    Streaming reader for tab delimited flat file reports.
+
+    The source is decoded incrementally and split with the C `csv` reader, so rows are yielded lazily with
+    constant memory, whatever the size of the report. `\\r\\n` line endings and quoted fields are handled.
+
+    The source can be:
+        - the path of a report saved to disk,
+        - a file object, opened in binary or text mode,
+        - a streamed `GetReport` response (`Reports.get_report(report_id, stream=True)`),
+        - any iterator of byte chunks,
+        - the report contents as bytes.
+
+    With `typed=True` cells are decoded according to the column types of the report (see `schemas`), looked up
+    by `report_type` or inferred once from the first rows when the report type isn't registered. Converters are
+    computed once per column instead of matching every cell against regular expressions.
+
+    Usage:
+        >>> api = Reports('access_key', 'secret_key', 'account_id')
+        >>> with FlatFileReader(api.get_report(report_id, stream=True), '_GET_MERCHANT_LISTINGS_ALL_DATA_',
+        >>>                     typed=True) as report:
+        >>>     print report.fieldnames
+        >>>     for line in report:
+        >>>         print line
+    """
+
+    # Amazon encodes most flat file reports for the NA and EU marketplaces with windows-1252.
+    ENCODING = 'windows-1252'
+
+    # Number of rows used to infer the column types of unknown report types.
+    SAMPLE_SIZE = 100
+
+    def __init__(self, source, report_type=None, encoding=ENCODING, errors='strict', convert_numerical=False,
+                 typed=False, schema=None, dialect='excel-tab', **fmtparams):
+        """
+
+        :param source: Report path, file object, streamed response, iterator of byte chunks or bytes.
+        :param report_type: The report enumeration value, used to look up the column types.
+        :param encoding: Charset of the report.
+        :param errors: How decoding errors are handled. See `codecs.decode`.
+        :param convert_numerical: Convert integer and decimal cells to int and float. Ignored if `typed`.
+        :param typed: Decode cells according to the column types of the report.
+        :param schema: Dict of column name to type, overrides the registered schema of the report type.
+        :param dialect: csv dialect.
+        :param fmtparams: Extra csv formatting parameters. (ex. quoting=csv.QUOTE_NONE)
+        """
+        self.source = source
+        self.report_type = report_type
+        self.encoding = encoding
+        self.errors = errors
+        self.convert_numerical = convert_numerical
+        self.typed = typed or schema is not None
+        self.schema = schema
+        self._offset = None
+        self.dialect = dialect
+        self.fmtparams = fmtparams
+        self._stream = None
+        self._owned = False
+        self._reader = csv.reader(self._open(source), dialect=dialect, **fmtparams)
+        self._fieldnames = None
+
+    def _wrap(self, binary):
+        return io.TextIOWrapper(binary, encoding=self.encoding, errors=self.errors, newline='')
+
+    def _open(self, source):
+        """
+        Return an iterator of text lines for the source.
+        """
+        if isinstance(source, str):
+            self._stream = io.open(source, 'r', encoding=self.encoding, errors=self.errors, newline='')
+            self._owned = True
+        elif isinstance(source, (bytes, bytearray)):
+            self._stream = self._wrap(io.BytesIO(source))
+            self._owned = True
+        elif hasattr(source, 'iter_content'):
+            self._stream = self._wrap(io.BufferedReader(IterStream(source.iter_content())))
+            self._owned = True
+        elif hasattr(source, 'read'):
+            if isinstance(source, io.TextIOBase) or isinstance(source.read(0), str):
+                return source
+            if not hasattr(source, 'readable'):
+                source = io.BufferedReader(IterStream(iter(lambda: source.read(io.DEFAULT_BUFFER_SIZE), b'')))
+            self._stream = self._wrap(source)
+        else:
+            self._stream = self._wrap(io.BufferedReader(IterStream(source)))
+            self._owned = True
+        return self._stream
+
+    def close(self):
+        """
+        Close the files opened by the reader. File objects supplied by the caller are left open.
+
+        :return:
+        """
+        if self._stream is None:
+            return
+        if self._owned:
+            self._stream.close()
+        else:
+            self._stream.detach()
+        self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def fieldnames(self):
+        """
+        The column headers of the report.
+
+        :return: List of column names.
+        """
+        if self._fieldnames is None:
+            self._fieldnames = [x.strip() for x in next(self._reader, [])]
+        return self._fieldnames
+
+    @property
+    def utc_offset(self):
+        """
+        The UTC offset applied to the datetimes of the report, computed once per file.
+        :return: timedelta
+        """
+        if self._offset is None:
+            self._offset = schemas.utc_offset()
+        return self._offset
+
+    def offset_dt(self, dt):
+        """
+        Calculate the UTC offset and apply it to a datetime object returned from amazon since they use GMT.
+        :param dt:
+        :return:
+        """
+        return dt - self.utc_offset
+
+    def convert_text(self, t):
+        """
+        Convert text into proper data type.
+        :param t:
+        :return:
+        """
+        # Convert datetime
+        if DATETIME_RE.search(t):
+            return self.offset_dt(parser.parse(t))
+        if self.convert_numerical:
+            if DECIMAL_RE.search(t):
+                return float(t)
+            if INTEGER_RE.search(t):
+                return int(t)
+        if not t:
+            return None
+        return t
+
+    def rows(self):
+        """
+        Generator yielding the raw cells of each line, without any conversion.
+        :return:
+        """
+        self.fieldnames  # consume the header line
+        for row in self._reader:
+            if row:
+                yield row
+        self.close()
+
+    def _schema_rows(self):
+        """
+        Resolve the schema of the report, sampling the first rows if needed.
+        :return: The rows iterator, starting with the sampled rows.
+        """
+        rows = self.rows()
+        if self.schema is None:
+            self.schema = schemas.schema_for(self.report_type)
+        if self.schema is None:
+            sample = list(islice(rows, self.SAMPLE_SIZE))
+            self.schema = schemas.infer_schema(self.fieldnames, sample)
+            rows = chain(sample, rows)
+        return rows
+
+    def converters(self):
+        """
+        The converters applied to each column of the report when `typed`.
+        :return: List of callables.
+        """
+        return schemas.make_converters(self.fieldnames, self.schema or {}, self.utc_offset)
+
+    def typed_lines(self):
+        """
+        Generator yielding each line's contents in a tuple, decoded according to the column types of the report.
+        :return:
+        """
+        rows = self._schema_rows()
+        converters = self.converters()
+        width = len(converters)
+        for row in rows:
+            if len(row) > width:
+                converters = converters + [schemas.to_str] * (len(row) - width)
+                width = len(row)
+            yield tuple([convert(x) for convert, x in zip(converters, row)])
+
+    def to_columns(self, columns=None, max_categories=MAX_CATEGORIES):
+        """
+        Read the report into typed columns.
+
+        Numbers and dates are stored in arrays, text columns with at most `max_categories` distinct values are
+        dictionary encoded. Column types come from the report schema, inferred if the report type is unknown.
+
+        Usage:
+            >>> frame = FlatFileReader(path, '_GET_MERCHANT_LISTINGS_ALL_DATA_').to_columns(
+            >>>     ['seller-sku', 'price', 'quantity', 'fulfillment-channel'])
+            >>> prices = frame.to_numpy()['price']
+
+        :param columns: Names of the columns to keep. Other cells are never converted. Defaults to all columns.
+        :param max_categories: Text columns with more distinct values are stored as plain lists.
+        :return: ReportFrame
+        """
+        rows = self._schema_rows()
+        return ReportFrame.build(self.fieldnames, rows, self.schema, columns, max_categories, self.utc_offset)
+
+    def lines(self):
+        """
+        Generator function yielding each line's contents in a tuple.
+        :return:
+        """
+        if self.typed:
+            for line in self.typed_lines():
+                yield line
+            return
+        convert = self.convert_text
+        for row in self.rows():
+            yield tuple(convert(x.strip()) for x in row)
+
+    def __iter__(self):
+        for line in self.lines():
+            yield line
+
+
+class FlatFileWrapper(FlatFileReader):
+    """
+    Parser/generator for flat file report contents
+    """
+
+    def __init__(self, report_contents, convert_numerical=False):
+        self.report_contents = report_contents
+        FlatFileReader.__init__(self, report_contents, convert_numerical=convert_numerical)
+
+    def _open(self, source):
+        if isinstance(source, str):
+            return iter_lines(source)
+        return FlatFileReader._open(self, source)
+
+    @property
+    def headers(self):
+        return '\t'.join(self.fieldnames)
+
+    def lines(self):
+        """
+        Generator function yielding each line's contents in a tuple.
+
+        Every call starts over from the first line of the report.
+        :return:
+        """
+        if self._fieldnames is not None:
+            self.close()
+            self._reader = csv.reader(self._open(self.report_contents), dialect=self.dialect, **self.fmtparams)
+            self._fieldnames = None
+        return FlatFileReader.lines(self)
+
+    def __str__(self):
+        return self.report_contents
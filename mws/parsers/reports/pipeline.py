@@ -0,0 +1,265 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from queue import Queue  # Python 3+
+except ImportError:
+    from Queue import Queue  # Python 2.X
+
+import mws
+from mws.quota import QuotaBucket
+from .flatfile import FlatFileReader, FlatFileWrapper
+from .requestreport import RequestReportResponse
+from .watcher import ReportRequestWatcher
+
+
+def parse_flat_file(contents, encoding=FlatFileReader.ENCODING):
+    """
+    Default parse stage of the `ReportPipeline`. Returns the rows of a flat file report.
+
+    :param contents: The report contents returned by GetReport.
+    :param encoding: Charset used to decode the report if it wasn't decoded yet.
+    :return: List of tuples.
+    """
+    if isinstance(contents, str):
+        return list(FlatFileWrapper(contents).lines())
+    return list(FlatFileReader(contents, encoding=encoding).lines())
+
+
+class ReportJob(object):
+    """
+    A report to request, and the state it reached in the `ReportPipeline`.
+    """
+
+    def __init__(self, report_type, marketplace_ids=(), start_date=None, end_date=None):
+        """
+
+        :param report_type: The report enumeration value.
+        :param marketplace_ids: Marketplaces the report is requested for.
+        :param start_date: Datetime object of report start date
+        :param end_date: Datetime object of report end date
+        """
+        self.report_type = report_type
+        self.marketplace_ids = tuple(marketplace_ids)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.report_request_id = None
+        self.report_processing_status = None
+        self.report_id = None
+        self.contents = None
+        self.result = None
+        self.error = None
+        self.acknowledged = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<ReportJob {} {} request_id={} report_id={} status={}>'.format(
+            self.report_type, ','.join(self.marketplace_ids), self.report_request_id, self.report_id,
+            self.report_processing_status)
+
+
+class ReportPipeline(object):
+    """
+    Concurrent request -> wait -> download -> parse -> acknowledge runner for many reports.
+
+    All reports are requested up front, their requests are polled together by a `ReportRequestWatcher` and each
+    report is downloaded and parsed as soon as it is ready. Successfully parsed reports are acknowledged in
+    batched UpdateReportAcknowledgements calls.
+
+    Usage:
+        >>> pipeline = ReportPipeline('access_key', 'secret_key', 'account_id')
+        >>> for marketplace_id in marketplace_ids:
+        >>>     pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_', (marketplace_id,))
+        >>> for job in pipeline.run():
+        >>>     if job.ok:
+        >>>         save(job.marketplace_ids, job.result)
+    """
+
+    REQUEST_WORKERS = 2
+    DOWNLOAD_WORKERS = 4
+    PARSE_WORKERS = 2
+
+    # Maximum number of report ids per UpdateReportAcknowledgements call.
+    ACK_BATCH_SIZE = 100
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, jobs=(), mws_auth_token=None,
+                 parser=parse_flat_file, request_workers=REQUEST_WORKERS, download_workers=DOWNLOAD_WORKERS,
+                 parse_workers=PARSE_WORKERS, acknowledge=True, keep_contents=False, watcher=None,
+                 report_store=None):
+        """
+
+        :param jobs: Initial list of `ReportJob` instances.
+        :param parser: Callable receiving the report contents, its return value is stored in `ReportJob.result`.
+        :param request_workers: Number of concurrent RequestReport calls.
+        :param download_workers: Number of concurrent GetReport calls.
+        :param parse_workers: Number of reports parsed concurrently.
+        :param acknowledge: Acknowledge the reports once parsed.
+        :param keep_contents: Keep the raw report contents in `ReportJob.contents`.
+        :param watcher: `ReportRequestWatcher` to use. Defaults to the watcher shared for these credentials.
+        :param report_store: (Optional) `ReportStore` where reports are saved, and read from instead of being
+            downloaded again.
+        """
+        self.mws_access_key = mws_access_key
+        self.mws_secret_key = mws_secret_key
+        self.mws_account_id = mws_account_id
+        self.mws_auth_token = mws_auth_token
+        self.jobs = list(jobs)
+        self.parser = parser
+        self.request_workers = request_workers
+        self.download_workers = download_workers
+        self.parse_workers = parse_workers
+        self.acknowledge = acknowledge
+        self.keep_contents = keep_contents
+        self.watcher = watcher or ReportRequestWatcher.shared(mws_access_key, mws_secret_key, mws_account_id,
+                                                              mws_auth_token)
+        self.api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id, auth_token=mws_auth_token,
+                               report_store=report_store)
+        self.request_quota = QuotaBucket.for_action('RequestReport')
+        self.download_quota = QuotaBucket.for_action('GetReport')
+        self.ack_quota = QuotaBucket.for_action('UpdateReportAcknowledgements')
+        self._ack_lock = threading.Lock()
+        self._ack_pending = []
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def add(self, report_type, marketplace_ids=(), start_date=None, end_date=None):
+        """
+        Add a report to request.
+
+        :return: The `ReportJob` instance.
+        """
+        job = ReportJob(report_type, marketplace_ids, start_date, end_date)
+        self.jobs.append(job)
+        return job
+
+    def run(self):
+        """
+        Run all jobs.
+
+        Generator yielding each `ReportJob` once it is completed, in the order they complete.
+        Jobs which failed at any stage have their `error` attribute set.
+        :return:
+        """
+        jobs = list(self.jobs)
+        completed = Queue()
+        requester = ThreadPoolExecutor(max_workers=self.request_workers)
+        downloader = ThreadPoolExecutor(max_workers=self.download_workers)
+        parser = ThreadPoolExecutor(max_workers=self.parse_workers)
+        # Set once the caller stops iterating, callbacks still running then don't start the next stage.
+        closed = threading.Event()
+        finished = set()
+        finished_lock = threading.Lock()
+        watched = []
+
+        def finish(job, error=None):
+            with finished_lock:
+                if id(job) in finished:
+                    return
+                finished.add(id(job))
+            job.error = error
+            completed.put(job)
+
+        def stage(f):
+            """
+            Run a stage of a job, so that any error ends the job instead of being lost in an executor or callback.
+            """
+            def run_stage(job, *args):
+                if closed.is_set():
+                    return
+                try:
+                    f(job, *args)
+                except Exception as e:
+                    self.logger.exception('%s of %s failed' % (f.__name__, job))
+                    finish(job, e)
+            return run_stage
+
+        @stage
+        def parse(job):
+            job.result = self.parser(job.contents)
+            if not self.keep_contents:
+                job.contents = None
+            if self.acknowledge:
+                self._queue_acknowledgement(job)
+            finish(job)
+
+        @stage
+        def download(job):
+            if self.api.report_store is not None:
+                self.api.report_store.record(job.report_id, report_type=job.report_type,
+                                             report_request_id=job.report_request_id,
+                                             start_date=job.start_date, end_date=job.end_date)
+            if self.api.report_store is None or job.report_id not in self.api.report_store:
+                self.download_quota.acquire()
+            job.contents = self.api.get_report(job.report_id).original
+            parser.submit(parse, job)
+
+        @stage
+        def ready(job, future):
+            info = future.result()
+            job.report_processing_status = info.report_processing_status
+            job.report_id = info.generated_report_id
+            if job.report_processing_status == '_DONE_NO_DATA_':
+                return finish(job)
+            if job.report_processing_status != '_DONE_':
+                return finish(job, ValueError("GetReportRequestList for report_request_id=%s returned %s" % (
+                    job.report_request_id, job.report_processing_status)))
+            downloader.submit(download, job)
+
+        @stage
+        def request(job):
+            self.request_quota.acquire()
+            response = RequestReportResponse.request(self.mws_access_key, self.mws_secret_key,
+                                                     self.mws_account_id, job.report_type, job.start_date,
+                                                     job.end_date, self.mws_auth_token, job.marketplace_ids)
+            job.report_request_id = response.report_request_id
+            watched.append(self.watcher.watch(job.report_request_id, job.report_type,
+                                              callback=lambda future: ready(job, future)))
+
+        try:
+            for job in jobs:
+                requester.submit(request, job)
+            for _ in jobs:
+                yield completed.get()
+        finally:
+            closed.set()
+            requester.shutdown(wait=True)
+            # Requests the caller doesn't wait for anymore aren't polled.
+            for future in watched:
+                future.cancel()
+            downloader.shutdown(wait=True)
+            parser.shutdown(wait=True)
+            self.flush_acknowledgements()
+
+    def _queue_acknowledgement(self, job):
+        with self._ack_lock:
+            self._ack_pending.append(job)
+            if len(self._ack_pending) < self.ACK_BATCH_SIZE:
+                return
+            batch, self._ack_pending = self._ack_pending, []
+        self._acknowledge(batch)
+
+    def flush_acknowledgements(self):
+        """
+        Acknowledge the reports parsed since the last batch.
+
+        :return:
+        """
+        with self._ack_lock:
+            batch, self._ack_pending = self._ack_pending, []
+        for i in range(0, len(batch), self.ACK_BATCH_SIZE):
+            self._acknowledge(batch[i:i + self.ACK_BATCH_SIZE])
+
+    def _acknowledge(self, batch):
+        if not batch:
+            return
+        try:
+            self.ack_quota.acquire()
+            self.api.update_report_acknowledgements(report_ids=[job.report_id for job in batch], acknowledged=True)
+        except Exception:
+            self.logger.exception('Acknowledging %s reports failed' % len(batch))
+            return
+        for job in batch:
+            job.acknowledged = True
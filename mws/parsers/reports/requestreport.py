@@ -1,11 +1,8 @@
-import time
-import datetime
-import re
-
 import mws
 from mws.parsers.base import BaseElementWrapper, BaseResponseMixin, first_element, parse_bool
 from mws.parsers.errors import ErrorResponse
 from dateutil import parser
+from .flatfile import FlatFileWrapper  # noqa: kept importable from its original location
 
 namespaces = {'a': 'http://mws.amazonaws.com/doc/2009-01-01/'}
 
@@ -176,8 +173,8 @@ class GetReportList(BaseElementWrapper, BaseResponseMixin):
 
     @classmethod
     def request(cls, mws_access_key, mws_secret_key, mws_account_id, request_ids=(), max_count=None, types=(),
-                acknowledged=None, fromdate=None, todate=None):
-        api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id)
+                acknowledged=None, fromdate=None, todate=None, mws_auth_token=None):
+        api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id, auth_token=mws_auth_token)
         response = api.get_report_list(requestids=request_ids, max_count=max_count, types=types,
                                        acknowledged=acknowledged, fromdate=fromdate, todate=todate)
 
@@ -185,7 +182,7 @@ class GetReportList(BaseElementWrapper, BaseResponseMixin):
         if err.message:
             raise err
 
-        return cls.load(response.original, mws_access_key, mws_secret_key, mws_account_id)
+        return cls.load(response.original, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token)
 
 
 class RequestReportResponse(BaseElementWrapper, BaseResponseMixin):
@@ -195,6 +192,9 @@ class RequestReportResponse(BaseElementWrapper, BaseResponseMixin):
     # How many days to look back for end of report
     END_DATE_DAYS = 0
 
+    # `ReportStore` consulted before downloading a report, see `Reports.get_report`.
+    report_store = None
+
     def __init__(self, element, mws_access_key=None, mws_secret_key=None, mws_account_id=None, mws_auth_token=None):
         BaseElementWrapper.__init__(self, element)
         BaseResponseMixin.__init__(self)
@@ -265,33 +265,33 @@ class RequestReportResponse(BaseElementWrapper, BaseResponseMixin):
             return
         return parser.parse(self._start_date)
 
-    def wait(self):
+    def wait(self, timeout=None):
         """
         Wait for report to finish processing.
         Blocking method. Will return once report has finished processing.
+
+        The report request is polled by the `ReportRequestWatcher` shared by all requests made with the same
+        credentials, so that many reports waited on concurrently are checked in batched calls.
+        :param timeout: Maximum number of seconds to wait. Waits indefinitely if None.
         :return:
         """
-        done = False
-        status = ''
-        report_id = None
-        while not done:
-            time.sleep(60)  # sleep before querying since it takes time to process and so that when the report is _DONE_ the loop is immediately broken.
-            response = GetReportRequestList.request(self.mws_access_key, self.mws_secret_key, self.mws_account_id, mws_auth_token=self.mws_auth_token, report_request_ids=(self.report_request_id,))
-            request_result = response.get_report_request_list[0]
-            status = request_result.report_processing_status
-            self.logger.debug('report_request_id=%s report_processing_status=%s' % (self.report_request_id, status))
-            done = bool(request_result.completed_date)
-            report_id = request_result.generated_report_id
+        from .watcher import ReportRequestWatcher
+        watcher = ReportRequestWatcher.shared(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                              self.mws_auth_token)
+        request_result = watcher.watch(self.report_request_id, self.report_type).result(timeout)
+        status = request_result.report_processing_status
+        self.logger.debug('report_request_id=%s report_processing_status=%s' % (self.report_request_id, status))
         if status != '_DONE_':
             raise ValueError("GetReportRequestList for report_request_id=%s returned %s" % (self.report_request_id, status))
-        return report_id
+        return request_result.generated_report_id
 
     def report_contents(self):
         """
         Return report response contents
         :return:
         """
-        api = mws.Reports(self.mws_access_key, self.mws_secret_key, self.mws_account_id, auth_token=self.mws_auth_token)
+        api = mws.Reports(self.mws_access_key, self.mws_secret_key, self.mws_account_id, auth_token=self.mws_auth_token,
+                          report_store=self.report_store)
         response = api.get_report(self.report_id)
         return response.original
 
@@ -317,18 +317,28 @@ class RequestReportResponse(BaseElementWrapper, BaseResponseMixin):
         return contents
 
     @classmethod
-    def download_most_recent(cls, mws_access_key, mws_secret_key, mws_account_id, report_enumeration_type):
+    def download_most_recent(cls, mws_access_key, mws_secret_key, mws_account_id, report_enumeration_type,
+                             report_store=None):
+        """
+        Download the most recent report of a type.
+
+        :param report_store: (Optional) `ReportStore` in which the reports listed by GetReportList are recorded.
+            The report is only downloaded if it isn't in the store already.
+        :return:
+        """
         get_report_list = GetReportList.request(mws_access_key, mws_secret_key, mws_account_id, types=(report_enumeration_type,))
         if get_report_list.report_info_list:
+            if report_store is not None:
+                report_store.record_report_list(get_report_list.report_info_list)
             report_id = get_report_list.report_info_list[0].report_id
-            api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id)
+            api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id, report_store=report_store)
             response = api.get_report(report_id)
             return response.original
         raise mws.MWSError('No reports for `{}`'.format(report_enumeration_type))
 
     @classmethod
     def request(cls, mws_access_key, mws_secret_key, mws_account_id,
-                report_enumeration_type, start_date=None, end_date=None, mws_auth_token=None):
+                report_enumeration_type, start_date=None, end_date=None, mws_auth_token=None, marketplace_ids=()):
         """
         Use python amazon mws to request get_matching_product_for_id.
 
@@ -339,68 +349,32 @@ class RequestReportResponse(BaseElementWrapper, BaseResponseMixin):
         :param start_date: Datetime object of report start date
         :param end_date: Datetime object of report end date
         :param mws_auth_token: (Optional) Use when making a request from a third party
+        :param marketplace_ids: (Optional) List of marketplaces to request the report for
         :return:
         """
         api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id, auth_token=mws_auth_token)
-        response = api.request_report(report_enumeration_type, start_date=start_date, end_date=end_date)
+        response = api.request_report(report_enumeration_type, start_date=start_date, end_date=end_date,
+                                      marketplaceids=marketplace_ids)
         err = ErrorResponse.load(response.original)
         if err.message:
             raise err
         return cls.load(response.original, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token)
 
-
-class FlatFileWrapper(object):
-    """
-    Parser/generator for flat file report contents
-    """
-
-    def __init__(self, report_contents, convert_numerical=False):
-        self.report_contents = report_contents
-        # Split the report into lines and strip any excess whitespace from each line.
-        self._lines = self.report_contents.split('\n')
-        self.headers = self._lines.pop(0)
-        self.convert_numerical = convert_numerical
-
-    def offset_dt(self, dt):
-        """
-        Calculate the UTC offset and apply it to a datetime object returned from amazon since they use GMT.
-        :param dt:
-        :return:
+    @classmethod
+    def request_sharded(cls, mws_access_key, mws_secret_key, mws_account_id, report_enumeration_type, start_date,
+                        end_date, shard_size=None, mws_auth_token=None, marketplace_ids=(), key_columns=None,
+                        **kwargs):
         """
-        offset = datetime.datetime.utcnow() - datetime.datetime.now()
-        seconds_offset = round(offset.total_seconds()) / 60
-        return dt - datetime.timedelta(seconds=seconds_offset)
+        Request a report over a long date range as several reports over `shard_size` long ranges, requested in
+        parallel and merged into one stream of rows. See `ShardedReportRequest`.
 
-    def convert_text(self, t):
-        """
-        Convert text into proper data type.
-        :param t:
-        :return:
+        :param shard_size: timedelta, date range of each requested report. Defaults to 7 days.
+        :param key_columns: Columns identifying a row, used to drop the rows found in two shards.
+        :return: `ShardedReportRequest`, iterate over it to get the rows.
         """
-        # Convert datetime
-        if re.search('\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\+\d{2}:\d{2})?', t):
-            return self.offset_dt(parser.parse(t))
-        if self.convert_numerical:
-            if re.search('^\d+\.\d+$', t):
-                return float(t)
-            if re.search('^\d+$', t):
-                return int(t)
-        if not t:
-            return None
-        return t
-
-    def lines(self):
-        """
-        Generator function yielding each line's contents in a tuple.
-        :return:
-        """
-        for line in self._lines:
-            t = tuple(self.convert_text(x.strip()) for x in line.split('\t'))
-            yield t
-
-    def __iter__(self):
-        for line in self.lines():
-            yield line
-
-    def __str__(self):
-        return self.report_contents
+        from .sharded import ShardedReportRequest
+        report = ShardedReportRequest(mws_access_key, mws_secret_key, mws_account_id, report_enumeration_type,
+                                      start_date, end_date, shard_size or ShardedReportRequest.SHARD_SIZE,
+                                      mws_auth_token, marketplace_ids, key_columns, **kwargs)
+        report.request()
+        return report
@@ -0,0 +1,253 @@
+"""
+Column types of the flat file reports, used to decode rows with converters computed once per file instead of
+sniffing every cell.
+"""
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+
+from dateutil import parser
+
+INT = 'int'
+DECIMAL = 'decimal'
+DATE = 'date'
+STR = 'str'
+
+INTEGER_RE = re.compile(r'^-?\d+$')
+DECIMAL_RE = re.compile(r'^-?\d+\.\d+$')
+DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}')
+
+# Timezone abbreviations found in listings reports (ex. "2016-01-05 13:25:10 PST")
+TZINFOS = {
+    'UTC': 0,
+    'GMT': 0,
+    'BST': 3600,
+    'CET': 3600,
+    'CEST': 7200,
+    'JST': 32400,
+    'EST': -18000,
+    'EDT': -14400,
+    'CST': -21600,
+    'CDT': -18000,
+    'MST': -25200,
+    'MDT': -21600,
+    'PST': -28800,
+    'PDT': -25200,
+}
+
+_LISTINGS = {
+    'price': DECIMAL,
+    'quantity': INT,
+    'open-date': DATE,
+    'item-condition': INT,
+    'zshop-shipping-fee': DECIMAL,
+    'pending-quantity': INT,
+}
+
+_ORDERS = {
+    'purchase-date': DATE,
+    'last-updated-date': DATE,
+    'quantity': INT,
+    'item-price': DECIMAL,
+    'item-tax': DECIMAL,
+    'shipping-price': DECIMAL,
+    'shipping-tax': DECIMAL,
+    'gift-wrap-price': DECIMAL,
+    'gift-wrap-tax': DECIMAL,
+    'item-promotion-discount': DECIMAL,
+    'ship-promotion-discount': DECIMAL,
+}
+
+# ReportType enumeration value -> {column: type}. Columns which aren't listed are decoded as text.
+REPORT_SCHEMAS = {
+    '_GET_FLAT_FILE_OPEN_LISTINGS_DATA_': {
+        'price': DECIMAL,
+        'quantity': INT,
+    },
+    '_GET_MERCHANT_LISTINGS_DATA_': _LISTINGS,
+    '_GET_MERCHANT_LISTINGS_ALL_DATA_': _LISTINGS,
+    '_GET_MERCHANT_LISTINGS_INACTIVE_DATA_': _LISTINGS,
+    '_GET_MERCHANT_LISTINGS_DATA_LITE_': {
+        'price': DECIMAL,
+        'quantity': INT,
+    },
+    '_GET_AFN_INVENTORY_DATA_': {
+        'Quantity Available': INT,
+    },
+    '_GET_FBA_MYI_UNSUPPRESSED_INVENTORY_DATA_': {
+        'your-price': DECIMAL,
+        'mfn-fulfillable-quantity': INT,
+        'afn-warehouse-quantity': INT,
+        'afn-fulfillable-quantity': INT,
+        'afn-unsellable-quantity': INT,
+        'afn-reserved-quantity': INT,
+        'afn-total-quantity': INT,
+        'per-unit-volume': DECIMAL,
+        'afn-inbound-working-quantity': INT,
+        'afn-inbound-shipped-quantity': INT,
+        'afn-inbound-receiving-quantity': INT,
+    },
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_': _ORDERS,
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_': _ORDERS,
+    '_GET_AMAZON_FULFILLED_SHIPMENTS_DATA_': {
+        'purchase-date': DATE,
+        'payments-date': DATE,
+        'shipment-date': DATE,
+        'reporting-date': DATE,
+        'quantity-shipped': INT,
+        'item-price': DECIMAL,
+        'item-tax': DECIMAL,
+        'shipping-price': DECIMAL,
+        'shipping-tax': DECIMAL,
+        'gift-wrap-price': DECIMAL,
+        'gift-wrap-tax': DECIMAL,
+        'item-promotion-discount': DECIMAL,
+        'ship-promotion-discount': DECIMAL,
+        'estimated-arrival-date': DATE,
+    },
+    '_GET_FBA_FULFILLMENT_CUSTOMER_RETURNS_DATA_': {
+        'return-date': DATE,
+        'quantity': INT,
+    },
+    '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_': {
+        'settlement-start-date': DATE,
+        'settlement-end-date': DATE,
+        'deposit-date': DATE,
+        'total-amount': DECIMAL,
+        'amount': DECIMAL,
+        'posted-date': DATE,
+        'posted-date-time': DATE,
+        'quantity-purchased': INT,
+    },
+}
+
+
+def register_schema(report_type, schema):
+    """
+    Register the column types of a report type.
+
+    :param report_type: The report enumeration value.
+    :param schema: Dict of column name to one of INT, DECIMAL, DATE or STR.
+    :return:
+    """
+    REPORT_SCHEMAS[report_type] = dict(schema)
+
+
+def schema_for(report_type):
+    """
+    Return the registered schema of a report type, or None if it isn't known.
+    """
+    return REPORT_SCHEMAS.get(report_type)
+
+
+def utc_offset():
+    """
+    Offset applied to the datetimes of a report, computed once per file.
+    See `FlatFileReader.offset_dt`.
+
+    :return: timedelta
+    """
+    offset = datetime.datetime.utcnow() - datetime.datetime.now()
+    return datetime.timedelta(seconds=round(offset.total_seconds()) / 60)
+
+
+def _is_identifier(v):
+    # Leading zeros and long digit strings are identifiers (UPC, EAN...), not numbers.
+    digits = v.lstrip('-')
+    return digits.isdigit() and (len(digits) >= 16 or (len(digits) > 1 and digits.startswith('0')))
+
+
+def _infer_type(values):
+    values = [v for v in values if v]
+    if not values or any(_is_identifier(v) for v in values):
+        return STR
+    if all(INTEGER_RE.match(v) for v in values):
+        return INT
+    if all(DECIMAL_RE.match(v) or INTEGER_RE.match(v) for v in values):
+        return DECIMAL
+    if all(DATETIME_RE.match(v) for v in values):
+        return DATE
+    return STR
+
+
+def infer_schema(fieldnames, sample):
+    """
+    Infer the column types of a report from a sample of its rows.
+
+    :param fieldnames: The report's column headers.
+    :param sample: List of rows of raw cells.
+    :return: Dict of column name to type.
+    """
+    schema = {}
+    for i, name in enumerate(fieldnames):
+        schema[name] = _infer_type([row[i].strip() for row in sample if i < len(row)])
+    return schema
+
+
+def to_str(t):
+    return t.strip() or None
+
+
+def to_int(t):
+    t = t.strip()
+    if not t:
+        return None
+    try:
+        return int(t)
+    except ValueError:
+        return t
+
+
+def to_decimal(t):
+    t = t.strip()
+    if not t:
+        return None
+    try:
+        return Decimal(t)
+    except InvalidOperation:
+        return t
+
+
+def date_converter(offset):
+    """
+    Build the datetime converter of a file.
+
+    :param offset: timedelta subtracted from every datetime. See `utc_offset`.
+    :return:
+    """
+    fromisoformat = datetime.datetime.fromisoformat
+
+    def to_date(t):
+        t = t.strip()
+        if not t:
+            return None
+        try:
+            dt = fromisoformat(t)
+        except ValueError:
+            try:
+                dt = parser.parse(t, tzinfos=TZINFOS)
+            except (ValueError, OverflowError):
+                return t
+        return dt - offset
+
+    return to_date
+
+
+def make_converters(fieldnames, schema, offset=None):
+    """
+    Build the list of converters to apply to the cells of each row.
+
+    :param fieldnames: The report's column headers.
+    :param schema: Dict of column name to type.
+    :param offset: timedelta subtracted from every datetime. Computed with `utc_offset` if None.
+    :return: List of callables, one per column.
+    """
+    if offset is None:
+        offset = utc_offset()
+    converters = {
+        INT: to_int,
+        DECIMAL: to_decimal,
+        DATE: date_converter(offset),
+        STR: to_str,
+    }
+    return [converters[schema.get(name, STR)] for name in fieldnames]
@@ -0,0 +1,300 @@
+import datetime
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import mws
+from mws.quota import QuotaBucket
+from .flatfile import FlatFileReader
+from .requestreport import RequestReportResponse
+from .watcher import ReportRequestWatcher
+
+# ReportType enumeration value -> columns identifying a row, used to drop the rows found in two shards.
+KEY_COLUMNS = {
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_': ('amazon-order-id', 'sku'),
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_': ('amazon-order-id', 'sku'),
+    '_GET_AMAZON_FULFILLED_SHIPMENTS_DATA_': ('shipment-item-id',),
+    '_GET_FBA_FULFILLMENT_CUSTOMER_RETURNS_DATA_': ('order-id', 'sku', 'license-plate-number'),
+}
+
+# ReportType enumeration values whose rows are dated by their last update: a row found in two shards was updated
+# again in the later one, so its last occurrence is kept. Rows of the other reports are the same in both shards
+# and the first occurrence is kept.
+KEEP_LAST = frozenset([
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_',
+])
+
+
+def split_date_range(start_date, end_date, shard_size):
+    """
+    Split a date range into contiguous sub-ranges.
+
+    :param start_date: Datetime object of the range start.
+    :param end_date: Datetime object of the range end.
+    :param shard_size: timedelta, length of each sub-range but the last one.
+    :return: List of (start, end) tuples.
+    """
+    if shard_size <= datetime.timedelta(0):
+        raise ValueError('shard_size must be positive')
+    ranges = []
+    start = start_date
+    while start < end_date:
+        end = min(start + shard_size, end_date)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+class ReportShard(object):
+    """
+    The report requested for one sub-range of a `ShardedReportRequest`.
+    """
+
+    def __init__(self, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.report_request_id = None
+        self.report_processing_status = None
+        self.report_id = None
+        self.attempts = 0
+        # Resolved with the `ReportRequestInfo` once the report is generated.
+        self.ready = Future()
+        # Resolved with the report contents once downloaded, or None if the report has no data.
+        self.downloaded = Future()
+
+    def __repr__(self):
+        return '<ReportShard {} - {} request_id={} report_id={} status={}>'.format(
+            self.start_date, self.end_date, self.report_request_id, self.report_id, self.report_processing_status)
+
+
+class ShardedReportRequest(object):
+    """
+    Request a report over a long date range as several reports over shorter date ranges, merged back into a
+    single stream of rows.
+
+    Amazon generates the shards in parallel, faster than a single report over the whole range, and a shard which
+    is cancelled is requested again on its own, up to `retries` times. All shards are requested at once and watched
+    together by the `ReportRequestWatcher`. Each shard is downloaded as soon as it is ready and rows are yielded in date order.
+
+    Rows found in two shards, ie. on a range boundary, are yielded once: rows are identified by `key_columns`,
+    looked up by report type in `KEY_COLUMNS` or the whole row otherwise. The first occurrence is kept, except for
+    the report types in `KEEP_LAST` (ex. _GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_) where a row found in several
+    shards was updated since, and its last occurrence is kept. Those rows are only yielded once every shard is
+    downloaded.
+
+    Usage:
+        >>> report = RequestReportResponse.request_sharded('access_key', 'secret_key', 'account_id',
+        >>>                                                '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_',
+        >>>                                                start_date, end_date, datetime.timedelta(days=7))
+        >>> print report.fieldnames
+        >>> for row in report:
+        >>>     print row
+    """
+
+    SHARD_SIZE = datetime.timedelta(days=7)
+    REQUEST_WORKERS = 2
+    DOWNLOAD_WORKERS = 4
+
+    # Number of times a cancelled shard is requested again.
+    RETRIES = 1
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, report_type, start_date, end_date,
+                 shard_size=SHARD_SIZE, mws_auth_token=None, marketplace_ids=(), key_columns=None, typed=False,
+                 encoding=FlatFileReader.ENCODING, request_workers=REQUEST_WORKERS,
+                 download_workers=DOWNLOAD_WORKERS, watcher=None, report_store=None, retries=RETRIES,
+                 keep_last=None):
+        """
+
+        :param report_type: The report enumeration value.
+        :param start_date: Datetime object of report start date
+        :param end_date: Datetime object of report end date
+        :param shard_size: timedelta, date range of each requested report.
+        :param marketplace_ids: (Optional) List of marketplaces to request the report for
+        :param key_columns: Columns identifying a row. Defaults to `KEY_COLUMNS`, or the whole row.
+        :param typed: Decode cells according to the column types of the report. See `FlatFileReader`.
+        :param encoding: Charset of the report.
+        :param request_workers: Number of concurrent RequestReport calls.
+        :param download_workers: Number of concurrent GetReport calls.
+        :param watcher: `ReportRequestWatcher` to use. Defaults to the watcher shared for these credentials.
+        :param report_store: (Optional) `ReportStore` consulted before downloading the shards.
+        :param retries: Number of times a cancelled shard is requested again.
+        :param keep_last: Keep the last occurrence of the rows found in several shards instead of the first one.
+            Defaults to True for the report types in `KEEP_LAST`.
+        """
+        self.mws_access_key = mws_access_key
+        self.mws_secret_key = mws_secret_key
+        self.mws_account_id = mws_account_id
+        self.mws_auth_token = mws_auth_token
+        self.report_type = report_type
+        self.marketplace_ids = tuple(marketplace_ids)
+        self.key_columns = key_columns if key_columns is not None else KEY_COLUMNS.get(report_type)
+        self.keep_last = keep_last if keep_last is not None else report_type in KEEP_LAST
+        self.typed = typed
+        self.encoding = encoding
+        self.request_workers = request_workers
+        self.download_workers = download_workers
+        self.retries = retries
+        self.shards = [ReportShard(start, end) for start, end in split_date_range(start_date, end_date, shard_size)]
+        self.watcher = watcher or ReportRequestWatcher.shared(mws_access_key, mws_secret_key, mws_account_id,
+                                                              mws_auth_token)
+        self.api = mws.Reports(mws_access_key, mws_secret_key, mws_account_id, auth_token=mws_auth_token,
+                               report_store=report_store)
+        self.request_quota = QuotaBucket.for_action('RequestReport')
+        self.download_quota = QuotaBucket.for_action('GetReport')
+        self._downloader = None
+        self._requested = False
+        self._lock = threading.Lock()
+        self._fieldnames = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def request(self):
+        """
+        Request the report of every shard. Called by `rows` if needed.
+
+        :return:
+        """
+        with self._lock:
+            if self._requested:
+                return
+            self._requested = True
+        self._downloader = ThreadPoolExecutor(max_workers=self.download_workers)
+        with ThreadPoolExecutor(max_workers=self.request_workers) as requester:
+            for shard in self.shards:
+                requester.submit(self._request, shard)
+
+    def _request(self, shard):
+        shard.attempts += 1
+        try:
+            self.request_quota.acquire()
+            response = RequestReportResponse.request(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                                     self.report_type, shard.start_date, shard.end_date,
+                                                     self.mws_auth_token, self.marketplace_ids)
+            shard.report_request_id = response.report_request_id
+        except Exception as e:
+            self.logger.exception('Requesting %s failed' % shard)
+            shard.ready.set_exception(e)
+            shard.downloaded.set_exception(e)
+            return
+        self.watcher.watch(shard.report_request_id, self.report_type,
+                           callback=lambda future: self._ready(shard, future))
+
+    def _ready(self, shard, future):
+        try:
+            info = future.result()
+        except Exception as e:
+            shard.ready.set_exception(e)
+            shard.downloaded.set_exception(e)
+            return
+        shard.report_processing_status = info.report_processing_status
+        shard.report_id = info.generated_report_id
+        if shard.report_processing_status == '_CANCELLED_' and shard.attempts <= self.retries:
+            self.logger.warning('%s was cancelled, requesting it again' % shard)
+            try:
+                self._downloader.submit(self._request, shard)
+                return
+            except RuntimeError:  # rows() was closed
+                pass
+        shard.ready.set_result(info)
+        if shard.report_processing_status == '_DONE_NO_DATA_':
+            shard.downloaded.set_result(None)
+        elif shard.report_processing_status != '_DONE_':
+            shard.downloaded.set_exception(ValueError("GetReportRequestList for report_request_id=%s returned %s" % (
+                shard.report_request_id, shard.report_processing_status)))
+        else:
+            try:
+                self._downloader.submit(self._download, shard)
+            except RuntimeError as e:  # rows() was closed before every shard was ready
+                shard.downloaded.set_exception(e)
+
+    def _download(self, shard):
+        try:
+            if self.api.report_store is None or shard.report_id not in self.api.report_store:
+                self.download_quota.acquire()
+            shard.downloaded.set_result(self.api.get_report(shard.report_id).original)
+        except Exception as e:
+            self.logger.exception('Downloading %s failed' % shard)
+            shard.downloaded.set_exception(e)
+
+    @property
+    def fieldnames(self):
+        """
+        The column headers of the report, read from the first shard which has data. Waits for it if needed.
+
+        :return: List of column names.
+        """
+        if self._fieldnames is None:
+            self.request()
+            for shard in self.shards:
+                contents = shard.downloaded.result()
+                if contents:
+                    self._fieldnames = FlatFileReader(contents, encoding=self.encoding).fieldnames
+                    break
+            else:
+                self._fieldnames = []
+        return self._fieldnames
+
+    def shard_rows(self, shard, timeout=None):
+        """
+        Generator yielding the rows of one shard, in the column order of `fieldnames`.
+
+        :param shard: `ReportShard`
+        :param timeout: Maximum number of seconds to wait for the shard.
+        :return:
+        """
+        self.request()
+        contents = shard.downloaded.result(timeout)
+        if not contents:
+            return
+        reader = FlatFileReader(contents, self.report_type, encoding=self.encoding, typed=self.typed)
+        fieldnames = self.fieldnames
+        if reader.fieldnames == fieldnames:
+            for line in reader:
+                yield line
+            return
+        # Header lines are dropped and the columns of the later shards are realigned on the first shard's.
+        self.logger.warning('%s columns differ from the first shard: %s' % (shard, reader.fieldnames))
+        positions = [reader.fieldnames.index(name) if name in reader.fieldnames else None for name in fieldnames]
+        for line in reader:
+            yield tuple(line[i] if i is not None and i < len(line) else None for i in positions)
+
+    def rows(self, timeout=None):
+        """
+        Generator yielding the rows of every shard, in date order, without duplicates.
+
+        :param timeout: Maximum number of seconds to wait for each shard.
+        :return:
+        """
+        self.request()
+        try:
+            if self.key_columns:
+                missing = [name for name in self.key_columns if name not in self.fieldnames]
+                if missing:
+                    raise KeyError('Unknown key columns: {}'.format(', '.join(missing)))
+                positions = [self.fieldnames.index(name) for name in self.key_columns]
+                key = lambda line: tuple(line[i] if i < len(line) else None for i in positions)
+            else:
+                key = tuple
+            if self.keep_last:
+                # Position of the last occurrence of every row, only the keys are held while reading every shard.
+                last = {}
+                for i, shard in enumerate(self.shards):
+                    for n, line in enumerate(self.shard_rows(shard, timeout)):
+                        last[key(line)] = (i, n)
+                for i, shard in enumerate(self.shards):
+                    for n, line in enumerate(self.shard_rows(shard)):
+                        if last[key(line)] == (i, n):
+                            yield line
+                return
+            seen = set()
+            for shard in self.shards:
+                for line in self.shard_rows(shard, timeout):
+                    k = key(line)
+                    if k in seen:
+                        continue
+                    seen.add(k)
+                    yield line
+        finally:
+            self._downloader.shutdown(wait=False)
+
+    def __iter__(self):
+        return self.rows()
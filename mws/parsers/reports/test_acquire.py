@@ -0,0 +1,69 @@
+import datetime
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.parsers.reports.acquire import ReportAcquirer
+from mws.parsers.reports.requestreport import GetReportList, GetReportRequestList, RequestReportResponse
+
+UTC = datetime.timezone.utc
+
+
+class TestReportAcquirer(TestCase):
+
+    def setUp(self):
+        self.acquirer = ReportAcquirer('access_key', 'secret_key', 'account_id',
+                                       max_staleness=datetime.timedelta(hours=2))
+        self.acquirer.list_quota = self.acquirer.request_list_quota = mock.Mock()
+        self.reports = [mock.Mock(report_id='2', report_request_id='20'),
+                        mock.Mock(report_id='1', report_request_id='10')]
+        self.requests = [
+            mock.Mock(report_request_id='20', start_date=datetime.datetime(2017, 1, 2, tzinfo=UTC),
+                      end_date=datetime.datetime(2017, 1, 3, tzinfo=UTC)),
+            mock.Mock(report_request_id='10', start_date=datetime.datetime(2017, 1, 1, tzinfo=UTC),
+                      end_date=datetime.datetime(2017, 1, 3, tzinfo=UTC)),
+        ]
+
+    def patch(self, reports):
+        list_request = mock.patch.object(GetReportList, 'request',
+                                         return_value=mock.Mock(report_info_list=reports))
+        request_list_request = mock.patch.object(GetReportRequestList, 'request',
+                                                 return_value=mock.Mock(get_report_request_list=self.requests))
+        return list_request, request_list_request
+
+    def test_most_recent_report(self):
+        list_request, request_list_request = self.patch(self.reports)
+        now = datetime.datetime(2017, 1, 3, 12)
+        with list_request as get_report_list, request_list_request as get_report_request_list:
+            self.assertEqual(self.acquirer.find('_T_', now=now).report_id, '2')
+        self.assertEqual(get_report_list.call_args[1]['fromdate'], datetime.datetime(2017, 1, 3, 10))
+        self.assertFalse(get_report_request_list.called)
+
+    def test_date_range_coverage(self):
+        list_request, request_list_request = self.patch(self.reports)
+        with list_request, request_list_request:
+            self.assertEqual(self.acquirer.find('_T_', datetime.datetime(2017, 1, 2, 6)).report_id, '2')
+            self.assertEqual(self.acquirer.find('_T_', datetime.datetime(2017, 1, 1)).report_id, '1')
+            self.assertIsNone(self.acquirer.find('_T_', datetime.datetime(2016, 12, 31)))
+            self.assertIsNone(self.acquirer.find('_T_', end_date=datetime.datetime(2017, 1, 4)))
+
+    def test_falls_back_to_request_report(self):
+        list_request, request_list_request = self.patch([])
+        response = mock.Mock(report_request_id='30')
+        response.wait.return_value = '3'
+        with list_request, request_list_request, \
+                mock.patch.object(RequestReportResponse, 'request', return_value=response) as request_report:
+            self.assertEqual(self.acquirer.acquire('_T_'), '3')
+        self.assertEqual(request_report.call_count, 1)
+
+    def test_marketplaces_always_requested(self):
+        list_request, request_list_request = self.patch(self.reports)
+        response = mock.Mock(report_request_id='30')
+        response.wait.return_value = '3'
+        with list_request as get_report_list, request_list_request, \
+                mock.patch.object(RequestReportResponse, 'request', return_value=response):
+            self.assertEqual(self.acquirer.acquire('_T_', marketplace_ids=('A1PA6795UKMFR9',)), '3')
+        self.assertFalse(get_report_list.called)
@@ -0,0 +1,61 @@
+import datetime
+from unittest import TestCase
+
+from mws.parsers.reports.columns import StringColumn
+from mws.parsers.reports.flatfile import FlatFileReader
+
+
+class TestReportFrame(TestCase):
+    contents = b'seller-sku\tprice\tquantity\topen-date\tfulfillment-channel\n' \
+               b'SKU-1\t12.50\t3\t2016-01-05T13:25:10+00:00\tDEFAULT\n' \
+               b'SKU-2\t4\t\t\tAMAZON_NA\n' \
+               b'SKU-3\t1.25\t7\t2016-01-06 08:00:00 PST\tDEFAULT\n'
+
+    def frame(self, columns=None):
+        return FlatFileReader(self.contents, '_GET_MERCHANT_LISTINGS_ALL_DATA_').to_columns(columns)
+
+    def test_columns(self):
+        frame = self.frame()
+        self.assertEqual(len(frame), 3)
+        self.assertEqual(list(frame['price']), [12.5, 4.0, 1.25])
+        quantity = list(frame['quantity'])
+        self.assertEqual(quantity[::2], [3, 7])
+        self.assertNotEqual(quantity[1], quantity[1])  # NaN
+        self.assertEqual(frame['open-date'][0], datetime.datetime(2016, 1, 5, 13, 25, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(frame['open-date'][2], datetime.datetime(2016, 1, 6, 16, tzinfo=datetime.timezone.utc))
+        self.assertIsNone(frame['open-date'][1])
+        channel = frame['fulfillment-channel']
+        self.assertTrue(channel.is_categorical)
+        self.assertEqual(channel.categories, ['DEFAULT', 'AMAZON_NA'])
+        self.assertEqual(list(channel), ['DEFAULT', 'AMAZON_NA', 'DEFAULT'])
+
+    def test_offset_as_typed_lines(self):
+        reader = FlatFileReader(self.contents, '_GET_MERCHANT_LISTINGS_ALL_DATA_', typed=True)
+        reader._offset = datetime.timedelta(hours=-2)
+        dates = [line[3] for line in reader]
+        reader = FlatFileReader(self.contents, '_GET_MERCHANT_LISTINGS_ALL_DATA_')
+        reader._offset = datetime.timedelta(hours=-2)
+        frame = reader.to_columns(['open-date'])
+        self.assertEqual(frame['open-date'][0], dates[0])
+        self.assertEqual(frame['open-date'][0], datetime.datetime(2016, 1, 5, 15, 25, 10, tzinfo=datetime.timezone.utc))
+        self.assertEqual(frame['open-date'][2], dates[2])
+        self.assertIsNone(frame['open-date'][1])
+
+    def test_projection(self):
+        frame = self.frame(['quantity', 'seller-sku'])
+        self.assertEqual(list(frame), ['quantity', 'seller-sku'])
+        self.assertRaises(KeyError, self.frame, ['missing'])
+
+    def test_extend(self):
+        frame = self.frame()
+        frame.extend(self.frame())
+        self.assertEqual(len(frame), 6)
+        self.assertEqual(frame['fulfillment-channel'].categories, ['DEFAULT', 'AMAZON_NA'])
+        self.assertEqual(list(frame['seller-sku'])[3:], ['SKU-1', 'SKU-2', 'SKU-3'])
+
+    def test_too_many_categories(self):
+        column = StringColumn(max_categories=2)
+        for value in ('a', 'b', 'a', 'c'):
+            column.append(value)
+        self.assertFalse(column.is_categorical)
+        self.assertEqual(list(column), ['a', 'b', 'a', 'c'])
@@ -0,0 +1,84 @@
+import datetime
+import io
+import os
+import tempfile
+from decimal import Decimal
+from unittest import TestCase
+
+from dateutil.tz import tzoffset
+
+from mws.parsers.reports.flatfile import FlatFileReader, FlatFileWrapper
+
+
+class TestFlatFileReader(TestCase):
+    contents = u'sku\tprice\titem-name\r\nSKU-1\t12.50\t"Tab\tin name"\r\nSKU-2\t3\tCafé 12" ruler\r\n'
+    expected = [('SKU-1', '12.50', 'Tab\tin name'), ('SKU-2', '3', u'Café 12" ruler')]
+
+    def encoded(self):
+        return self.contents.encode('windows-1252')
+
+    def test_bytes(self):
+        reader = FlatFileReader(self.encoded())
+        self.assertEqual(reader.fieldnames, ['sku', 'price', 'item-name'])
+        self.assertEqual(list(reader), self.expected)
+
+    def test_chunks(self):
+        data = self.encoded()
+        chunks = (data[i:i + 5] for i in range(0, len(data), 5))
+        self.assertEqual(list(FlatFileReader(chunks)), self.expected)
+
+    def test_path(self):
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.encoded())
+            with FlatFileReader(path) as reader:
+                self.assertEqual(list(reader), self.expected)
+        finally:
+            os.remove(path)
+
+    def test_file_objects_left_open(self):
+        binary = io.BytesIO(self.encoded())
+        self.assertEqual(list(FlatFileReader(binary)), self.expected)
+        self.assertFalse(binary.closed)
+        text = io.StringIO(self.contents)
+        self.assertEqual(list(FlatFileReader(text)), self.expected)
+        self.assertFalse(text.closed)
+
+    def test_convert_numerical(self):
+        rows = list(FlatFileReader(self.encoded(), convert_numerical=True))
+        self.assertEqual(rows[0][1], 12.5)
+        self.assertEqual(rows[1][1], 3)
+
+
+class TestFlatFileWrapper(TestCase):
+
+    def test_lines_restart(self):
+        wrapper = FlatFileWrapper('a\tb\n1\t\n2\t3\n')
+        self.assertEqual(wrapper.headers, 'a\tb')
+        self.assertEqual(list(wrapper.lines()), [('1', None), ('2', '3')])
+        self.assertEqual(list(wrapper), [('1', None), ('2', '3')])
+        self.assertEqual(str(wrapper), 'a\tb\n1\t\n2\t3\n')
+
+
+class TestTypedFlatFileReader(TestCase):
+    contents = b'seller-sku\tprice\tquantity\topen-date\tproduct-id\n' \
+               b'SKU-1\t12.50\t3\t2016-01-05 13:25:10 PST\t0123456\n' \
+               b'SKU-2\t\t0\t2016-01-06T08:00:00+00:00\t0654321\n'
+
+    def test_registered_schema(self):
+        reader = FlatFileReader(self.contents, '_GET_MERCHANT_LISTINGS_ALL_DATA_', typed=True)
+        rows = list(reader)
+        offset = reader.utc_offset
+        self.assertEqual(rows[0][:3], ('SKU-1', Decimal('12.50'), 3))
+        self.assertEqual(rows[0][3], datetime.datetime(2016, 1, 5, 13, 25, 10, tzinfo=tzoffset('PST', -28800)) - offset)
+        self.assertEqual(rows[1][1:3], (None, 0))
+        self.assertEqual(rows[1][3], datetime.datetime(2016, 1, 6, 8, tzinfo=datetime.timezone.utc) - offset)
+        self.assertEqual(rows[0][4], '0123456')
+
+    def test_inferred_schema(self):
+        reader = FlatFileReader(self.contents, '_UNKNOWN_', typed=True)
+        rows = list(reader)
+        self.assertEqual(reader.schema, {'seller-sku': 'str', 'price': 'decimal', 'quantity': 'int',
+                                         'open-date': 'date', 'product-id': 'str'})
+        self.assertEqual(rows[1][2], 0)
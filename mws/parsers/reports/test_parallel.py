@@ -0,0 +1,44 @@
+import os
+from unittest import TestCase
+
+from mws.parsers.reports.flatfile import FlatFileReader
+from mws.parsers.reports.parallel import ParallelFlatFileReader, split_ranges
+
+
+class TestParallelFlatFileReader(TestCase):
+    header = b'seller-sku\tprice\tquantity\topen-date\tfulfillment-channel\n'
+    row = b'SKU-%d\t%d.99\t%d\t2016-01-05 13:25:10 PST\t%s\n'
+
+    def setUp(self):
+        self.contents = self.header + b''.join(
+            self.row % (i, i, i % 7, b'DEFAULT' if i % 3 else b'AMAZON_NA') for i in range(500))
+
+    def reader(self, **kwargs):
+        return ParallelFlatFileReader(self.contents, '_GET_MERCHANT_LISTINGS_ALL_DATA_', workers=2, chunk_size=1000,
+                                      **kwargs)
+
+    def test_split_ranges(self):
+        with self.reader() as reader:
+            ranges = reader.ranges()
+            self.assertGreater(len(ranges), 5)
+            self.assertEqual(ranges[0][0], len(self.header))
+            self.assertEqual(ranges[-1][1], len(self.contents))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+                self.assertEqual(self.contents[end - 1:end], b'\n')
+            self.assertEqual(split_ranges(reader.path, len(self.contents), 1000), [])
+
+    def test_lines_in_order(self):
+        expected = list(FlatFileReader(self.contents, '_GET_MERCHANT_LISTINGS_ALL_DATA_', typed=True))
+        with self.reader() as reader:
+            self.assertEqual(list(reader), expected)
+            path = reader.path
+        self.assertFalse(os.path.exists(path))
+
+    def test_to_columns(self):
+        with self.reader() as reader:
+            frame = reader.to_columns(['seller-sku', 'quantity', 'fulfillment-channel'])
+        self.assertEqual(len(frame), 500)
+        self.assertEqual(frame['seller-sku'][499], 'SKU-499')
+        self.assertEqual(list(frame['quantity'])[:8], [0, 1, 2, 3, 4, 5, 6, 0])
+        self.assertEqual(frame['fulfillment-channel'].categories, ['AMAZON_NA', 'DEFAULT'])
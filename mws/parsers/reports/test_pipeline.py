@@ -0,0 +1,166 @@
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.parsers.reports.pipeline import ReportPipeline
+from mws.parsers.reports.requestreport import RequestReportResponse
+
+CONTENTS = b'sku\tquantity\nSKU-1\t1\nSKU-2\t2\n'
+
+
+class FakeWatcher(object):
+    """
+    Resolves the watched report requests with the status of their report type, or leaves them pending.
+    """
+
+    def __init__(self, statuses=None, pending=False):
+        self.statuses = statuses or {}
+        self.pending = pending
+        self.futures = {}
+
+    def watch(self, report_request_id, report_type=None, callback=None):
+        future = self.futures[report_request_id] = Future()
+        future.add_done_callback(callback)
+        if not self.pending:
+            self.resolve(report_request_id, self.statuses.get(report_type, '_DONE_'))
+        return future
+
+    def resolve(self, report_request_id, status='_DONE_'):
+        self.futures[report_request_id].set_result(mock.Mock(
+            report_processing_status=status, generated_report_id='report-' + report_request_id))
+
+
+class TestReportPipeline(TestCase):
+
+    def setUp(self):
+        self.watcher = FakeWatcher()
+        self.pipeline = ReportPipeline('access_key', 'secret_key', 'account_id', watcher=self.watcher)
+        self.pipeline.api = mock.Mock(report_store=None)
+        self.pipeline.api.get_report.return_value = mock.Mock(original=CONTENTS)
+        for quota in ('request_quota', 'download_quota', 'ack_quota'):
+            setattr(self.pipeline, quota, mock.Mock())
+        self.report_request_ids = itertools.count(1)
+        patcher = mock.patch.object(RequestReportResponse, 'request', side_effect=self.request)
+        self.request_report = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, access_key, secret_key, account_id, report_type, *args):
+        if report_type == '_FAILING_':
+            raise IOError('connection reset')
+        return mock.Mock(report_request_id=str(next(self.report_request_ids)))
+
+    def run_pipeline(self):
+        """
+        Collect the completed jobs, failing instead of hanging if the pipeline never completes them.
+        """
+        jobs = []
+        thread = threading.Thread(target=lambda: jobs.extend(self.pipeline.run()))
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), 'pipeline hangs')
+        return jobs
+
+    def acknowledged(self):
+        return [c[1]['report_ids'] for c in self.pipeline.api.update_report_acknowledgements.call_args_list]
+
+    def test_success(self):
+        for marketplace_id in ('A1', 'A2', 'A3'):
+            self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_', (marketplace_id,))
+        jobs = self.run_pipeline()
+        self.assertEqual(len(jobs), 3)
+        self.assertTrue(all(job.ok for job in jobs))
+        self.assertEqual(jobs[0].result, [('SKU-1', '1'), ('SKU-2', '2')])
+        self.assertIsNone(jobs[0].contents)
+        self.assertTrue(all(job.acknowledged for job in jobs))
+        self.assertEqual(sorted(self.acknowledged()[0]), ['report-1', 'report-2', 'report-3'])
+        self.assertEqual(sorted(call[0][0] for call in self.pipeline.api.get_report.call_args_list),
+                         ['report-1', 'report-2', 'report-3'])
+
+    def test_done_no_data(self):
+        self.watcher.statuses['_GET_AFN_INVENTORY_DATA_'] = '_DONE_NO_DATA_'
+        self.watcher.statuses['_GET_MERCHANT_LISTINGS_DATA_'] = '_CANCELLED_'
+        empty = self.pipeline.add('_GET_AFN_INVENTORY_DATA_')
+        cancelled = self.pipeline.add('_GET_MERCHANT_LISTINGS_DATA_')
+        self.run_pipeline()
+        self.assertTrue(empty.ok)
+        self.assertIsNone(empty.result)
+        self.assertIsInstance(cancelled.error, ValueError)
+        self.pipeline.api.get_report.assert_not_called()
+        self.assertEqual(self.acknowledged(), [])
+
+    def test_request_failed(self):
+        failing = self.pipeline.add('_FAILING_')
+        job = self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        self.run_pipeline()
+        self.assertIsInstance(failing.error, IOError)
+        self.assertTrue(job.ok)
+
+    def test_watch_failed(self):
+        self.watcher.watch = mock.Mock(side_effect=RuntimeError('ReportRequestWatcher is stopped'))
+        job = self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        self.run_pipeline()
+        self.assertIsInstance(job.error, RuntimeError)
+
+    def test_download_failed(self):
+        self.pipeline.api.get_report.side_effect = [IOError('connection reset'), mock.Mock(original=CONTENTS)]
+        jobs = [self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_', (m,)) for m in ('A1', 'A2')]
+        self.run_pipeline()
+        self.assertEqual(sorted(job.ok for job in jobs), [False, True])
+        self.assertEqual(len(self.acknowledged()[0]), 1)
+
+    def test_parse_failed(self):
+        self.pipeline.parser = mock.Mock(side_effect=ValueError('not a flat file'))
+        job = self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        self.run_pipeline()
+        self.assertIsInstance(job.error, ValueError)
+        self.assertFalse(job.acknowledged)
+
+    def test_acknowledgement_failed(self):
+        self.pipeline.ACK_BATCH_SIZE = 1
+        self.pipeline._acknowledge = mock.Mock(side_effect=IOError('connection reset'))
+        job = self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        self.run_pipeline()
+        self.assertIsInstance(job.error, IOError)
+
+    def test_acknowledgement_batches(self):
+        self.pipeline.ACK_BATCH_SIZE = 2
+        for marketplace_id in ('A1', 'A2', 'A3', 'A4', 'A5'):
+            self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_', (marketplace_id,))
+        self.run_pipeline()
+        self.assertEqual(sorted(len(batch) for batch in self.acknowledged()), [1, 2, 2])
+        self.assertEqual(sorted(i for batch in self.acknowledged() for i in batch),
+                         ['report-%d' % i for i in range(1, 6)])
+
+    def test_acknowledge_disabled(self):
+        self.pipeline.acknowledge = False
+        job = self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        self.run_pipeline()
+        self.assertTrue(job.ok)
+        self.assertEqual(self.acknowledged(), [])
+
+    def test_stop_iterating(self):
+        self.watcher.pending = True
+        for marketplace_id in ('A1', 'A2', 'A3'):
+            self.pipeline.add('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_', (marketplace_id,))
+        run = self.pipeline.run()
+
+        def resolve_first():
+            while len(self.watcher.futures) < 3:
+                time.sleep(0.01)
+            self.watcher.resolve('1')
+        threading.Thread(target=resolve_first).start()
+        job = next(run)
+        self.assertEqual(job.report_id, 'report-1')
+        run.close()
+        self.assertTrue(self.watcher.futures['2'].cancelled())
+        self.assertTrue(self.watcher.futures['3'].cancelled())
+        self.assertEqual(self.pipeline.api.get_report.call_count, 1)
+        self.assertEqual(self.acknowledged(), [['report-1']])
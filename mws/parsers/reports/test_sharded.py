@@ -0,0 +1,88 @@
+import datetime
+from concurrent.futures import Future
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws import DataWrapper, Reports
+from mws.parsers.reports.requestreport import RequestReportResponse
+from mws.parsers.reports.sharded import split_date_range
+
+
+class FakeWatcher(object):
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    def watch(self, report_request_id, report_type=None, callback=None):
+        future = Future()
+        future.add_done_callback(callback)
+        status = self.statuses.pop(report_request_id, '_DONE_')
+        future.set_result(mock.Mock(report_processing_status=status, generated_report_id='report-' + report_request_id))
+        return future
+
+
+class TestShardedReportRequest(TestCase):
+    header = b'amazon-order-id\tsku\tquantity\n'
+    contents = {
+        'report-0': header + b'1\tA\t1\n2\tA\t1\n',
+        'report-1': header + b'2\tA\t1\n2\tB\t2\n3\tA\t1\n',
+        'report-3': b'sku\tamazon-order-id\textra\tquantity\n' + b'C\t4\tx\t5\n',
+    }
+
+    def test_split_date_range(self):
+        start = datetime.datetime(2017, 1, 1)
+        self.assertEqual(split_date_range(start, start + datetime.timedelta(days=10), datetime.timedelta(days=4)), [
+            (start, start + datetime.timedelta(days=4)),
+            (start + datetime.timedelta(days=4), start + datetime.timedelta(days=8)),
+            (start + datetime.timedelta(days=8), start + datetime.timedelta(days=10)),
+        ])
+
+    def test_merged_rows(self):
+        request_ids = iter(['0', '1', '2', 'cancelled', '3'])
+
+        def request_report(*args):
+            return mock.Mock(report_request_id=next(request_ids))
+
+        def get_report(self, report_id, stream=False):
+            return DataWrapper(TestShardedReportRequest.contents[report_id], {})
+
+        start = datetime.datetime(2017, 1, 1)
+        with mock.patch.object(RequestReportResponse, 'request', side_effect=request_report) as request, \
+                mock.patch.object(Reports, 'get_report', get_report):
+            report = RequestReportResponse.request_sharded(
+                'access_key', 'secret_key', 'account_id', '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_',
+                start, start + datetime.timedelta(days=4), datetime.timedelta(days=1), request_workers=1,
+                watcher=FakeWatcher({'2': '_DONE_NO_DATA_', 'cancelled': '_CANCELLED_'}))
+            rows = list(report)
+        self.assertEqual(request.call_count, 5)
+        self.assertEqual(request.call_args_list[1][0][4:6], (start + datetime.timedelta(days=1),
+                                                             start + datetime.timedelta(days=2)))
+        self.assertEqual(report.fieldnames, ['amazon-order-id', 'sku', 'quantity'])
+        self.assertEqual(rows, [('1', 'A', '1'), ('2', 'A', '1'), ('2', 'B', '2'), ('3', 'A', '1'), ('4', 'C', '5')])
+
+    def test_last_update_keeps_latest_rows(self):
+        contents = {
+            'report-0': self.header + b'1\tA\t1\n2\tA\t1\n',
+            'report-1': self.header + b'2\tA\t0\n3\tA\t1\n',
+            'report-2': self.header + b'1\tA\t0\n',
+        }
+        request_ids = iter(['0', '1', '2'])
+
+        def get_report(self, report_id, stream=False):
+            return DataWrapper(contents[report_id], {})
+
+        start = datetime.datetime(2017, 1, 1)
+        with mock.patch.object(RequestReportResponse, 'request',
+                               side_effect=lambda *args: mock.Mock(report_request_id=next(request_ids))), \
+                mock.patch.object(Reports, 'get_report', get_report):
+            report = RequestReportResponse.request_sharded(
+                'access_key', 'secret_key', 'account_id', '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_',
+                start, start + datetime.timedelta(days=3), datetime.timedelta(days=1), request_workers=1,
+                watcher=FakeWatcher({}))
+            rows = list(report)
+        # Orders updated in a later shard are yielded with their latest row, in the position of that shard.
+        self.assertEqual(rows, [('2', 'A', '0'), ('3', 'A', '1'), ('1', 'A', '0')])
@@ -0,0 +1,91 @@
+from concurrent.futures import Future, TimeoutError
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.parsers.feeds.watcher import FeedSubmissionWatcher
+from mws.parsers.reports.requestreport import GetReportRequestList, RequestReportResponse
+from mws.parsers.reports.watcher import ReportRequestWatcher
+from mws.testing import fixtures
+
+
+class TestReportRequestWatcher(TestCase):
+
+    def setUp(self):
+        self.watcher = ReportRequestWatcher('access_key', 'secret_key', 'account_id', quota=mock.Mock())
+        self.addCleanup(self.watcher.stop)
+
+    def test_poll(self):
+        response = GetReportRequestList.load(fixtures.get_report_request_list(
+            [('2291326454', fixtures.LISTINGS_REPORT), ('2291326455', fixtures.ORDERS_REPORT)]))
+        with mock.patch.object(GetReportRequestList, 'request', return_value=response) as request:
+            infos = self.watcher.poll(['2291326454', '2291326455'])
+        self.assertEqual(request.call_args[1]['report_request_ids'], ['2291326454', '2291326455'])
+        self.assertEqual(request.call_args[1]['max_count'], 2)
+        self.assertEqual(self.watcher.status_of(infos['2291326454']), '_DONE_')
+        self.assertEqual(self.watcher.kind_of(infos['2291326455']), fixtures.ORDERS_REPORT)
+        self.assertEqual(infos['2291326455'].generated_report_id, fixtures.report_id_for('2291326455'))
+
+    def test_interval_cap(self):
+        self.assertEqual(self.watcher.interval_cap('_GET_FLAT_FILE_OPEN_LISTINGS_DATA_'), 15)
+        self.assertEqual(self.watcher.interval_cap('_GET_FBA_ESTIMATED_FBA_FEES_TXT_DATA_'), 300)
+        self.assertEqual(self.watcher.interval_cap(None), 30)
+
+
+class TestSharedWatcher(TestCase):
+
+    def test_shared(self):
+        watcher = ReportRequestWatcher.shared('access_key', 'secret_key', 'account_id')
+        self.addCleanup(watcher.stop)
+        self.assertIs(ReportRequestWatcher.shared('access_key', 'secret_key', 'account_id'), watcher)
+        self.assertIsNot(ReportRequestWatcher.shared('access_key', 'secret_key', 'other_account'), watcher)
+        ReportRequestWatcher.shared('access_key', 'secret_key', 'other_account').stop()
+        # Feed submissions are polled by their own watcher.
+        feed_watcher = FeedSubmissionWatcher.shared('access_key', 'secret_key', 'account_id')
+        self.addCleanup(feed_watcher.stop)
+        self.assertIsInstance(feed_watcher, FeedSubmissionWatcher)
+        self.assertIs(ReportRequestWatcher.shared('access_key', 'secret_key', 'account_id'), watcher)
+
+    def test_stopped_watcher_is_replaced(self):
+        watcher = ReportRequestWatcher.shared('access_key', 'secret_key', 'account_id')
+        watcher.stop()
+        replacement = ReportRequestWatcher.shared('access_key', 'secret_key', 'account_id')
+        self.addCleanup(replacement.stop)
+        self.assertIsNot(replacement, watcher)
+        # A watcher created by hand doesn't evict the shared one when stopped.
+        ReportRequestWatcher('access_key', 'secret_key', 'account_id').stop()
+        self.assertIs(ReportRequestWatcher.shared('access_key', 'secret_key', 'account_id'), replacement)
+
+
+class TestRequestReportResponseWait(TestCase):
+
+    def setUp(self):
+        self.response = RequestReportResponse.load(fixtures.request_report('2291326454', fixtures.LISTINGS_REPORT),
+                                                   'access_key', 'secret_key', 'account_id')
+        self.watcher = mock.Mock()
+        patcher = mock.patch.object(ReportRequestWatcher, 'shared', return_value=self.watcher)
+        self.shared = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def watch(self, status):
+        future = Future()
+        future.set_result(mock.Mock(report_processing_status=status,
+                                    generated_report_id=fixtures.report_id_for('2291326454')))
+        self.watcher.watch.return_value = future
+
+    def test_done(self):
+        self.watch('_DONE_')
+        self.assertEqual(self.response.wait(), fixtures.report_id_for('2291326454'))
+        self.shared.assert_called_once_with('access_key', 'secret_key', 'account_id', None)
+        self.watcher.watch.assert_called_once_with('2291326454', fixtures.LISTINGS_REPORT)
+
+    def test_cancelled(self):
+        self.watch('_CANCELLED_')
+        self.assertRaises(ValueError, self.response.wait)
+
+    def test_timeout(self):
+        self.watcher.watch.return_value = Future()
+        self.assertRaises(TimeoutError, self.response.wait, 0.01)
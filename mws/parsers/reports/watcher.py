@@ -0,0 +1,61 @@
+from mws.polling import CredentialsPoller
+from .requestreport import GetReportRequestList
+
+
+class ReportRequestWatcher(CredentialsPoller):
+    """
+    Watches many report requests at once with batched GetReportRequestList calls.
+
+    Usage:
+        >>> watcher = ReportRequestWatcher('access_key', 'secret_key', 'account_id')
+        >>> future = watcher.watch(report_request_id, '_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        >>> info = future.result()
+        >>> print info.report_processing_status, info.generated_report_id
+    """
+
+    POLL_ACTION = 'GetReportRequestList'
+
+    TERMINAL_STATUSES = frozenset(['_DONE_', '_CANCELLED_', '_DONE_NO_DATA_'])
+
+    # Rough time in seconds Amazon takes to generate each report type.
+    EXPECTED_DURATIONS = {
+        '_GET_FLAT_FILE_OPEN_LISTINGS_DATA_': 60,
+        '_GET_MERCHANT_LISTINGS_DATA_': 120,
+        '_GET_MERCHANT_LISTINGS_ALL_DATA_': 300,
+        '_GET_MERCHANT_LISTINGS_INACTIVE_DATA_': 120,
+        '_GET_AFN_INVENTORY_DATA_': 120,
+        '_GET_FBA_MYI_UNSUPPRESSED_INVENTORY_DATA_': 300,
+        '_GET_FBA_MYI_ALL_INVENTORY_DATA_': 300,
+        '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_': 300,
+        '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_': 300,
+        '_GET_FLAT_FILE_ACTIONABLE_ORDER_DATA_': 120,
+        '_GET_AMAZON_FULFILLED_SHIPMENTS_DATA_': 900,
+        '_GET_FBA_FULFILLMENT_CUSTOMER_RETURNS_DATA_': 600,
+        '_GET_FBA_ESTIMATED_FBA_FEES_TXT_DATA_': 1800,
+        '_GET_V2_SETTLEMENT_REPORT_DATA_FLAT_FILE_': 60,
+    }
+
+    _shared = {}
+
+    def watch(self, report_request_id, report_type=None, callback=None):
+        """
+        Start watching a report request.
+
+        :param report_request_id: The ReportRequestId returned by RequestReport.
+        :param report_type: The report enumeration value, used to pick the polling interval.
+        :param callback: Optional callable, called with the future once the report is completed.
+        :return: Future resolved with the `ReportRequestInfo` once the report is _DONE_, _CANCELLED_ or _DONE_NO_DATA_
+        """
+        return self.register(report_request_id, report_type, callback)
+
+    def poll(self, job_ids):
+        response = GetReportRequestList.request(self.mws_access_key, self.mws_secret_key, self.mws_account_id,
+                                                mws_auth_token=self.mws_auth_token, max_count=len(job_ids),
+                                                report_request_ids=job_ids)
+        return {info.report_request_id: info for info in response.get_report_request_list}
+
+    def status_of(self, info):
+        return info.report_processing_status
+
+    def kind_of(self, info):
+        return info.report_type
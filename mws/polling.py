@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Background polling of asynchronous MWS jobs (report requests, feed submissions).
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from .quota import QuotaBucket, is_throttled
+
+
+class PolledJob(object):
+    """
+    Book keeping for a single job registered with a `BatchStatusPoller`.
+    """
+
+    def __init__(self, job_id, kind, interval, next_poll):
+        self.job_id = job_id
+        self.kind = kind
+        self.interval = interval
+        self.next_poll = next_poll
+        self.errors = 0
+        self.future = Future()
+
+
+class BatchStatusPoller(object):
+    """
+    Base class for a background thread which polls the status of many jobs together.
+
+    Jobs are registered by id and polled in batches of up to `BATCH_SIZE` ids per call. Every job is polled
+    quickly at first and then backs off up to an interval depending on how long that kind of job usually takes.
+    Whenever a job is due, the batch is topped up with the other pending jobs since they are polled for free.
+    Once a job reaches one of the `TERMINAL_STATUSES` its future is resolved with `resolve`.
+
+    Subclasses must implement `poll` and `status_of`.
+    """
+
+    # Maximum number of ids per status call.
+    BATCH_SIZE = 100
+
+    # Seconds before the first poll of a job.
+    INITIAL_INTERVAL = 5
+
+    # Upper bound for the interval between two polls of a job.
+    MAX_INTERVAL = 300
+
+    # Multiplier applied to a job's interval after every poll which didn't complete it.
+    BACKOFF = 1.5
+
+    # Expected duration in seconds for each kind of job. The polling interval is capped to a quarter of it.
+    EXPECTED_DURATIONS = {}
+    DEFAULT_EXPECTED_DURATION = 120
+
+    # Seconds to wait before polling again after the status call was throttled.
+    THROTTLE_DELAY = 45
+
+    # Consecutive failed status calls tolerated before the jobs of the batch are failed.
+    MAX_RETRIES = 5
+
+    # Seconds the polling thread stays alive without any registered job.
+    IDLE_TIMEOUT = 60
+
+    TERMINAL_STATUSES = frozenset()
+
+    # Action used to check the status, to respect its quota.
+    POLL_ACTION = None
+
+    def __init__(self, batch_size=None, initial_interval=None, max_interval=None, quota=None, clock=time.monotonic):
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.initial_interval = initial_interval or self.INITIAL_INTERVAL
+        self.max_interval = max_interval or self.MAX_INTERVAL
+        if quota is None and self.POLL_ACTION:
+            quota = QuotaBucket.for_action(self.POLL_ACTION)
+        self.quota = quota
+        self._clock = clock
+        self._jobs = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def poll(self, job_ids):
+        """
+        Request the status of a batch of jobs.
+
+        :param job_ids: List of job ids.
+        :return: Dict of job id to status info.
+        """
+        raise NotImplementedError("method `poll` is not implemented")
+
+    def status_of(self, info):
+        """
+        Return the processing status from a status info object returned by `poll`.
+        """
+        raise NotImplementedError("method `status_of` is not implemented")
+
+    def kind_of(self, info):
+        """
+        Return the kind of job (ex. the report type) from a status info object, used to pick the polling interval.
+        """
+        return
+
+    def resolve(self, job, info):
+        """
+        Resolve the future of a job which reached a terminal status. Resolves with the status info by default.
+
+        :param job: The PolledJob.
+        :param info: The status info returned by `poll`.
+        :return:
+        """
+        job.future.set_result(info)
+
+    def interval_cap(self, kind):
+        expected = self.EXPECTED_DURATIONS.get(kind, self.DEFAULT_EXPECTED_DURATION)
+        return min(self.max_interval, max(self.initial_interval, expected / 4.0))
+
+    def register(self, job_id, kind=None, callback=None):
+        """
+        Start watching a job.
+
+        :param job_id: The id of the job.
+        :param kind: The kind of job. (ex. report type)
+        :param callback: Optional callable, called with the future once the job is completed.
+        :return: A `concurrent.futures.Future` resolved once the job reaches a terminal status.
+        """
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError('{} is stopped'.format(self.__class__.__name__))
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = PolledJob(job_id, kind, self.initial_interval, self._clock() + self.initial_interval)
+                self._jobs[job_id] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.__class__.__name__)
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        if callback is not None:
+            job.future.add_done_callback(callback)
+        return job.future
+
+    @property
+    def pending(self):
+        """
+        Ids of the jobs which haven't completed yet.
+        """
+        with self._condition:
+            return list(self._jobs)
+
+    def stop(self, wait=True):
+        """
+        Stop the polling thread. Jobs still pending are cancelled.
+
+        :param wait: Wait for the polling thread to exit.
+        :return:
+        """
+        with self._condition:
+            self._stopped = True
+            thread = self._thread
+            jobs, self._jobs = list(self._jobs.values()), {}
+            self._condition.notify()
+        for job in jobs:
+            job.future.cancel()
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _next_batches(self):
+        """
+        Wait until at least one job is due and return the batches to poll.
+        Must be called with the condition held.
+        """
+        while not self._stopped:
+            # Jobs whose future was cancelled by the caller aren't polled anymore.
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.future.cancelled()]:
+                del self._jobs[job_id]
+            if not self._jobs:
+                self._condition.wait(self.IDLE_TIMEOUT)
+                if not self._jobs:
+                    return
+                continue
+            now = self._clock()
+            jobs = sorted(self._jobs.values(), key=lambda j: j.next_poll)
+            due = sum(1 for j in jobs if j.next_poll <= now)
+            if not due:
+                self._condition.wait(jobs[0].next_poll - now)
+                continue
+            # Fill up the batches the due jobs need with the jobs due next.
+            size = -(-due // self.batch_size) * self.batch_size
+            jobs = jobs[:size]
+            return [jobs[i:i + self.batch_size] for i in range(0, len(jobs), self.batch_size)]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batches = self._next_batches()
+                if not batches:
+                    self._thread = None
+                    return
+            for batch in batches:
+                self._poll_batch(batch)
+
+    def _poll_batch(self, batch):
+        if self.quota is not None:
+            self.quota.acquire()
+        try:
+            infos = self.poll([job.job_id for job in batch])
+        except Exception as e:
+            if is_throttled(e):
+                self.logger.debug('Status request throttled, waiting %ss' % self.THROTTLE_DELAY)
+                if self.quota is not None:
+                    self.quota.drain()
+                with self._condition:
+                    now = self._clock()
+                    for job in batch:
+                        job.next_poll = now + self.THROTTLE_DELAY
+                return
+            self.logger.exception('Status request failed')
+            failed = []
+            with self._condition:
+                now = self._clock()
+                for job in batch:
+                    job.errors += 1
+                    if job.errors > self.MAX_RETRIES:
+                        self._jobs.pop(job.job_id, None)
+                        failed.append(job)
+                    else:
+                        job.next_poll = now + job.interval
+            for job in failed:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            return
+
+        completed = []
+        with self._condition:
+            now = self._clock()
+            for job in batch:
+                job.errors = 0
+                info = infos.get(job.job_id)
+                if info is None:
+                    job.next_poll = now + job.interval
+                    continue
+                if job.kind is None:
+                    job.kind = self.kind_of(info)
+                status = self.status_of(info)
+                self.logger.debug('job_id=%s status=%s' % (job.job_id, status))
+                if status in self.TERMINAL_STATUSES:
+                    self._jobs.pop(job.job_id, None)
+                    completed.append((job, info))
+                else:
+                    job.interval = min(job.interval * self.BACKOFF, self.interval_cap(job.kind))
+                    job.next_poll = now + job.interval
+        # Resolved outside of the lock, the futures' callbacks may register other jobs.
+        for job, info in completed:
+            try:
+                self.resolve(job, info)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+
+
+class CredentialsPoller(BatchStatusPoller):
+    """
+    `BatchStatusPoller` polling with a set of MWS credentials, which can be shared by every caller using the same
+    credentials with `shared`.
+    """
+
+    # Credentials -> shared poller. Subclasses declare their own, so that each kind of poller is shared separately.
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token=None, **kwargs):
+        BatchStatusPoller.__init__(self, **kwargs)
+        self.mws_access_key = mws_access_key
+        self.mws_secret_key = mws_secret_key
+        self.mws_account_id = mws_account_id
+        self.mws_auth_token = mws_auth_token
+
+    @classmethod
+    def shared(cls, mws_access_key, mws_secret_key, mws_account_id, mws_auth_token=None):
+        """
+        Return the poller shared by every caller using the same credentials, so that their jobs are polled together.
+        A stopped poller is replaced by a new one.
+        """
+        key = (mws_access_key, mws_secret_key, mws_account_id, mws_auth_token)
+        with cls._shared_lock:
+            poller = cls._shared.get(key)
+            if poller is None or poller._stopped:
+                poller = cls._shared[key] = cls(mws_access_key, mws_secret_key, mws_account_id, mws_auth_token)
+            return poller
+
+    @property
+    def _shared_key(self):
+        return self.mws_access_key, self.mws_secret_key, self.mws_account_id, self.mws_auth_token
+
+    def stop(self, wait=True):
+        with self._shared_lock:
+            if self._shared.get(self._shared_key) is self:
+                del self._shared[self._shared_key]
+        BatchStatusPoller.stop(self, wait)
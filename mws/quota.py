@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Throttling helpers for the Amazon MWS request quotas.
+
+Every MWS operation is throttled with a leaky bucket: a maximum request quota (the burst size) which is refilled
+at a fixed restore rate. See the "Throttling" section of each API section reference, ie.
+http://docs.developer.amazonservices.com/en_US/orders-2013-09-01/Orders_ListOrders.html
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# How many times `call_within_quota` retries a throttled request before giving up.
+MAX_RETRIES = 5
+
+# Action -> (max request quota, seconds to restore one request)
+QUOTAS = {
+    'GetServiceStatus': (2, 300),
+
+    # Feeds
+    'SubmitFeed': (15, 120),
+    'GetFeedSubmissionList': (10, 45),
+    'GetFeedSubmissionListByNextToken': (30, 2),
+    'GetFeedSubmissionCount': (10, 45),
+    'CancelFeedSubmissions': (10, 45),
+    'GetFeedSubmissionResult': (15, 60),
+
+    # Reports
+    'RequestReport': (15, 60),
+    'GetReportRequestList': (10, 45),
+    'GetReportRequestListByNextToken': (30, 2),
+    'GetReportRequestCount': (10, 45),
+    'GetReportList': (10, 60),
+    'GetReportListByNextToken': (30, 2),
+    'GetReportCount': (10, 45),
+    'GetReport': (15, 60),
+    'GetReportScheduleList': (10, 45),
+    'GetReportScheduleCount': (10, 45),
+    'UpdateReportAcknowledgements': (10, 45),
+
+    # Orders
+    'ListOrders': (6, 60),
+    'ListOrdersByNextToken': (6, 60),
+    'GetOrder': (6, 60),
+    'ListOrderItems': (30, 2),
+    'ListOrderItemsByNextToken': (30, 2),
+
+    # Products
+    'ListMatchingProducts': (20, 5),
+    'GetMatchingProduct': (20, 0.5),
+    'GetMatchingProductForId': (20, 0.2),
+    'GetCompetitivePricingForSKU': (20, 0.1),
+    'GetCompetitivePricingForASIN': (20, 0.1),
+    'GetLowestOfferListingsForSKU': (20, 0.1),
+    'GetLowestOfferListingsForASIN': (20, 0.1),
+    'GetLowestPricedOffersForSKU': (10, 0.2),
+    'GetLowestPricedOffersForASIN': (10, 0.2),
+    'GetMyFeesEstimate': (20, 0.1),
+    'GetMyPriceForSKU': (20, 0.1),
+    'GetMyPriceForASIN': (20, 0.1),
+    'GetProductCategoriesForSKU': (20, 5),
+    'GetProductCategoriesForASIN': (20, 5),
+
+    # Fulfillment
+    'ListInboundShipments': (30, 0.5),
+    'ListInboundShipmentsByNextToken': (30, 0.5),
+    'ListInboundShipmentItems': (30, 0.5),
+    'ListInboundShipmentItemsByNextToken': (30, 0.5),
+    'GetPrepInstructionsForASIN': (30, 0.5),
+    'ListInventorySupply': (30, 0.5),
+    'ListInventorySupplyByNextToken': (30, 0.5),
+    'CreateFulfillmentOrder': (30, 0.5),
+}
+
+# Operations which are throttled together with another operation.
+SHARED_QUOTAS = {
+    'ListOrdersByNextToken': 'ListOrders',
+}
+
+
+def quota_for(action):
+    """
+    Return the (max request quota, restore rate) tuple for an action.
+
+    :param action: The MWS Action name. ex. ListOrders
+    :return:
+    """
+    return QUOTAS[SHARED_QUOTAS.get(action, action)]
+
+
+def is_throttled(error):
+    """
+    Check whether an exception raised by `MWS.make_request` is a throttling error.
+
+    :param error: The exception instance.
+    :return: True if Amazon refused the request because the quota was exhausted.
+    """
+    if getattr(error, 'code', None) == 'RequestThrottled':
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and getattr(response, 'status_code', None) == 503
+
+
+class QuotaBucket(object):
+    """
+    Thread safe client side mirror of an MWS leaky bucket.
+
+    Acquiring a request blocks until the bucket has a request available, so a pool of workers sharing one bucket
+    uses the full burst and then settles at the restore rate instead of being answered with `RequestThrottled`.
+    """
+
+    def __init__(self, max_quota, restore_rate, clock=time.monotonic, sleep=time.sleep):
+        """
+
+        :param max_quota: The maximum request quota (burst size).
+        :param restore_rate: Seconds it takes to restore one request.
+        :param clock: Monotonic clock function.
+        :param sleep: Sleep function.
+        """
+        self.max_quota = max_quota
+        self.restore_rate = restore_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._available = float(max_quota)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_action(cls, action, **kwargs):
+        max_quota, restore_rate = quota_for(action)
+        return cls(max_quota, restore_rate, **kwargs)
+
+    def _refill(self):
+        now = self._clock()
+        if self.restore_rate:
+            self._available = min(self.max_quota, self._available + (now - self._updated) / self.restore_rate)
+        else:
+            self._available = float(self.max_quota)
+        self._updated = now
+
+    @property
+    def remaining(self):
+        """
+        Number of whole requests that can be made right now.
+
+        :return:
+        """
+        with self._lock:
+            self._refill()
+            return int(self._available)
+
+    def try_acquire(self):
+        """
+        Take one request from the bucket without waiting.
+
+        :return: True if a request was available.
+        """
+        with self._lock:
+            self._refill()
+            if self._available >= 1:
+                self._available -= 1
+                return True
+            return False
+
+    def acquire(self):
+        """
+        Take one request from the bucket, blocking until one is restored.
+
+        :return:
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._available >= 1:
+                    self._available -= 1
+                    return
+                wait = (1 - self._available) * self.restore_rate
+            self._sleep(wait)
+
+    def drain(self):
+        """
+        Empty the bucket. Used after Amazon answered with `RequestThrottled` to resynchronise with the server side.
+
+        :return:
+        """
+        with self._lock:
+            self._refill()
+            self._available = 0.0
+
+
+def call_within_quota(quota, f, *args, **kwargs):
+    """
+    Call `f` once the quota allows it, retrying when Amazon throttles the request anyway.
+
+    :param quota: `QuotaBucket` of the action, or None to only retry.
+    :param f: The callable making the request, called with the other arguments.
+    :param max_retries: (Keyword only) How many times a throttled request is retried before giving up.
+    :return: The result of `f`.
+    """
+    max_retries = kwargs.pop('max_retries', MAX_RETRIES)
+    retries = 0
+    while True:
+        if quota is not None:
+            quota.acquire()
+        try:
+            return f(*args, **kwargs)
+        except Exception as e:
+            if not is_throttled(e) or retries >= max_retries:
+                raise
+            retries += 1
+            logger.debug('Request throttled, retry %s of %s' % (retries, max_retries))
+            if quota is not None:
+                quota.drain()
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Local store of downloaded reports.
+
+Reports are immutable once generated, so a report downloaded once never has to be downloaded again. Report
+files are stored by the MD5 of their contents and indexed by ReportId in a SQLite database, along with the report
+metadata returned by GetReportList and GetReportRequestList.
+"""
+import datetime
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+from dateutil import parser
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    report_type TEXT,
+    report_request_id TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    available_date TEXT,
+    acknowledged INTEGER,
+    md5 TEXT,
+    size INTEGER,
+    stored_at REAL,
+    accessed_at REAL
+);
+CREATE INDEX IF NOT EXISTS reports_type_date ON reports (report_type, available_date);
+CREATE INDEX IF NOT EXISTS reports_md5 ON reports (md5);
+"""
+
+METADATA_FIELDS = ('report_type', 'report_request_id', 'start_date', 'end_date', 'available_date', 'acknowledged')
+
+
+def _utc_isoformat(value):
+    """
+    Normalize a datetime, or a datetime string returned by MWS, so that dates sort as strings.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, datetime.datetime):
+        value = parser.parse(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class StoredReport(object):
+    """
+    A report read from the store. Mirrors the `DataWrapper` and `StreamWrapper` returned by `Reports.get_report`.
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    # There is no HTTP response for stored reports.
+    response = None
+
+    def __init__(self, report_id, path, md5, size):
+        self.report_id = report_id
+        self.path = path
+        self.md5 = md5
+        self.size = size
+
+    @property
+    def original(self):
+        with io.open(self.path, 'rb') as f:
+            return f.read()
+
+    @property
+    def parsed(self):
+        return self.original
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        with io.open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                yield chunk
+
+
+class StoringStreamWrapper(object):
+    """
+    Wrap a streamed `GetReport` response so that the report is written to the store while it is read.
+    The report is only stored once it has been read entirely and its hash validated.
+    """
+
+    def __init__(self, wrapper, store, report_id):
+        self.wrapper = wrapper
+        self.store = store
+        self.report_id = report_id
+        self.response = wrapper.response
+
+    def iter_content(self, chunk_size=StoredReport.CHUNK_SIZE):
+        return self.store.write(self.report_id, self.wrapper.iter_content(chunk_size))
+
+    @property
+    def parsed(self):
+        return self.iter_content()
+
+
+class ReportStore(object):
+    """
+    Content addressed report store with a SQLite index.
+
+    Files are stored in `<directory>/objects/<md5[:2]>/<md5>`, so identical reports are only stored once.
+    When `max_size` is set, the least recently used files are evicted once the stored reports exceed it, their
+    metadata being kept.
+
+    The store can be shared by threads and processes.
+
+    Usage:
+        >>> store = ReportStore('/var/cache/mws-reports', max_size=10 * 1024 ** 3)
+        >>> api = Reports('access_key', 'secret_key', 'account_id', report_store=store)
+        >>> api.get_report(report_id).original  # downloaded
+        >>> api.get_report(report_id).original  # read from disk
+    """
+
+    INDEX_NAME = 'index.sqlite'
+
+    def __init__(self, directory, max_size=None, clock=time.time):
+        """
+
+        :param directory: Directory of the store, created if needed.
+        :param max_size: Maximum size in bytes of the stored reports. Unbounded if None.
+        :param clock: Time function used to track when reports were last read.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.clock = clock
+        self.objects = os.path.join(directory, 'objects')
+        os.makedirs(self.objects, exist_ok=True)
+        self.index_path = os.path.join(directory, self.INDEX_NAME)
+        with self._db() as db:
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        db = sqlite3.connect(self.index_path, timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def object_path(self, md5):
+        return os.path.join(self.objects, md5[:2], md5)
+
+    def __contains__(self, report_id):
+        return self.load(report_id, touch=False) is not None
+
+    def load(self, report_id, touch=True):
+        """
+        Return the stored report, or None if it wasn't downloaded or was evicted.
+
+        :param report_id: The ReportId of the report.
+        :param touch: Mark the report as recently used.
+        :return: StoredReport
+        """
+        with self._db() as db:
+            row = db.execute('SELECT md5, size FROM reports WHERE report_id = ? AND md5 IS NOT NULL',
+                             (report_id,)).fetchone()
+            if row is None:
+                return None
+            path = self.object_path(row['md5'])
+            if not os.path.exists(path):
+                db.execute('UPDATE reports SET md5 = NULL, size = NULL WHERE md5 = ?', (row['md5'],))
+                return None
+            if touch:
+                db.execute('UPDATE reports SET accessed_at = ? WHERE report_id = ?', (self.clock(), report_id))
+        return StoredReport(report_id, path, row['md5'], row['size'])
+
+    def get(self, report_id):
+        """
+        Return the contents of a stored report, or None.
+
+        :param report_id: The ReportId of the report.
+        :return: bytes
+        """
+        report = self.load(report_id)
+        if report is None:
+            return None
+        return report.original
+
+    def write(self, report_id, chunks, **metadata):
+        """
+        Generator storing a report while yielding its chunks.
+        The report is stored once `chunks` is exhausted, nothing is stored if it raises.
+
+        :param report_id: The ReportId of the report.
+        :param chunks: Iterator of byte chunks.
+        :param metadata: See `record`.
+        :return:
+        """
+        md = hashlib.md5()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.objects, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    md.update(chunk)
+                    size += len(chunk)
+                    yield chunk
+            md5 = md.hexdigest()
+            path = self.object_path(md5)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        now = self.clock()
+        self.record(report_id, **metadata)
+        with self._db() as db:
+            db.execute('UPDATE reports SET md5 = ?, size = ?, stored_at = ?, accessed_at = ? WHERE report_id = ?',
+                       (md5, size, now, now, report_id))
+        if self.max_size is not None:
+            self.evict(self.max_size)
+
+    def put(self, report_id, contents, **metadata):
+        """
+        Store a report.
+
+        :param report_id: The ReportId of the report.
+        :param contents: Report contents as bytes, or iterator of byte chunks.
+        :param metadata: See `record`.
+        :return: StoredReport
+        """
+        if isinstance(contents, (bytes, bytearray)):
+            contents = (contents,)
+        for _ in self.write(report_id, contents, **metadata):
+            pass
+        return self.load(report_id, touch=False)
+
+    def record(self, report_id, **metadata):
+        """
+        Save the metadata of a report, whether it is downloaded or not. Fields which are None are left unchanged.
+
+        :param report_id: The ReportId of the report.
+        :param metadata: report_type, report_request_id, start_date, end_date, available_date, acknowledged.
+        :return:
+        """
+        unknown = set(metadata) - set(METADATA_FIELDS)
+        if unknown:
+            raise TypeError('Unknown report metadata: {}'.format(', '.join(sorted(unknown))))
+        values = {}
+        for name, value in metadata.items():
+            if value is None:
+                continue
+            if name.endswith('_date'):
+                value = _utc_isoformat(value)
+            elif name == 'acknowledged':
+                value = int(bool(value))
+            values[name] = value
+        with self._db() as db:
+            db.execute('INSERT OR IGNORE INTO reports (report_id) VALUES (?)', (report_id,))
+            if values:
+                db.execute('UPDATE reports SET {} WHERE report_id = ?'.format(
+                    ', '.join('{} = ?'.format(name) for name in values)), list(values.values()) + [report_id])
+
+    def record_report_list(self, report_info_list):
+        """
+        Save the metadata of the reports returned by GetReportList.
+
+        :param report_info_list: List of `ReportInfo`. See `GetReportList.report_info_list`.
+        :return:
+        """
+        for info in report_info_list:
+            self.record(info.report_id, report_type=info.report_type, report_request_id=info.report_request_id,
+                        available_date=info.available_date, acknowledged=info.acknowledged)
+
+    def record_report_requests(self, report_request_list):
+        """
+        Save the metadata of the reports generated for the requests returned by GetReportRequestList.
+
+        :param report_request_list: List of `ReportRequestInfo`. See `GetReportRequestList.get_report_request_list`.
+        :return:
+        """
+        for info in report_request_list:
+            if info.generated_report_id:
+                self.record(info.generated_report_id, report_type=info.report_type,
+                            report_request_id=info.report_request_id, start_date=info.start_date,
+                            end_date=info.end_date, available_date=info.completed_date)
+
+    def most_recent(self, report_type, available_after=None, downloaded=False):
+        """
+        Look up the most recent report of a type from the recorded metadata, without calling MWS.
+
+        :param report_type: The report enumeration value.
+        :param available_after: Ignore reports available before this datetime.
+        :param downloaded: Only consider reports which are in the store.
+        :return: Dict of the report metadata, or None.
+        """
+        query = 'SELECT * FROM reports WHERE report_type = ? AND available_date IS NOT NULL'
+        args = [report_type]
+        if available_after is not None:
+            query += ' AND available_date >= ?'
+            args.append(_utc_isoformat(available_after))
+        if downloaded:
+            query += ' AND md5 IS NOT NULL'
+        query += ' ORDER BY available_date DESC LIMIT 1'
+        with self._db() as db:
+            row = db.execute(query, args).fetchone()
+        return dict(row) if row is not None else None
+
+    def size(self):
+        """
+        Total size in bytes of the stored report files.
+        """
+        with self._db() as db:
+            row = db.execute('SELECT SUM(size) FROM (SELECT MAX(size) AS size FROM reports '
+                             'WHERE md5 IS NOT NULL GROUP BY md5)').fetchone()
+        return row[0] or 0
+
+    def evict(self, max_size):
+        """
+        Remove the least recently used report files until the store is no larger than `max_size`.
+
+        :param max_size: Size in bytes.
+        :return: Number of files removed.
+        """
+        removed = 0
+        with self._db() as db:
+            files = db.execute('SELECT md5, MAX(size) AS size, MAX(accessed_at) AS accessed_at FROM reports '
+                               'WHERE md5 IS NOT NULL GROUP BY md5 ORDER BY accessed_at').fetchall()
+            total = sum(row['size'] for row in files)
+            for row in files:
+                if total <= max_size:
+                    break
+                db.execute('UPDATE reports SET md5 = NULL, size = NULL WHERE md5 = ?', (row['md5'],))
+                try:
+                    os.remove(self.object_path(row['md5']))
+                except OSError:
+                    pass
+                total -= row['size']
+                removed += 1
+        return removed
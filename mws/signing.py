@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Signature Version 2 of the requests. See
+http://docs.developer.amazonservices.com/en_US/dev_guide/DG_ClientLibraries.html#DG_OwnClientLibrary__Signatures
+"""
+import base64
+import hashlib
+import hmac
+import logging
+from urllib.parse import quote
+
+
+class RequestSigner(object):
+    """
+    Signs the requests of one client: a secret key, an endpoint and an API path.
+
+    The HMAC is keyed once, and the `METHOD\\nhost\\nuri\\n` prefix of the string to sign is hashed once per HTTP
+    method. Each request clones that state with `copy()` and only hashes its query string.
+
+    Usage:
+        >>> signer = RequestSigner('secret_key', 'https://mws.amazonservices.com', '/Orders/2013-09-01')
+        >>> signature = signer.sign('POST', canonical_query(params))
+    """
+
+    def __init__(self, secret_key, domain, uri):
+        """
+
+        :param secret_key: The MWS secret key.
+        :param domain: The endpoint, with or without scheme. (ex. https://mws.amazonservices.com)
+        :param uri: The API path. (ex. /Orders/2013-09-01)
+        """
+        self.secret_key = secret_key
+        self.domain = domain
+        self.uri = uri
+        self.host = domain.split('://', 1)[-1].lower()
+        self._keyed = hmac.new(secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+        # HTTP method -> HMAC state after the prefix of the string to sign
+        self._prefixed = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def matches(self, secret_key, domain, uri):
+        """
+        Check whether the signer signs for this key, endpoint and path.
+        """
+        return secret_key == self.secret_key and domain == self.domain and uri == self.uri
+
+    def prefix(self, method):
+        """
+        The start of the string to sign, common to every request made with `method`.
+        """
+        return '{}\n{}\n{}\n'.format(method, self.host, self.uri)
+
+    def digest(self, method, query):
+        """
+        Raw HMAC-SHA256 of the string to sign.
+
+        :param method: The HTTP method.
+        :param query: The canonical query string. (see `canonical_query`)
+        :return: bytes
+        """
+        state = self._prefixed.get(method)
+        if state is None:
+            state = self._keyed.copy()
+            state.update(self.prefix(method).encode('utf-8'))
+            self._prefixed[method] = state
+        state = state.copy()
+        state.update(query.encode('utf-8'))
+        return state.digest()
+
+    def sign(self, method, query):
+        """
+        Sign a request.
+
+        :param method: The HTTP method.
+        :param query: The canonical query string. (see `canonical_query`)
+        :return: The base64 encoded signature, percent encoded.
+        """
+        signature = quote(base64.b64encode(self.digest(method, query)))
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('string to sign:\n    {}'.format('\n    '.join((self.prefix(method) + query).split('&'))))
+            self.logger.debug(signature)
+        return signature
@@ -0,0 +1,72 @@
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws import OutboundShipments, MWSError
+from mws.fulfillment_outbound_shipment import FulfillmentOrder, CreateFulfillmentOrder, CreateFulfillmentOrderItem, \
+    Address
+from mws.quota import QuotaBucket
+
+
+def make_order(i):
+    return FulfillmentOrder(seller_fulfillment_order_id='order-{}'.format(i), displayable_order_id=str(i),
+                            displayable_order_date_time='2017-01-01T00:00:00Z',
+                            destination_address=Address(name='Jane Doe', line_1='1 Main St', city='Seattle'),
+                            items=[CreateFulfillmentOrderItem(seller_sku='SKU-1', seller_fulfillment_order_item_id='1',
+                                                              quantity=2)])
+
+
+class TestFulfillmentOrder(TestCase):
+
+    def test_no_instance_dict(self):
+        order = make_order(1)
+        self.assertFalse(hasattr(order, '__dict__'))
+        self.assertFalse(hasattr(order.destination_address, '__dict__'))
+        self.assertFalse(hasattr(order.items_[0], '__dict__'))
+
+    def test_flattened(self):
+        params = make_order(1).flattened()
+        self.assertEqual(params['SellerFulfillmentOrderId'], 'order-1')
+        self.assertEqual(params['DestinationAddress.Line1'], '1 Main St')
+        self.assertEqual(params['Items.member.1.SellerSKU'], 'SKU-1')
+        self.assertEqual(params['Items.member.1.Quantity'], '2')
+
+    def test_create_fulfillment_order_compatibility(self):
+        order = CreateFulfillmentOrder('access_key', 'secret_key', 'account_id', seller_fulfillment_order_id='order-1',
+                                       displayable_order_id='1')
+        self.assertEqual(order.flattened()['SellerFulfillmentOrderId'], 'order-1')
+        self.assertEqual(order.account_id, 'account_id')
+
+
+class TestCreateFulfillmentOrders(TestCase):
+
+    def setUp(self):
+        self.api = OutboundShipments('access_key', 'secret_key', 'account_id')
+        self.quota = QuotaBucket(30, 0, sleep=mock.Mock())
+
+    def test_create_fulfillment_orders(self):
+        throttled = MWSError('throttled')
+        throttled.code = 'RequestThrottled'
+        failed = MWSError('invalid')
+        responses = {'order-2': [throttled, 'response-2'], 'order-3': [failed]}
+
+        def make_request(data, method):
+            order_id = data['SellerFulfillmentOrderId']
+            result = responses.get(order_id, ['response-' + order_id[-1]]).pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        with mock.patch.object(self.api, 'make_request', side_effect=make_request) as request:
+            results = list(self.api.create_fulfillment_orders((make_order(i) for i in range(5)), max_workers=2,
+                                                              quota=self.quota))
+        self.assertEqual(request.call_count, 6)
+        by_id = {order.seller_fulfillment_order_id: (response, error) for order, response, error in results}
+        self.assertEqual(len(by_id), 5)
+        self.assertEqual(by_id['order-2'], ('response-2', None))
+        self.assertEqual(by_id['order-3'], (None, failed))
+        self.assertEqual(by_id['order-4'], ('response-4', None))
+        self.assertEqual(request.call_args[0][0]['Action'], 'CreateFulfillmentOrder')
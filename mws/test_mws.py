@@ -0,0 +1,88 @@
+import time
+from unittest import TestCase
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws import Orders, MWSError, DictWrapper, DataWrapper, decode_response
+from mws.parsers.errors import ErrorResponse
+
+LIST_ORDERS = b'''<?xml version="1.0"?>
+<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <ListOrdersResult>
+    <CreatedBefore>2017-01-02T00:00:00Z</CreatedBefore>
+    <Orders>
+      <Order><AmazonOrderId>058-1233752-8214740</AmazonOrderId></Order>
+    </Orders>
+  </ListOrdersResult>
+</ListOrdersResponse>'''
+
+ERROR = b'''<?xml version="1.0"?>
+<ErrorResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <Error>
+    <Type>Sender</Type>
+    <Code>RequestThrottled</Code>
+    <Message>Request is throttled</Message>
+  </Error>
+  <RequestID>request-id</RequestID>
+</ErrorResponse>'''
+
+
+class TestPrepareRequest(TestCase):
+
+    def setUp(self):
+        self.api = Orders('access_key', 'secret_key', 'account_id', auth_token='token')
+
+    def test_prepare_request(self):
+        prepared = self.api.prepare_request(dict(Action='ListOrders', MarketplaceId='ATVPDKIKX0DER', Empty=''), 'POST')
+        method, url, headers, body = prepared
+        self.assertEqual(method, 'POST')
+        self.assertEqual(prepared.action, 'ListOrders')
+        self.assertIn('User-Agent', headers)
+        self.assertEqual(body, '')
+        parts = urlsplit(url)
+        self.assertEqual(parts.netloc, 'mws.amazonservices.com')
+        self.assertEqual(parts.path, '/Orders/2013-09-01')
+        query, signature = parts.query.rsplit('&Signature=', 1)
+        self.assertEqual(unquote(signature), self.api.calc_signature('POST', query))
+        params = dict(parse_qsl(query))
+        self.assertEqual(params['MWSAuthToken'], 'token')
+        self.assertNotIn('Empty', params)
+        self.assertFalse(prepared.expired())
+        self.assertTrue(prepared.expired(margin=prepared.VALIDITY))
+        self.assertLessEqual(prepared.expires, time.time() + prepared.VALIDITY)
+
+    def test_make_request(self):
+        response = mock.Mock(status_code=200, headers={}, content=LIST_ORDERS)
+        with mock.patch('mws.transport.request', return_value=response) as request:
+            parsed = self.api.make_request(dict(Action='ListOrders'), 'POST')
+        self.assertEqual(request.call_args[0][0], 'POST')
+        self.assertIs(parsed.response, response)
+        self.assertEqual(parsed.parsed.Orders.Order.AmazonOrderId, '058-1233752-8214740')
+
+        response = mock.Mock(status_code=503, headers={}, content=ERROR)
+        with mock.patch('mws.transport.request', return_value=response):
+            with self.assertRaises(ErrorResponse) as error:
+                self.api.make_request(dict(Action='ListOrders'), 'POST')
+        self.assertEqual(error.exception.code, 'RequestThrottled')
+        self.assertIs(error.exception.response, response)
+
+
+class TestDecodeResponse(TestCase):
+
+    def test_xml(self):
+        parsed = decode_response(200, {}, LIST_ORDERS, 'ListOrders')
+        self.assertIsInstance(parsed, DictWrapper)
+        self.assertEqual(parsed.parsed.CreatedBefore, '2017-01-02T00:00:00Z')
+
+    def test_flat_file(self):
+        parsed = decode_response(200, {'content-md5': 'ymRsi87He5p/pNqW1eaO0g=='}, b'sku\tprice\nA\t1\n')
+        self.assertIsInstance(parsed, DataWrapper)
+        self.assertRaises(MWSError, decode_response, 200, {'content-md5': 'wrong'}, b'sku\tprice\n')
+
+    def test_errors(self):
+        self.assertRaises(ErrorResponse, decode_response, 200, {}, ERROR, 'ListOrders')
+        self.assertRaises(MWSError, decode_response, 500, {}, b'Internal error', 'ListOrders')
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import datetime
+from unittest import TestCase
+
+from mws import Products
+from mws.params import canonical_query, enumerate_param, flatten, quote_value, ENUMERATED
+
+
+class TestParams(TestCase):
+
+    def test_enumerate_param(self):
+        self.assertEqual(enumerate_param('MarketplaceIdList.Id', (123, 345)),
+                         {'MarketplaceIdList.Id.1': 123, 'MarketplaceIdList.Id.2': 345})
+        self.assertEqual(enumerate_param('MarketplaceIdList.Id.', ['A']), {'MarketplaceIdList.Id.1': 'A'})
+        self.assertEqual(enumerate_param('ASINList.ASIN', None), {})
+        self.assertEqual(enumerate_param('List.Request', [{'IdValue': 'B00', 'Empty': ''}]),
+                         {'List.Request.1.IdValue': 'B00'})
+
+    def test_flatten(self):
+        params = flatten({'Items': [{'SellerSKU': 'sku-1', 'PerUnitPrice': {'Value': 1, 'CurrencyCode': 'USD'}}],
+                          'Comment': '', 'Emails': ('a@b.c',)})
+        self.assertEqual(params, {'Items.member.1.SellerSKU': 'sku-1', 'Items.member.1.PerUnitPrice.Value': 1,
+                                  'Items.member.1.PerUnitPrice.CurrencyCode': 'USD', 'Emails.member.1': 'a@b.c'})
+        self.assertEqual(flatten({'Ids': ['1']}, 'List', ENUMERATED), {'List.Ids.1': '1'})
+
+    def test_canonical_query(self):
+        query = canonical_query({'b': 'x y', 'a': 'é/~', 'Timestamp': datetime.datetime(2017, 1, 2, 3, 4, 5),
+                                 'Quantity': 2})
+        self.assertEqual(query, 'Quantity=2&Timestamp=2017-01-02T03%3A04%3A05Z&a=%C3%A9%2F~&b=x%20y')
+        self.assertEqual(quote_value('Az09-_.~'), 'Az09-_.~')
+
+    def test_fees_estimate_request(self):
+        api = Products('access_key', 'secret_key', 'account_id')
+        requests = [api.gen_fees_estimate_request('ATVPDKIKX0DER', asin, identifier=asin) for asin in ('A1', 'A2')]
+        params = api.flatten('FeesEstimateRequestList', 'FeesEstimateRequest',
+                             {'Action': 'GetMyFeesEstimate', 'FeesEstimateRequestList': requests})
+        self.assertEqual(params['Action'], 'GetMyFeesEstimate')
+        self.assertEqual(params['FeesEstimateRequestList.FeesEstimateRequest.2.IdValue'], 'A2')
+        self.assertEqual(params['FeesEstimateRequestList.FeesEstimateRequest.1.PriceToEstimateFees.Shipping.Amount'],
+                         '0.000000')
+        self.assertEqual(len(params), 1 + 2 * 9)
@@ -0,0 +1,198 @@
+import threading
+from concurrent.futures import CancelledError
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws.parsers import ErrorResponse
+from mws.polling import BatchStatusPoller
+from mws.testing import fixtures
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePoller(BatchStatusPoller):
+    """
+    Poller whose statuses are set by the test, and which is stepped by the test instead of its thread.
+    """
+
+    BATCH_SIZE = 3
+    INITIAL_INTERVAL = 10
+    MAX_INTERVAL = 40
+    TERMINAL_STATUSES = frozenset(['_DONE_'])
+    EXPECTED_DURATIONS = {'slow': 1000, 'fast': 40}
+
+    def __init__(self, **kwargs):
+        self.clock = FakeClock()
+        BatchStatusPoller.__init__(self, quota=mock.Mock(), clock=self.clock, **kwargs)
+        self.statuses = {}
+        self.calls = []
+        self.errors = []
+
+    def poll(self, job_ids):
+        self.calls.append(list(job_ids))
+        if self.errors:
+            raise self.errors.pop(0)
+        return {job_id: (self.statuses[job_id], 'slow') for job_id in job_ids if job_id in self.statuses}
+
+    def status_of(self, info):
+        return info[0]
+
+    def kind_of(self, info):
+        return info[1]
+
+    def _run(self):
+        pass
+
+    def step(self):
+        """
+        Move the clock to the next due job and poll the due batches.
+        """
+        with self._condition:
+            self.clock.now = max(self.clock.now, min(job.next_poll for job in self._jobs.values()))
+            batches = self._next_batches()
+        for batch in batches:
+            self._poll_batch(batch)
+
+    def job(self, job_id):
+        return self._jobs[job_id]
+
+
+def throttled():
+    return ErrorResponse.load(fixtures.error_response('RequestThrottled', 'Request is throttled'))
+
+
+class TestBatchStatusPoller(TestCase):
+
+    def setUp(self):
+        self.poller = FakePoller()
+        self.addCleanup(self.poller.stop)
+
+    def test_batches(self):
+        futures = [self.poller.register(str(i), 'slow') for i in range(5)]
+        self.poller.clock.now = 3
+        self.poller.register('late', 'slow')
+        self.poller.statuses = {'0': '_DONE_', '1': '_IN_PROGRESS_'}
+        self.poller.step()
+        # The 5 due jobs need 2 batches, the second one is topped up with the job due next.
+        self.assertEqual(self.poller.calls, [['0', '1', '2'], ['3', '4', 'late']])
+        self.assertEqual(futures[0].result(0), ('_DONE_', 'slow'))
+        self.assertFalse(futures[1].done())
+        self.assertEqual(sorted(self.poller.pending), ['1', '2', '3', '4', 'late'])
+
+    def test_backoff(self):
+        self.poller.register('1')
+        self.poller.register('2', 'fast')
+        self.poller.statuses = {'1': '_IN_PROGRESS_', '2': '_IN_PROGRESS_'}
+        intervals = []
+        for _ in range(5):
+            self.poller.step()
+            intervals.append((self.poller.job('1').interval, self.poller.job('2').interval))
+        # The kind is read from the first status, intervals are capped to a quarter of the expected duration.
+        self.assertEqual([i for i, _ in intervals], [15, 22.5, 33.75, 40, 40])
+        self.assertEqual([i for _, i in intervals], [10, 10, 10, 10, 10])
+        self.assertEqual(self.poller.job('1').next_poll, self.poller.clock.now + 40)
+
+    def test_throttled(self):
+        future = self.poller.register('1')
+        self.poller.errors = [throttled()]
+        self.poller.step()
+        self.poller.quota.drain.assert_called_once_with()
+        job = self.poller.job('1')
+        self.assertEqual(job.next_poll, 10 + FakePoller.THROTTLE_DELAY)
+        self.assertEqual(job.errors, 0)
+        self.poller.statuses = {'1': '_DONE_'}
+        self.poller.step()
+        self.assertEqual(future.result(0), ('_DONE_', 'slow'))
+
+    def test_retries_exhausted(self):
+        future = self.poller.register('1')
+        self.poller.errors = [IOError('connection reset')] * (FakePoller.MAX_RETRIES + 1)
+        for _ in range(FakePoller.MAX_RETRIES):
+            self.poller.step()
+            self.assertFalse(future.done())
+        self.poller.step()
+        self.assertRaises(IOError, future.result, 0)
+        self.assertEqual(self.poller.pending, [])
+
+    def test_errors_reset_on_success(self):
+        future = self.poller.register('1')
+        self.poller.errors = [IOError('connection reset')] * FakePoller.MAX_RETRIES
+        self.poller.statuses = {'1': '_IN_PROGRESS_'}
+        for _ in range(FakePoller.MAX_RETRIES + 1):
+            self.poller.step()
+        self.assertEqual(self.poller.job('1').errors, 0)
+        self.poller.errors = [IOError('connection reset')]
+        self.poller.step()
+        self.assertFalse(future.done())
+
+    def test_cancelled(self):
+        cancelled = self.poller.register('1')
+        other = self.poller.register('2')
+        self.poller.statuses = {'1': '_DONE_', '2': '_DONE_'}
+        # Cancelled while its status is being requested.
+        self.poller.poll = lambda job_ids: cancelled.cancel() and FakePoller.poll(self.poller, job_ids)
+        self.poller.step()
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(other.result(0), ('_DONE_', 'slow'))
+
+        cancelled = self.poller.register('3')
+        self.poller.register('4')
+        cancelled.cancel()
+        self.poller.poll = lambda job_ids: FakePoller.poll(self.poller, job_ids)
+        self.poller.step()
+        self.assertEqual(self.poller.calls[-1], ['4'])
+
+    def test_cancelled_after_retries(self):
+        future = self.poller.register('1')
+        self.poller.job('1').errors = FakePoller.MAX_RETRIES
+        self.poller.errors = [IOError('connection reset')]
+        self.poller.poll = lambda job_ids: future.cancel() and FakePoller.poll(self.poller, job_ids)
+        self.poller.step()
+        self.assertTrue(future.cancelled())
+
+    def test_stop(self):
+        future = self.poller.register('1')
+        self.poller.stop()
+        self.assertRaises(CancelledError, future.result, 0)
+        self.assertEqual(self.poller.pending, [])
+        self.assertRaises(RuntimeError, self.poller.register, '2')
+
+
+class TestPollingThread(TestCase):
+
+    class Poller(BatchStatusPoller):
+        TERMINAL_STATUSES = frozenset(['_DONE_'])
+
+        def __init__(self):
+            BatchStatusPoller.__init__(self, initial_interval=0.01, max_interval=0.01)
+            self.statuses = {}
+
+        def poll(self, job_ids):
+            return {job_id: self.statuses[job_id] for job_id in job_ids if job_id in self.statuses}
+
+        def status_of(self, info):
+            return info
+
+    def test_cancelled_future_keeps_thread_polling(self):
+        poller = self.Poller()
+        self.addCleanup(poller.stop)
+        done = threading.Event()
+        cancelled = poller.register('1')
+        cancelled.cancel()
+        poller.statuses['1'] = '_DONE_'
+        poller.register('2', callback=lambda f: done.set())
+        poller.statuses['2'] = '_DONE_'
+        self.assertTrue(done.wait(5))
+        poller.statuses['3'] = '_DONE_'
+        self.assertEqual(poller.register('3').result(5), '_DONE_')
@@ -0,0 +1,98 @@
+import datetime
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws import DataWrapper, Reports
+from mws._mws import StreamWrapper
+from mws.reportstore import ReportStore
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+class TestReportStore(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = ReportStore(self.directory, clock=FakeClock())
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_and_load(self):
+        self.assertIsNone(self.store.get('1'))
+        stored = self.store.put('1', [b'a\tb\n', b'1\t2\n'], report_type='_GET_FLAT_FILE_OPEN_LISTINGS_DATA_')
+        self.assertEqual(stored.md5, hashlib.md5(b'a\tb\n1\t2\n').hexdigest())
+        self.assertTrue(stored.path.endswith(os.path.join(stored.md5[:2], stored.md5)))
+        self.assertEqual(self.store.get('1'), b'a\tb\n1\t2\n')
+        self.assertEqual(b''.join(self.store.load('1').iter_content(3)), b'a\tb\n1\t2\n')
+        self.assertIn('1', self.store)
+
+    def test_identical_reports_stored_once(self):
+        self.store.put('1', b'contents')
+        self.store.put('2', b'contents')
+        self.assertEqual(self.store.load('1').path, self.store.load('2').path)
+        self.assertEqual(self.store.size(), 8)
+
+    def test_failed_stream_not_stored(self):
+        def chunks():
+            yield b'partial'
+            raise ValueError('Wrong Contentlength')
+        with self.assertRaises(ValueError):
+            list(self.store.write('1', chunks()))
+        self.assertNotIn('1', self.store)
+        self.assertEqual([name for name in os.listdir(self.store.objects)], [])
+
+    def test_evict_least_recently_used(self):
+        self.store.put('1', b'x' * 10)
+        self.store.put('2', b'y' * 10)
+        self.store.get('1')
+        self.store.max_size = 15
+        self.store.put('3', b'z' * 5)
+        self.assertIn('1', self.store)
+        self.assertNotIn('2', self.store)
+        self.assertIn('3', self.store)
+        self.assertEqual(self.store.size(), 15)
+
+    def test_most_recent(self):
+        self.store.record('1', report_type='_T_', available_date='2016-01-05T13:25:10+00:00')
+        self.store.record('2', report_type='_T_', available_date='2016-01-05T10:25:10-05:00')
+        self.store.record('3', report_type='_OTHER_', available_date='2016-02-01T00:00:00+00:00')
+        self.assertEqual(self.store.most_recent('_T_')['report_id'], '2')
+        self.assertIsNone(self.store.most_recent('_T_', downloaded=True))
+        self.assertIsNone(self.store.most_recent('_T_', available_after=datetime.datetime(2016, 1, 6)))
+        self.store.put('1', b'contents')
+        self.assertEqual(self.store.most_recent('_T_', downloaded=True)['report_id'], '1')
+
+    def test_get_report(self):
+        api = Reports('access_key', 'secret_key', 'account_id', report_store=self.store)
+        with mock.patch.object(Reports, 'make_request', return_value=DataWrapper(b'a\tb\n', {})) as make_request:
+            self.assertEqual(api.get_report('1').original, b'a\tb\n')
+            self.assertEqual(api.get_report('1').original, b'a\tb\n')
+            self.assertEqual(api.get_report('1', stream=True).original, b'a\tb\n')
+        self.assertEqual(make_request.call_count, 1)
+
+    def test_get_report_stream(self):
+        api = Reports('access_key', 'secret_key', 'account_id', report_store=self.store)
+        response = mock.Mock(headers={})
+        response.iter_content.return_value = iter([b'a\t', b'b\n'])
+        with mock.patch.object(Reports, 'make_request', return_value=StreamWrapper(response)):
+            wrapper = api.get_report('1', stream=True)
+            self.assertNotIn('1', self.store)
+            self.assertEqual(b''.join(wrapper.iter_content()), b'a\tb\n')
+        self.assertEqual(self.store.get('1'), b'a\tb\n')
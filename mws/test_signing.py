@@ -0,0 +1,40 @@
+import base64
+import hashlib
+import hmac
+from unittest import TestCase
+from urllib.parse import quote
+
+from mws import Orders
+from mws.signing import RequestSigner
+
+QUERY = ('AWSAccessKeyId=AKIAEXAMPLE&Action=ListOrders&MarketplaceId.Id.1=ATVPDKIKX0DER&SellerId=A1EXAMPLE'
+         '&SignatureMethod=HmacSHA256&SignatureVersion=2&Timestamp=2017-01-01T00%3A00%3A00Z&Version=2013-09-01')
+
+
+def reference_signature(secret_key, method, host, uri, query):
+    string_to_sign = '{}\n{}\n{}\n{}'.format(method, host, uri, query)
+    digest = hmac.new(secret_key.encode('utf-8'), string_to_sign.encode('utf-8'), hashlib.sha256).digest()
+    return quote(base64.b64encode(digest))
+
+
+class TestRequestSigner(TestCase):
+
+    def test_sign(self):
+        signer = RequestSigner('secret', 'https://MWS.amazonservices.com', '/Orders/2013-09-01')
+        for method in ('POST', 'GET', 'POST'):
+            self.assertEqual(signer.sign(method, QUERY), reference_signature(
+                'secret', method, 'mws.amazonservices.com', '/Orders/2013-09-01', QUERY))
+        self.assertNotEqual(signer.sign('POST', QUERY), signer.sign('POST', QUERY + '&a=b'))
+        # The host is signed without its scheme, whatever it is.
+        self.assertEqual(RequestSigner('secret', 'http://127.0.0.1:8000', '/').host, '127.0.0.1:8000')
+
+    def test_client_signer(self):
+        api = Orders('access_key', 'secret', 'account_id')
+        signer = api.signer
+        self.assertIs(api.signer, signer)
+        self.assertEqual(api.calc_signature('POST', QUERY), reference_signature(
+            'secret', 'POST', 'mws.amazonservices.com', '/Orders/2013-09-01', QUERY))
+        api.domain = 'https://mws-eu.amazonservices.com'
+        self.assertIsNot(api.signer, signer)
+        self.assertEqual(api.calc_signature('POST', QUERY), reference_signature(
+            'secret', 'POST', 'mws-eu.amazonservices.com', '/Orders/2013-09-01', QUERY))
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from mws import Orders, Reports
+from mws.transport import CannedResponse, RecordingTransport, ReplayTransport, request_key
+
+LIST_ORDERS = b'''<?xml version="1.0"?>
+<ListOrdersResponse xmlns="https://mws.amazonservices.com/Orders/2013-09-01">
+  <ListOrdersResult>
+    <Orders>
+      <Order><AmazonOrderId>%s</AmazonOrderId></Order>
+    </Orders>
+  </ListOrdersResult>
+</ListOrdersResponse>'''
+
+
+class TestTransport(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cassette.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_request_key(self):
+        api = Orders('access_key', 'secret_key', 'account_id', auth_token='token')
+        prepared = api.prepare_request(dict(Action='ListOrders', MarketplaceId='ATVPDKIKX0DER'))
+        self.assertEqual(request_key(prepared.url), 'Action=ListOrders&MarketplaceId=ATVPDKIKX0DER&Version=2013-09-01')
+
+    def test_record_and_replay(self):
+        upstream = mock.Mock()
+        upstream.send.side_effect = [
+            CannedResponse(200, {'Content-Type': 'text/xml'}, LIST_ORDERS % b'1'),
+            CannedResponse(200, {'Content-Type': 'text/xml'}, LIST_ORDERS % b'2'),
+            CannedResponse(200, {}, b'sku\tprice\n'),
+        ]
+        recorder = RecordingTransport(self.path, upstream)
+        api = Orders('access_key', 'secret_key', 'account_id', transport=recorder)
+        self.assertEqual(api.make_request(dict(Action='ListOrders')).parsed.Orders.Order.AmazonOrderId, '1')
+        api.make_request(dict(Action='ListOrders'))
+        reports = Reports('access_key', 'secret_key', 'account_id', transport=recorder)
+        self.assertEqual(reports.get_report('42').original, b'sku\tprice\n')
+
+        sleep = mock.Mock()
+        replay = ReplayTransport(self.path, latency=0.05, sleep=sleep)
+        self.assertEqual(len(replay), 3)
+        # Replayed whatever the credentials.
+        api = Orders('other_key', 'other_secret', 'other_account', transport=replay)
+        order_ids = [api.make_request(dict(Action='ListOrders')).parsed.Orders.Order.AmazonOrderId for _ in range(3)]
+        self.assertEqual(order_ids, ['1', '2', '2'])
+        sleep.assert_called_with(0.05)
+        reports = Reports('other_key', 'other_secret', 'other_account', transport=replay)
+        self.assertEqual(b''.join(reports.get_report('42', stream=True).iter_content()), b'sku\tprice\n')
+        self.assertRaises(KeyError, reports.get_report, '43')
@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic generator of large MWS responses, for the benchmarks and the stand-in server.
+
+Responses are well formed XML in the namespaces the parsers of `mws.parsers` use, and tab delimited flat file
+reports as `GetReport` returns them. The same arguments and seed always produce the same bytes, so that benchmark
+runs are comparable.
+
+Usage:
+    >>> ListOrdersResponse.load(list_orders(count=100))
+    >>> GetFeedSubmissionListResponse.load(get_feed_submission_list(count=10000))
+    >>> GetCompetitivePricingForAsinResponse.load(competitive_pricing_for_asin(count=20))
+    >>> FlatFileReader(flat_file_report(rows=2000000), '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_')
+
+or from the command line:
+    python -m mws.testing.fixtures report --rows 2000000 > orders.txt
+"""
+import argparse
+import datetime
+import random
+import sys
+from xml.sax.saxutils import escape, quoteattr
+
+from ..params import TIMESTAMP_FORMAT
+
+ORDERS_NS = 'https://mws.amazonservices.com/Orders/2013-09-01'
+PRODUCTS_NS = 'http://mws.amazonservices.com/schema/Products/2011-10-01'
+PRODUCTS_DEFAULT_NS = 'http://mws.amazonservices.com/schema/Products/2011-10-01/default.xsd'
+DOC_NS = 'http://mws.amazonaws.com/doc/2009-01-01/'
+INBOUND_NS = 'http://mws.amazonaws.com/FulfillmentInboundShipment/2010-10-01/'
+INVENTORY_NS = 'http://mws.amazonaws.com/FulfillmentInventory/2010-10-01/'
+
+# Default sizes, those of the benchmarks.
+SIZES = {
+    'orders': 100,
+    'order_items': 2,
+    'feed_submissions': 10000,
+    'pricing': 20,
+    'report_rows': 2000000,
+    'inbound_shipments': 100,
+    'inventory': 100,
+}
+
+MARKETPLACE_ID = 'ATVPDKIKX0DER'
+REQUEST_ID = '6d8b2c5e-0000-4000-8000-000000000000'
+
+# Dates of the generated records are spread from this date on.
+EPOCH = datetime.datetime(2017, 1, 1)
+
+ORDERS_REPORT = '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_ORDER_DATE_'
+LISTINGS_REPORT = '_GET_MERCHANT_LISTINGS_DATA_'
+
+ADDRESSES = (
+    ('Springfield', 'Illinois', '62701'),
+    ('Seattle', 'WA', '98109'),
+    ('Austin', 'Texas', '73301'),
+    ('Brooklyn', 'NY', '11201'),
+    ('Portland', 'Oregon', '97201'),
+    ('Miami', 'FL', '33101'),
+    ('Denver', 'co', '80201'),
+    ('Boston', 'Massachusetts', '02108'),
+)
+ORDER_STATUSES = ('Unshipped', 'Shipped', 'Shipped', 'Shipped', 'PartiallyShipped', 'Canceled', 'Pending')
+FEED_TYPES = ('_POST_INVENTORY_AVAILABILITY_DATA_', '_POST_PRODUCT_PRICING_DATA_', '_POST_FLAT_FILE_INVLOADER_DATA_',
+              '_POST_ORDER_FULFILLMENT_DATA_')
+CATEGORIES = ('toy_display_on_website', 'home_garden_display_on_website', 'sports_display_on_website',
+              'kitchen_display_on_website')
+
+
+def record_random(seed, n):
+    """
+    The random generator of the `n`th record, so that a record doesn't depend on the records generated before it.
+    """
+    return random.Random(seed * 1000003 + n)
+
+
+def timestamp(seconds):
+    """
+    ISO 8601 timestamp, `seconds` after `EPOCH`.
+    """
+    return (EPOCH + datetime.timedelta(seconds=seconds)).strftime(TIMESTAMP_FORMAT)
+
+
+def elements(*fields):
+    """
+    XML of (tag, value) pairs. Values are escaped, None values are left out.
+    """
+    return ''.join(['<{0}>{1}</{0}>'.format(tag, escape(str(value))) for tag, value in fields if value is not None])
+
+
+def money(tag, amount, currency='USD'):
+    return '<{0}><CurrencyCode>{1}</CurrencyCode><Amount>{2:.2f}</Amount></{0}>'.format(tag, currency, amount)
+
+
+def envelope(action, ns, result, request_id=REQUEST_ID, wrap=True):
+    """
+    The `<ActionResponse>` document of an Action.
+
+    :param result: XML of the result.
+    :param wrap: Enclose the result in an `<ActionResult>` element. The Products API lists one result element per
+        requested id instead.
+    :return: bytes
+    """
+    if wrap:
+        result = '<{0}Result>{1}</{0}Result>'.format(action, result)
+    return ('<?xml version="1.0"?>\n<{0}Response xmlns="{1}">{2}<ResponseMetadata><RequestId>{3}</RequestId>'
+            '</ResponseMetadata></{0}Response>').format(action, ns, result, request_id).encode('utf-8')
+
+
+def next_token(token):
+    return '<NextToken>{}</NextToken>'.format(escape(token)) if token else ''
+
+
+def error_response(code, message, request_id=REQUEST_ID, error_type='Sender'):
+    """
+    An `ErrorResponse` document.
+
+    :return: bytes
+    """
+    return ('<?xml version="1.0"?>\n<ErrorResponse xmlns="{}"><Error><Type>{}</Type><Code>{}</Code>'
+            '<Message>{}</Message></Error><RequestID>{}</RequestID></ErrorResponse>'
+            ).format(DOC_NS, error_type, code, escape(message), request_id).encode('utf-8')
+
+
+# Orders
+
+
+def order_id(n):
+    return '{:03d}-{:07d}-{:07d}'.format(100 + n % 900, n, (n * 7919) % 10000000)
+
+
+def order_number(amazon_order_id):
+    """
+    Inverse of `order_id`.
+    """
+    return int(amazon_order_id.split('-')[1])
+
+
+def order_xml(n, seed=0):
+    rng = record_random(seed, n)
+    city, state, postal_code = ADDRESSES[rng.randrange(len(ADDRESSES))]
+    status = ORDER_STATUSES[rng.randrange(len(ORDER_STATUSES))]
+    items = rng.randint(1, 4)
+    shipped = items if status == 'Shipped' else 0
+    purchased = n * 90 + rng.randrange(90)
+    prime = rng.random() < 0.3
+    return '<Order>{}<ShippingAddress>{}</ShippingAddress>{}{}</Order>'.format(
+        elements(('LatestShipDate', timestamp(purchased + 172800)), ('OrderType', 'StandardOrder'),
+                 ('PurchaseDate', timestamp(purchased)), ('AmazonOrderId', order_id(n)),
+                 ('BuyerEmail', '{}@marketplace.amazon.com'.format(rng.getrandbits(48))),
+                 ('IsReplacementOrder', 'false'), ('LastUpdateDate', timestamp(purchased + rng.randrange(86400))),
+                 ('NumberOfItemsShipped', shipped), ('ShipServiceLevel', 'Std US D2D Dom'), ('OrderStatus', status),
+                 ('SalesChannel', 'Amazon.com'), ('IsBusinessOrder', 'false'),
+                 ('NumberOfItemsUnshipped', items - shipped), ('PaymentMethodDetails', None),
+                 ('BuyerName', 'Buyer {}'.format(n)), ('IsPremiumOrder', 'false'),
+                 ('EarliestShipDate', timestamp(purchased + 86400)), ('MarketplaceId', MARKETPLACE_ID),
+                 ('FulfillmentChannel', 'AFN' if prime else 'MFN'), ('PaymentMethod', 'Other'),
+                 ('IsPrime', 'true' if prime else 'false'), ('ShipmentServiceLevelCategory', 'Standard'),
+                 ('SellerOrderId', '{:08d}'.format(n))),
+        elements(('City', city), ('AddressType', 'Residential'), ('PostalCode', postal_code),
+                 ('StateOrRegion', state), ('Phone', '555-01{:02d}'.format(n % 100)), ('CountryCode', 'US'),
+                 ('Name', 'Buyer {}'.format(n)), ('AddressLine1', '{} Main St'.format(rng.randint(1, 9999))),
+                 ('AddressLine2', 'Apt {}'.format(rng.randint(1, 99)) if rng.random() < 0.2 else None)),
+        money('OrderTotal', rng.randint(500, 50000) / 100.0),
+        '<PaymentMethodDetails><PaymentMethodDetail>Standard</PaymentMethodDetail></PaymentMethodDetails>')
+
+
+def list_orders(count=SIZES['orders'], offset=0, token=None, action='ListOrders', seed=0, request_id=REQUEST_ID):
+    """
+    A ListOrders (or ListOrdersByNextToken) page.
+
+    :param count: Number of orders.
+    :param offset: Number of the first order.
+    :param token: NextToken of the page, if any.
+    :return: bytes
+    """
+    orders = ''.join([order_xml(n, seed) for n in range(offset, offset + count)])
+    return envelope(action, ORDERS_NS, '{}<LastUpdatedBefore>{}</LastUpdatedBefore><Orders>{}</Orders>'.format(
+        next_token(token), timestamp(offset + count), orders), request_id)
+
+
+def get_order(amazon_order_ids, seed=0, request_id=REQUEST_ID):
+    orders = ''.join([order_xml(order_number(i), seed) for i in amazon_order_ids])
+    return envelope('GetOrder', ORDERS_NS, '<Orders>{}</Orders>'.format(orders), request_id)
+
+
+def order_item_xml(amazon_order_id, n, seed=0):
+    number = order_number(amazon_order_id)
+    rng = record_random(seed, number * 100 + n)
+    product = rng.randrange(100000)
+    quantity = rng.randint(1, 3)
+    return '<OrderItem>{}{}{}{}{}</OrderItem>'.format(
+        elements(('QuantityOrdered', quantity), ('Title', 'Product {} - {} pack'.format(product, quantity)),
+                 ('ASIN', 'B{:09d}'.format(product)), ('SellerSKU', 'SKU-{:06d}'.format(product)),
+                 ('OrderItemId', '{:014d}'.format(number * 100 + n)), ('QuantityShipped', 0),
+                 ('ConditionId', 'New'), ('IsGift', 'false')),
+        money('PromotionDiscount', 0), money('ItemPrice', rng.randint(500, 20000) / 100.0),
+        money('ItemTax', rng.randint(0, 1500) / 100.0), money('ShippingPrice', rng.choice((0, 4.99, 7.99))))
+
+
+def list_order_items(amazon_order_id, count=SIZES['order_items'], token=None, action='ListOrderItems', seed=0,
+                     request_id=REQUEST_ID):
+    """
+    The ListOrderItems response of an order.
+
+    :return: bytes
+    """
+    items = ''.join([order_item_xml(amazon_order_id, n, seed) for n in range(1, count + 1)])
+    return envelope(action, ORDERS_NS, '{}<AmazonOrderId>{}</AmazonOrderId><OrderItems>{}</OrderItems>'.format(
+        next_token(token), escape(amazon_order_id), items), request_id)
+
+
+# Feeds
+
+
+def feed_submission_info_xml(feed_submission_id, feed_type=None, status='_DONE_'):
+    n = int(feed_submission_id)
+    if feed_type is None:
+        feed_type = FEED_TYPES[n % len(FEED_TYPES)]
+    submitted = n % 1000000 * 60
+    done = status == '_DONE_'
+    return '<FeedSubmissionInfo>{}</FeedSubmissionInfo>'.format(elements(
+        ('FeedProcessingStatus', status), ('FeedType', feed_type), ('FeedSubmissionId', feed_submission_id),
+        ('StartedProcessingDate', timestamp(submitted + 30) if done else None),
+        ('SubmittedDate', timestamp(submitted)), ('CompletedProcessingDate', timestamp(submitted + 90) if done else None)))
+
+
+def get_feed_submission_list(count=SIZES['feed_submissions'], offset=0, feed_submission_ids=None, feed_types=None,
+                             token=None, action='GetFeedSubmissionList', request_id=REQUEST_ID):
+    """
+    A GetFeedSubmissionList (or GetFeedSubmissionListByNextToken) page of processed submissions.
+
+    :param count: Number of submissions, unless `feed_submission_ids` is given.
+    :param feed_submission_ids: (Optional) The FeedSubmissionIds to list.
+    :param feed_types: (Optional) Dict of FeedSubmissionId to feed type.
+    :return: bytes
+    """
+    if feed_submission_ids is None:
+        feed_submission_ids = [str(10000000 + n) for n in range(offset, offset + count)]
+    feed_types = feed_types or {}
+    infos = ''.join([feed_submission_info_xml(i, feed_types.get(i)) for i in feed_submission_ids])
+    return envelope(action, DOC_NS, '{}<HasNext>{}</HasNext>{}'.format(
+        next_token(token), 'true' if token else 'false', infos), request_id)
+
+
+def submit_feed(feed_submission_id, feed_type, request_id=REQUEST_ID):
+    return envelope('SubmitFeed', DOC_NS, feed_submission_info_xml(feed_submission_id, feed_type, '_SUBMITTED_'),
+                    request_id)
+
+
+def processing_report(feed_submission_id, messages=1, errors=0, seed=0):
+    """
+    The processing report returned by GetFeedSubmissionResult, with `errors` of the `messages` failed.
+
+    :return: bytes
+    """
+    rng = record_random(seed, int(feed_submission_id))
+    failed = sorted(rng.sample(range(1, messages + 1), errors))
+    results = ''.join([
+        '<Result>{}<AdditionalInfo><SKU>SKU-{:06d}</SKU></AdditionalInfo></Result>'.format(elements(
+            ('MessageID', m), ('ResultCode', 'Error'), ('ResultMessageCode', 13013),
+            ('ResultDescription', 'This SKU does not exist in the Amazon.com catalog.')), m)
+        for m in failed])
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<AmazonEnvelope xmlns:xsi="http://www.w3.org/2001/'
+            'XMLSchema-instance" xsi:noNamespaceSchemaLocation="amzn-envelope.xsd"><Header><DocumentVersion>1.02'
+            '</DocumentVersion><MerchantIdentifier>M_EXAMPLE_123456</MerchantIdentifier></Header><MessageType>'
+            'ProcessingReport</MessageType><Message><MessageID>1</MessageID><ProcessingReport>{}<ProcessingSummary>{}'
+            '</ProcessingSummary>{}</ProcessingReport></Message></AmazonEnvelope>').format(
+        elements(('DocumentTransactionID', feed_submission_id), ('StatusCode', 'Complete')),
+        elements(('MessagesProcessed', messages), ('MessagesSuccessful', messages - errors),
+                 ('MessagesWithError', errors), ('MessagesWithWarning', 0)),
+        results).encode('utf-8')
+
+
+# Reports
+
+
+def report_id_for(report_request_id):
+    """
+    The GeneratedReportId of a report request.
+    """
+    return str(int(report_request_id) * 10)
+
+
+def report_request_info_xml(report_request_id, report_type=LISTINGS_REPORT, status='_DONE_'):
+    requested = int(report_request_id) % 1000000 * 60
+    done = status == '_DONE_'
+    return '<ReportRequestInfo>{}</ReportRequestInfo>'.format(elements(
+        ('ReportType', report_type), ('ReportProcessingStatus', status), ('EndDate', timestamp(requested)),
+        ('Scheduled', 'false'), ('ReportRequestId', report_request_id),
+        ('StartedProcessingDate', timestamp(requested + 10) if done else None),
+        ('SubmittedDate', timestamp(requested)), ('StartDate', timestamp(requested - 86400)),
+        ('CompletedDate', timestamp(requested + 120) if done else None),
+        ('GeneratedReportId', report_id_for(report_request_id) if done else None)))
+
+
+def request_report(report_request_id, report_type, request_id=REQUEST_ID):
+    return envelope('RequestReport', DOC_NS, report_request_info_xml(report_request_id, report_type, '_SUBMITTED_'),
+                    request_id)
+
+
+def get_report_request_list(report_types, request_id=REQUEST_ID):
+    """
+    :param report_types: List of (ReportRequestId, report type) tuples, all processed.
+    """
+    infos = ''.join([report_request_info_xml(i, report_type) for i, report_type in report_types])
+    return envelope('GetReportRequestList', DOC_NS, '<HasNext>false</HasNext>' + infos, request_id)
+
+
+def get_report_list(report_types, request_id=REQUEST_ID):
+    """
+    :param report_types: List of (ReportRequestId, report type) tuples.
+    """
+    infos = ''.join(['<ReportInfo>{}</ReportInfo>'.format(elements(
+        ('ReportId', report_id_for(i)), ('ReportType', report_type), ('ReportRequestId', i),
+        ('AvailableDate', timestamp(int(i) % 1000000 * 60 + 120)), ('Acknowledged', 'false')))
+        for i, report_type in report_types])
+    return envelope('GetReportList', DOC_NS, '<HasNext>false</HasNext>' + infos, request_id)
+
+
+ORDERS_REPORT_COLUMNS = ('amazon-order-id', 'merchant-order-id', 'purchase-date', 'last-updated-date', 'order-status',
+                         'fulfillment-channel', 'sales-channel', 'ship-service-level', 'product-name', 'sku', 'asin',
+                         'item-status', 'quantity', 'currency', 'item-price', 'item-tax', 'shipping-price',
+                         'shipping-tax', 'gift-wrap-price', 'gift-wrap-tax', 'item-promotion-discount',
+                         'ship-promotion-discount', 'ship-city', 'ship-state', 'ship-postal-code', 'ship-country',
+                         'promotion-ids')
+LISTINGS_REPORT_COLUMNS = ('item-name', 'item-description', 'listing-id', 'seller-sku', 'price', 'quantity',
+                           'open-date', 'image-url', 'item-is-marketplace', 'product-id-type', 'zshop-shipping-fee',
+                           'item-note', 'item-condition', 'zshop-category1', 'asin1', 'will-ship-internationally',
+                           'expedited-shipping', 'product-id', 'add-delete', 'pending-quantity',
+                           'fulfillment-channel')
+
+# Number of distinct products of a report. Rows pick one of them, most of a report's cells are repeated.
+PRODUCTS = 5000
+
+
+def _orders_report_rows(rows, rng):
+    products = [('Product {} – {} pack'.format(p, p % 4 + 1), 'SKU-{:06d}'.format(p), 'B{:09d}'.format(p))
+                for p in range(PRODUCTS)]
+    for n in range(rows):
+        name, sku, asin = products[rng.randrange(PRODUCTS)]
+        city, state, postal_code = ADDRESSES[n % len(ADDRESSES)]
+        purchased = (EPOCH + datetime.timedelta(seconds=n * 15)).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+        price = rng.randint(500, 20000)
+        yield (order_id(n), '', purchased, purchased, 'Shipped', 'Merchant', 'Amazon.com', 'Standard', name, sku,
+               asin, 'Shipped', str(n % 3 + 1), 'USD', '{:.2f}'.format(price / 100.0),
+               '{:.2f}'.format(price * 0.07 / 100.0), '4.99', '0.00', '', '', '0.00', '0.00', city, state,
+               postal_code, 'US', '')
+
+
+def _listings_report_rows(rows, rng):
+    for n in range(rows):
+        price = rng.randint(500, 20000)
+        yield ('Product {}'.format(n), '', '{:010d}'.format(n * 31), 'SKU-{:06d}'.format(n),
+               '{:.2f}'.format(price / 100.0), str(rng.randrange(100)), '2017-01-01 00:00:00 PST', '', 'y', '1',
+               '', '', '11', '', 'B{:09d}'.format(n), '', '', 'B{:09d}'.format(n), '', '0', 'DEFAULT')
+
+
+REPORT_ROWS = {
+    ORDERS_REPORT: (ORDERS_REPORT_COLUMNS, _orders_report_rows),
+    '_GET_FLAT_FILE_ALL_ORDERS_DATA_BY_LAST_UPDATE_': (ORDERS_REPORT_COLUMNS, _orders_report_rows),
+    LISTINGS_REPORT: (LISTINGS_REPORT_COLUMNS, _listings_report_rows),
+    '_GET_MERCHANT_LISTINGS_ALL_DATA_': (LISTINGS_REPORT_COLUMNS, _listings_report_rows),
+}
+
+
+def flat_file_lines(rows=SIZES['report_rows'], report_type=ORDERS_REPORT, seed=0):
+    """
+    Lines of a tab delimited report, the header first.
+
+    :param rows: Number of rows, without the header.
+    :param report_type: One of `REPORT_ROWS`.
+    :return: Iterator of str, with line endings.
+    """
+    columns, generate = REPORT_ROWS[report_type]
+    yield '\t'.join(columns) + '\n'
+    for row in generate(rows, random.Random(seed)):
+        yield '\t'.join(row) + '\n'
+
+
+def flat_file_report(rows=SIZES['report_rows'], report_type=ORDERS_REPORT, seed=0, encoding='windows-1252',
+                     chunk_size=64 * 1024):
+    """
+    A tab delimited report, encoded as `GetReport` returns it, in chunks of about `chunk_size` bytes.
+
+    The report isn't held in memory, iterate it or pass it to `FlatFileReader` directly.
+
+    :return: Iterator of bytes.
+    """
+    buffered, size = [], 0
+    for line in flat_file_lines(rows, report_type, seed):
+        buffered.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffered).encode(encoding)
+            buffered, size = [], 0
+    if buffered:
+        yield ''.join(buffered).encode(encoding)
+
+
+def write_flat_file(path, rows=SIZES['report_rows'], report_type=ORDERS_REPORT, seed=0, encoding='windows-1252'):
+    """
+    Save a report generated by `flat_file_report` to `path`.
+
+    :return: Number of bytes written.
+    """
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in flat_file_report(rows, report_type, seed, encoding):
+            written += f.write(chunk)
+    return written
+
+
+# Products
+
+
+def competitive_pricing_result_xml(asin, seed=0, action='GetCompetitivePricingForASIN'):
+    rng = record_random(seed, sum(ord(c) * 31 ** i for i, c in enumerate(asin[-8:])))
+    listing = rng.randint(500, 20000) / 100.0
+    shipping = rng.choice((0, 4.99))
+    prices = ''.join([
+        '<CompetitivePrice belongsToRequester={} condition="{}" subcondition="{}">{}<Price>{}{}{}</Price>'
+        '</CompetitivePrice>'.format(quoteattr('true' if p == 0 and rng.random() < 0.5 else 'false'),
+                                     'New' if p < 2 else 'Used', 'New' if p < 2 else 'Good',
+                                     elements(('CompetitivePriceId', p + 1)),
+                                     money('LandedPrice', listing + p + shipping), money('ListingPrice', listing + p),
+                                     money('Shipping', shipping))
+        for p in range(rng.randint(1, 3))])
+    ranks = ''.join(['<SalesRank>{}</SalesRank>'.format(elements(
+        ('ProductCategoryId', CATEGORIES[(r + rng.randrange(4)) % 4]), ('Rank', rng.randint(1, 500000))))
+        for r in range(rng.randint(1, 3))])
+    id_attr, id_tag = ('ASIN', 'ASIN') if action.endswith('ASIN') else ('SellerSKU', 'SellerSKU')
+    return ('<{0}Result {1}={2} status="Success"><Product><Identifiers><MarketplaceASIN>{3}</MarketplaceASIN>'
+            '</Identifiers><CompetitivePricing><CompetitivePrices>{4}</CompetitivePrices><NumberOfOfferListings>'
+            '<OfferListingCount condition="New">{5}</OfferListingCount></NumberOfOfferListings></CompetitivePricing>'
+            '<SalesRankings>{6}</SalesRankings></Product></{0}Result>').format(
+        action, id_attr, quoteattr(asin), elements(('MarketplaceId', MARKETPLACE_ID), (id_tag, asin)), prices,
+        rng.randint(1, 40), ranks)
+
+
+def competitive_pricing_for_asin(asins=None, count=SIZES['pricing'], seed=0, action='GetCompetitivePricingForASIN',
+                                 request_id=REQUEST_ID):
+    """
+    A GetCompetitivePricingForASIN (or ForSKU) batch.
+
+    :param asins: (Optional) The requested ASINs (or SKUs), `count` ASINs otherwise.
+    :return: bytes
+    """
+    if asins is None:
+        asins = ['B{:09d}'.format(n) for n in range(count)]
+    results = ''.join([competitive_pricing_result_xml(asin, seed, action) for asin in asins])
+    return envelope(action, PRODUCTS_NS, results, request_id, wrap=False)
+
+
+def matching_product_result_xml(id_type, id_value, n, seed=0):
+    rng = record_random(seed, n)
+    return ('<GetMatchingProductForIdResult Id={} IdType={} status="Success"><Products><Product><Identifiers>'
+            '<MarketplaceASIN>{}</MarketplaceASIN></Identifiers><AttributeSets><ns2:ItemAttributes xml:lang="en-US" '
+            'xmlns:ns2="{}">{}<ns2:PackageDimensions><ns2:Weight Units="pounds">{:.2f}</ns2:Weight>'
+            '</ns2:PackageDimensions></ns2:ItemAttributes></AttributeSets><Relationships/><SalesRankings>'
+            '<SalesRank>{}</SalesRank></SalesRankings></Product></Products></GetMatchingProductForIdResult>').format(
+        quoteattr(id_value), quoteattr(id_type),
+        elements(('MarketplaceId', MARKETPLACE_ID), ('ASIN', 'B{:09d}'.format(n))), PRODUCTS_DEFAULT_NS,
+        ''.join(['<ns2:{0}>{1}</ns2:{0}>'.format(tag, escape(value)) for tag, value in (
+            ('Color', rng.choice(('Black', 'White', 'Red'))), ('Model', 'M-{}'.format(n)),
+            ('PartNumber', 'P-{}'.format(n)), ('ProductGroup', 'Toy'), ('ProductTypeName', 'TOYS_AND_GAMES'),
+            ('Title', 'Product {}'.format(n)))]),
+        rng.randint(10, 2000) / 100.0,
+        elements(('ProductCategoryId', CATEGORIES[n % 4]), ('Rank', rng.randint(1, 500000))))
+
+
+def matching_product_for_id(ids, id_type='ASIN', seed=0, request_id=REQUEST_ID):
+    results = ''.join([matching_product_result_xml(id_type, value, n, seed) for n, value in enumerate(ids, 1)])
+    return envelope('GetMatchingProductForId', PRODUCTS_NS, results, request_id, wrap=False)
+
+
+# Fulfillment
+
+
+def inbound_shipment_xml(n):
+    return '<member>{}</member>'.format(elements(
+        ('DestinationFulfillmentCenterId', ('PHX6', 'ONT8', 'BFI4', 'MDW2')[n % 4]), ('LabelPrepType', 'SELLER_LABEL'),
+        ('ShipmentId', 'FBA{:08X}'.format(n)), ('AreCasesRequired', 'false'),
+        ('ShipmentName', 'Shipment {}'.format(n)), ('ShipmentStatus', ('WORKING', 'SHIPPED', 'CLOSED')[n % 3])))
+
+
+def list_inbound_shipments(count=SIZES['inbound_shipments'], offset=0, token=None, action='ListInboundShipments',
+                           request_id=REQUEST_ID):
+    members = ''.join([inbound_shipment_xml(n) for n in range(offset, offset + count)])
+    return envelope(action, INBOUND_NS, '{}<ShipmentData>{}</ShipmentData>'.format(next_token(token), members),
+                    request_id)
+
+
+def list_inbound_shipment_items(shipment_id, count=SIZES['inbound_shipments'], token=None,
+                                action='ListInboundShipmentItems', seed=0, request_id=REQUEST_ID):
+    rng = record_random(seed, sum(map(ord, shipment_id)))
+    members = []
+    for n in range(count):
+        shipped = rng.randint(1, 200)
+        members.append('<member>{}</member>'.format(elements(
+            ('QuantityShipped', shipped), ('ShipmentId', shipment_id), ('FulfillmentNetworkSKU', 'X{:09d}'.format(n)),
+            ('SellerSKU', 'SKU-{:06d}'.format(n)), ('QuantityReceived', rng.randint(0, shipped)),
+            ('QuantityInCase', 0))))
+    return envelope(action, INBOUND_NS, '{}<ItemData>{}</ItemData>'.format(next_token(token), ''.join(members)),
+                    request_id)
+
+
+def prep_instructions_for_asin(asins=None, count=SIZES['pricing'], invalid=0, request_id=REQUEST_ID):
+    """
+    A GetPrepInstructionsForASIN response, with the last `invalid` ASINs invalid.
+
+    :param asins: (Optional) The requested ASINs, `count` ASINs otherwise.
+    :return: bytes
+    """
+    if asins is None:
+        asins = ['B{:09d}'.format(n) for n in range(count)]
+    valid = asins[:len(asins) - invalid]
+    instructions = ''.join(['<ASINPrepInstructions>{}<PrepInstructionList>{}</PrepInstructionList>'
+                            '</ASINPrepInstructions>'.format(
+                                elements(('ASIN', asin), ('BarcodeInstruction', 'RequiresFNSKULabel'),
+                                         ('PrepGuidance', 'SeePrepInstructionsList')),
+                                elements(*[('PrepInstruction', p) for p in ('Polybagging', 'Taping')[:n % 2 + 1]]))
+                            for n, asin in enumerate(valid)])
+    errors = ''.join(['<InvalidASIN>{}</InvalidASIN>'.format(elements(('ASIN', asin), ('ErrorReason', 'DoesNotExist')))
+                      for asin in asins[len(valid):]])
+    return envelope('GetPrepInstructionsForASIN', INBOUND_NS, '<ASINPrepInstructionsList>{}</ASINPrepInstructionsList>'
+                    '<InvalidASINList>{}</InvalidASINList>'.format(instructions, errors), request_id)
+
+
+def inventory_member_xml(n, seed=0):
+    rng = record_random(seed, n)
+    in_stock = rng.randrange(100)
+    return '<member>{}</member>'.format(elements(
+        ('SellerSKU', 'SKU-{:06d}'.format(n)), ('FNSKU', 'X{:09d}'.format(n)), ('ASIN', 'B{:09d}'.format(n)),
+        ('Condition', 'NewItem'), ('TotalSupplyQuantity', in_stock + rng.randrange(20)),
+        ('InStockSupplyQuantity', in_stock)))
+
+
+def list_inventory_supply(count=SIZES['inventory'], offset=0, skus=None, token=None, action='ListInventorySupply',
+                          seed=0, request_id=REQUEST_ID):
+    """
+    A ListInventorySupply (or ListInventorySupplyByNextToken) page.
+
+    :param skus: (Optional) The requested SKUs, `count` SKUs from `offset` otherwise.
+    :return: bytes
+    """
+    if skus is None:
+        numbers = range(offset, offset + count)
+    else:
+        numbers = [int(sku.rpartition('-')[2]) if sku.rpartition('-')[2].isdigit() else 0 for sku in skus]
+    members = ''.join([inventory_member_xml(n, seed) for n in numbers])
+    return envelope(action, INVENTORY_NS, '{}<MarketplaceId>{}</MarketplaceId><InventorySupplyList>{}'
+                    '</InventorySupplyList>'.format(next_token(token), MARKETPLACE_ID, members), request_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a generated MWS response to stdout.')
+    parser.add_argument('kind', choices=('orders', 'feed-submissions', 'pricing', 'report', 'inventory'))
+    parser.add_argument('--count', type=int, help='Number of records.')
+    parser.add_argument('--rows', type=int, default=SIZES['report_rows'], help='Number of report rows.')
+    parser.add_argument('--report-type', default=ORDERS_REPORT, choices=sorted(REPORT_ROWS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    out = sys.stdout.buffer
+    if args.kind == 'report':
+        for chunk in flat_file_report(args.rows, args.report_type, args.seed):
+            out.write(chunk)
+        return
+    if args.kind == 'orders':
+        content = list_orders(args.count or SIZES['orders'], seed=args.seed)
+    elif args.kind == 'feed-submissions':
+        content = get_feed_submission_list(args.count or SIZES['feed_submissions'])
+    elif args.kind == 'pricing':
+        content = competitive_pricing_for_asin(count=args.count or SIZES['pricing'], seed=args.seed)
+    else:
+        content = list_inventory_supply(args.count or SIZES['inventory'], seed=args.seed)
+    out.write(content)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+"""
+A local stand-in for the MWS endpoints, to load test an integration without calling Amazon.
+
+The server checks the signature and timestamp of the requests, enforces the request quotas of `mws.quota` per seller
+and Action with the `x-mws-quota-*` headers and `RequestThrottled` errors Amazon answers with, and serves synthetic
+responses for the Orders, Reports, Feeds, Products, Inbound Shipments and Inventory calls of `mws._mws`, generated
+by `mws.testing.fixtures`.
+
+Usage:
+    >>> with StandInServer(latency=0.05, volume={'orders': 1000}) as server:
+    ...     api = Orders('access_key', 'secret_key', 'account_id', domain=server.domain)
+    ...     api.list_orders(['ATVPDKIKX0DER'], created_after='2017-01-01')
+    ...     with server.redirect():  # for clients created without domain, ie. by the parsers
+    ...         ListOrdersResponse.request('access_key', 'secret_key', 'account_id', ['ATVPDKIKX0DER'], ...)
+"""
+import base64
+import contextlib
+import datetime
+import hashlib
+import hmac
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .. import _mws
+from . import fixtures
+from ..params import TIMESTAMP_FORMAT, canonical_query
+from ..quota import QUOTAS, SHARED_QUOTAS, QuotaBucket
+from ..signing import RequestSigner
+
+# Requests whose Timestamp is further than this from the server time are refused, as Amazon does.
+MAX_CLOCK_SKEW = 15 * 60
+
+# Number of synthetic records served, by kind.
+VOLUME = {
+    # Orders matching ListOrders, served by pages of `page_size`.
+    'orders': 300,
+    'page_size': 100,
+    'items_per_order': 2,
+    # Submissions listed by GetFeedSubmissionList.
+    'feed_submissions': 100,
+    # Rows of the reports returned by GetReport.
+    'report_rows': 1000,
+    # SKUs listed by ListInventorySupply, served by pages of `page_size`.
+    'inventory': 300,
+    # Shipments listed by ListInboundShipments, served by pages of `page_size`.
+    'inbound_shipments': 100,
+    'items_per_shipment': 20,
+}
+
+
+class StandInError(Exception):
+    """
+    An error answered to the client as an ErrorResponse.
+    """
+
+    def __init__(self, status, code, message, error_type='Sender'):
+        Exception.__init__(self, message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.error_type = error_type
+
+
+def _enumerated(params, prefix):
+    """
+    Values of an enumerated list parameter, ie. `ASINList.ASIN.1`, in order.
+    """
+    values = [(k[len(prefix):], v) for k, v in params.items() if k.startswith(prefix)]
+    return [v for _, v in sorted(values, key=lambda x: int(x[0]) if x[0].isdigit() else 0)]
+
+
+def _page(kind, offset, page_size, total):
+    """
+    Number of records of a page and its NextToken.
+    """
+    count = max(0, min(page_size, total - offset))
+    return count, '{}-{}'.format(kind, offset + count) if offset + count < total else None
+
+
+def _token_offset(params, kind):
+    token = params.get('NextToken', '')
+    if not token.startswith(kind + '-'):
+        raise StandInError(400, 'InvalidParameterValue', 'Invalid NextToken {}'.format(token))
+    return int(token[len(kind) + 1:])
+
+
+class StandInServer(object):
+    """
+    Local HTTP server answering MWS requests with synthetic data.
+
+    Each request gets the quota headers of its Action. Requests made while the quota of their seller and Action is
+    exhausted are answered with a 503 `RequestThrottled` error. Actions without a known quota aren't throttled.
+    """
+
+    def __init__(self, secret_key='secret_key', host='127.0.0.1', port=0, latency=0, jitter=0, volume=None,
+                 quotas=None, throttle=True, seed=0, clock=time.monotonic, sleep=time.sleep):
+        """
+
+        :param secret_key: The secret key the requests must be signed with.
+        :param host: Interface to listen on.
+        :param port: Port to listen on. The default picks a free port, see `domain`.
+        :param latency: Seconds each response is delayed by.
+        :param jitter: Up to this many seconds are added to the latency of each response, at random.
+        :param volume: Dict overriding the number of records served, see `VOLUME`.
+        :param quotas: Dict overriding the (max request quota, seconds to restore one request) of Actions, see
+            `mws.quota.QUOTAS`. ie. to make a load test run faster than real time.
+        :param throttle: Refuse the requests exceeding the quotas. Quota headers are sent either way.
+        :param seed: Seed of the generated data and of the latency jitter. (see `fixtures`)
+        """
+        self.secret_key = secret_key
+        self.latency = latency
+        self.jitter = jitter
+        self.volume = dict(VOLUME, **(volume or {}))
+        self.quotas = dict(QUOTAS, **(quotas or {}))
+        self.throttle = throttle
+        self.seed = seed
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random.Random(seed)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._ids = 50000
+        # Report request id -> report type, feed submission id -> feed type
+        self.report_requests = {}
+        self.feed_submissions = {}
+        self.requests = Counter()
+        self.throttled = Counter()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.stand_in = self
+        self._thread = None
+
+    @property
+    def domain(self):
+        """
+        The endpoint to create the clients with. (ex. http://127.0.0.1:8080)
+        """
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='StandInServer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @contextlib.contextmanager
+    def redirect(self):
+        """
+        Point the clients created without a `domain` at the server, whatever their region.
+        """
+        saved = dict(_mws.MARKETPLACES)
+        _mws.MARKETPLACES.update((region, self.domain) for region in saved)
+        try:
+            yield self
+        finally:
+            _mws.MARKETPLACES.update(saved)
+
+    def _next_id(self):
+        with self._lock:
+            self._ids += 1
+            return str(self._ids)
+
+    def _bucket(self, seller, action):
+        quota_action = SHARED_QUOTAS.get(action, action)
+        if quota_action not in self.quotas:
+            return
+        key = (seller, quota_action)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                max_quota, restore_rate = self.quotas[quota_action]
+                bucket = self._buckets[key] = QuotaBucket(max_quota, restore_rate, clock=self._clock)
+        return bucket
+
+    def verify(self, method, host, path, params):
+        """
+        Check the signature and the timestamp of a request.
+
+        The string to sign is rebuilt from the decoded parameters, as Amazon does, and its HMAC compared with the
+        base64 decoded signature. The client percent encodes the signature once more than the query string needs,
+        which Amazon tolerates, so the signature is decoded until it is plain base64. A signature sent without
+        encoding has its '+' decoded to spaces and doesn't match, as with Amazon.
+        """
+        signature = params.pop('Signature', None)
+        if signature is None or params.get('SignatureMethod') != 'HmacSHA256':
+            raise StandInError(400, 'MissingParameter', 'The request must be signed with HmacSHA256')
+        while '%' in signature:
+            signature = unquote(signature)
+        digest = RequestSigner(self.secret_key, host, path).digest(method, canonical_query(params))
+        if not hmac.compare_digest(signature.encode('utf-8'), base64.b64encode(digest)):
+            raise StandInError(403, 'SignatureDoesNotMatch', 'The request signature we calculated does not match '
+                                                             'the signature you provided.')
+        try:
+            timestamp = datetime.datetime.strptime(params.get('Timestamp', ''), TIMESTAMP_FORMAT)
+        except ValueError:
+            raise StandInError(400, 'InvalidParameterValue', 'Invalid Timestamp')
+        if abs((datetime.datetime.utcnow() - timestamp).total_seconds()) > MAX_CLOCK_SKEW:
+            raise StandInError(400, 'RequestExpired', 'Request has expired. Timestamp date is {}'.format(
+                params['Timestamp']))
+
+    def handle(self, method, host, path, params, headers, body):
+        """
+        Answer a request.
+
+        :return: (status, headers, body) tuple.
+        """
+        request_id = self._next_id()
+        response_headers = {'x-mws-request-id': request_id,
+                            'x-mws-timestamp': datetime.datetime.utcnow().strftime(TIMESTAMP_FORMAT)}
+        action = params.get('Action', '')
+        self.requests[action] += 1
+        try:
+            self.verify(method, host, path, params)
+            bucket = self._bucket(params.get('SellerId') or params.get('Merchant'), action)
+            if bucket is not None:
+                acquired = bucket.try_acquire()
+                remaining = bucket.remaining
+                resets_on = datetime.datetime.utcnow() + datetime.timedelta(
+                    seconds=(bucket.max_quota - remaining) * bucket.restore_rate)
+                response_headers.update({'x-mws-quota-max': str(bucket.max_quota),
+                                         'x-mws-quota-remaining': str(remaining),
+                                         'x-mws-quota-resetsOn': resets_on.strftime('%Y-%m-%dT%H:%M:%S.000Z')})
+                if not acquired and self.throttle:
+                    self.throttled[action] += 1
+                    raise StandInError(503, 'RequestThrottled', 'Request is throttled')
+            handler = getattr(self, 'do_' + action, None)
+            if handler is None:
+                raise StandInError(400, 'InvalidParameterValue', 'Invalid Action {}'.format(action))
+            status, content_type, content = handler(params, headers, body, request_id)
+        except StandInError as e:
+            status, content_type, content = e.status, 'text/xml', self.error_xml(e, request_id)
+        response_headers['Content-Type'] = content_type
+        if self.latency or self.jitter:
+            self._sleep(self.latency + self.jitter * self._random.random())
+        return status, response_headers, content
+
+    @staticmethod
+    def error_xml(error, request_id):
+        return fixtures.error_response(error.code, error.message, request_id, error.error_type)
+
+    # Actions
+
+    def do_GetServiceStatus(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.envelope('GetServiceStatus', fixtures.ORDERS_NS, fixtures.elements(
+            ('Status', 'GREEN'), ('Timestamp', datetime.datetime.utcnow().strftime(TIMESTAMP_FORMAT))), request_id)
+
+    def _orders_page(self, action, offset, request_id):
+        count, token = _page('orders', offset, self.volume['page_size'], self.volume['orders'])
+        return 200, 'text/xml', fixtures.list_orders(count, offset, token, action, self.seed, request_id)
+
+    def do_ListOrders(self, params, headers, body, request_id):
+        if not _enumerated(params, 'MarketplaceId.Id.'):
+            raise StandInError(400, 'MissingParameter', 'MarketplaceId.Id.1 is required')
+        return self._orders_page('ListOrders', 0, request_id)
+
+    def do_ListOrdersByNextToken(self, params, headers, body, request_id):
+        return self._orders_page('ListOrdersByNextToken', _token_offset(params, 'orders'), request_id)
+
+    def do_GetOrder(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.get_order(_enumerated(params, 'AmazonOrderId.Id.'), self.seed, request_id)
+
+    def do_ListOrderItems(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.list_order_items(params.get('AmazonOrderId', '000-0000000-0000000'),
+                                                          self.volume['items_per_order'], seed=self.seed,
+                                                          request_id=request_id)
+
+    def do_RequestReport(self, params, headers, body, request_id):
+        report_request_id = self._next_id()
+        self.report_requests[report_request_id] = params.get('ReportType')
+        return 200, 'text/xml', fixtures.request_report(report_request_id, params.get('ReportType'), request_id)
+
+    def _report_types(self, params):
+        ids = _enumerated(params, 'ReportRequestIdList.Id.') or list(self.report_requests)
+        return [(i, self.report_requests.get(i, fixtures.LISTINGS_REPORT)) for i in ids]
+
+    def do_GetReportRequestList(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.get_report_request_list(self._report_types(params), request_id)
+
+    def do_GetReportList(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.get_report_list(self._report_types(params), request_id)
+
+    def do_GetReport(self, params, headers, body, request_id):
+        report_types = {fixtures.report_id_for(i): t for i, t in self.report_requests.items()}
+        report_type = report_types.get(params.get('ReportId'))
+        if report_type not in fixtures.REPORT_ROWS:
+            report_type = fixtures.LISTINGS_REPORT
+        report = b''.join(fixtures.flat_file_report(self.volume['report_rows'], report_type, self.seed))
+        return 200, 'text/plain;charset=Cp1252', report
+
+    def do_UpdateReportAcknowledgements(self, params, headers, body, request_id):
+        ids = _enumerated(params, 'ReportIdList.Id.')
+        infos = ''.join(['<ReportInfo>{}</ReportInfo>'.format(fixtures.elements(
+            ('ReportId', i), ('Acknowledged', params.get('Acknowledged', 'true')))) for i in ids])
+        return 200, 'text/xml', fixtures.envelope('UpdateReportAcknowledgements', fixtures.DOC_NS,
+                                                  '<Count>{}</Count>{}'.format(len(ids), infos), request_id)
+
+    def do_SubmitFeed(self, params, headers, body, request_id):
+        expected = base64.b64encode(hashlib.md5(body).digest()).decode('ascii')
+        if headers.get('Content-MD5') != expected:
+            raise StandInError(400, 'ContentMD5DoesNotMatch', 'the Content-MD5 HTTP header you passed for your feed '
+                                                               'did not match the Content-MD5 we calculated')
+        feed_submission_id = self._next_id()
+        self.feed_submissions[feed_submission_id] = params.get('FeedType')
+        return 200, 'text/xml', fixtures.submit_feed(feed_submission_id, params.get('FeedType'), request_id)
+
+    def do_GetFeedSubmissionList(self, params, headers, body, request_id):
+        ids = _enumerated(params, 'FeedSubmissionIdList.Id.') or None
+        return 200, 'text/xml', fixtures.get_feed_submission_list(
+            self.volume['feed_submissions'], feed_submission_ids=ids, feed_types=self.feed_submissions,
+            request_id=request_id)
+
+    def do_GetFeedSubmissionResult(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.processing_report(params.get('FeedSubmissionId', '0'), seed=self.seed)
+
+    def do_GetCompetitivePricingForASIN(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.competitive_pricing_for_asin(
+            _enumerated(params, 'ASINList.ASIN.'), seed=self.seed, request_id=request_id)
+
+    def do_GetCompetitivePricingForSKU(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.competitive_pricing_for_asin(
+            _enumerated(params, 'SellerSKUList.SellerSKU.'), seed=self.seed, action='GetCompetitivePricingForSKU',
+            request_id=request_id)
+
+    def do_GetMatchingProductForId(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.matching_product_for_id(
+            _enumerated(params, 'IdList.Id.'), params.get('IdType', 'ASIN'), self.seed, request_id)
+
+    def _inbound_shipments_page(self, action, offset, request_id):
+        count, token = _page('shipments', offset, self.volume['page_size'], self.volume['inbound_shipments'])
+        return 200, 'text/xml', fixtures.list_inbound_shipments(count, offset, token, action, request_id)
+
+    def do_ListInboundShipments(self, params, headers, body, request_id):
+        return self._inbound_shipments_page('ListInboundShipments', 0, request_id)
+
+    def do_ListInboundShipmentsByNextToken(self, params, headers, body, request_id):
+        return self._inbound_shipments_page('ListInboundShipmentsByNextToken', _token_offset(params, 'shipments'),
+                                            request_id)
+
+    def do_ListInboundShipmentItems(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.list_inbound_shipment_items(
+            params.get('ShipmentId', ''), self.volume['items_per_shipment'], seed=self.seed, request_id=request_id)
+
+    def do_GetPrepInstructionsForASIN(self, params, headers, body, request_id):
+        return 200, 'text/xml', fixtures.prep_instructions_for_asin(_enumerated(params, 'ASINList.Id.'),
+                                                                    request_id=request_id)
+
+    def _inventory_page(self, action, offset, request_id):
+        count, token = _page('inventory', offset, self.volume['page_size'], self.volume['inventory'])
+        return 200, 'text/xml', fixtures.list_inventory_supply(count, offset, token=token, action=action,
+                                                               seed=self.seed, request_id=request_id)
+
+    def do_ListInventorySupply(self, params, headers, body, request_id):
+        skus = _enumerated(params, 'SellerSkus.member.')
+        if skus:
+            return 200, 'text/xml', fixtures.list_inventory_supply(skus=skus, seed=self.seed, request_id=request_id)
+        return self._inventory_page('ListInventorySupply', 0, request_id)
+
+    def do_ListInventorySupplyByNextToken(self, params, headers, body, request_id):
+        return self._inventory_page('ListInventorySupplyByNextToken', _token_offset(params, 'inventory'),
+                                    request_id)
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, don't let delayed ACKs add 40 ms to kept-alive connections.
+    disable_nagle_algorithm = True
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def _answer(self):
+        stand_in = self.server.stand_in
+        url = urlsplit(self.path)
+        body = self._read_body()
+        params = dict(parse_qsl(url.query, keep_blank_values=True))
+        status, headers, content = stand_in.handle(self.command, self.headers.get('Host', ''), url.path, params,
+                                                   self.headers, body)
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(content)))
+        if status == 200 and not headers['Content-Type'].startswith('text/xml'):
+            self.send_header('Content-MD5', base64.b64encode(hashlib.md5(content).digest()).decode('ascii'))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = _answer
+    do_POST = _answer
+
+    def log_message(self, format, *args):
+        self.server.stand_in.logger.debug(format, *args)
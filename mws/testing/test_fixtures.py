@@ -0,0 +1,82 @@
+import io
+from unittest import TestCase
+
+from mws.parsers import ErrorResponse
+from mws.parsers.feeds import GetFeedSubmissionListResponse, ProcessingReport
+from mws.parsers.fulfillment import ListInboundShipmentResponse, ListInboundShipmentItemsResponse
+from mws.parsers.orders import ListOrdersResponse, ListOrderItemsResponse
+from mws.parsers.products import GetCompetitivePricingForAsinResponse, GetMatchingProductForIdResponse
+from mws.parsers.reports.flatfile import FlatFileReader
+from mws.testing import fixtures
+
+
+class TestFixtures(TestCase):
+
+    def test_deterministic(self):
+        self.assertEqual(fixtures.list_orders(20), fixtures.list_orders(20))
+        self.assertNotEqual(fixtures.list_orders(20), fixtures.list_orders(20, seed=1))
+        self.assertEqual(b''.join(fixtures.flat_file_report(100)), b''.join(fixtures.flat_file_report(100)))
+        # Records don't depend on the page they are generated in.
+        self.assertIn(fixtures.order_xml(150).encode('utf-8'), fixtures.list_orders(100, offset=100))
+
+    def test_list_orders(self):
+        response = ListOrdersResponse.load(fixtures.list_orders(token='orders-100'))
+        self.assertEqual(len(response.orders), 100)
+        self.assertEqual(response.next_token, 'orders-100')
+        order = response.orders[0]
+        self.assertEqual(order.amazon_order_id, fixtures.order_id(0))
+        self.assertEqual(order.marketplace_id, fixtures.MARKETPLACE_ID)
+        self.assertIsNotNone(order.purchase_date)
+        self.assertEqual(len(order.ship_state_abbreviation), 2)
+        self.assertIsNone(ListOrdersResponse.load(fixtures.list_orders(10)).next_token)
+
+    def test_list_order_items(self):
+        response = ListOrderItemsResponse.load(fixtures.list_order_items(fixtures.order_id(7), count=3))
+        self.assertEqual(response.amazon_order_id, fixtures.order_id(7))
+        self.assertEqual(len(response.order_items), 3)
+        self.assertTrue(response.order_items[0].seller_sku.startswith('SKU-'))
+
+    def test_feed_submission_list(self):
+        response = GetFeedSubmissionListResponse.load(fixtures.get_feed_submission_list(count=500))
+        infos = response.feed_submission_info_list()
+        self.assertEqual(len(infos), 500)
+        self.assertEqual(infos[0].feed_processing_status, '_DONE_')
+        self.assertIsNotNone(infos[0].completed_processing_date)
+
+    def test_competitive_pricing(self):
+        response = GetCompetitivePricingForAsinResponse.load(fixtures.competitive_pricing_for_asin())
+        results = response.competitive_pricing_for_asin_results
+        self.assertEqual(len(results), fixtures.SIZES['pricing'])
+        product = results[0].products[0]
+        self.assertEqual(product.asin, 'B000000000')
+        self.assertTrue(product.competitive_prices)
+        self.assertTrue(product.sales_rankings)
+
+    def test_matching_product(self):
+        response = GetMatchingProductForIdResponse.load(fixtures.matching_product_for_id(['012345678905'], 'UPC'))
+        product = response.matching_product_for_id_results[0].products[0]
+        self.assertEqual(product.title, 'Product 1')
+
+    def test_inbound_shipments(self):
+        shipments = ListInboundShipmentResponse.load(fixtures.list_inbound_shipments(5, token='shipments-5'))
+        self.assertEqual(len(shipments.shipment_data), 5)
+        self.assertEqual(shipments.next_token, 'shipments-5')
+        items = ListInboundShipmentItemsResponse.load(fixtures.list_inbound_shipment_items('FBA00000001', 4))
+        self.assertEqual([m.shipment_id for m in items.shipment_items], ['FBA00000001'] * 4)
+
+    def test_processing_report(self):
+        report = ProcessingReport(fixtures.processing_report('50001', messages=100, errors=3))
+        self.assertEqual(report.summary.messages_processed, 100)
+        self.assertEqual(len(report.failed_skus()), 3)
+
+    def test_error_response(self):
+        error = ErrorResponse.load(fixtures.error_response('RequestThrottled', 'Request is throttled'))
+        self.assertEqual(error.code, 'RequestThrottled')
+
+    def test_flat_file_report(self):
+        report = FlatFileReader(fixtures.flat_file_report(1000, chunk_size=1024), fixtures.ORDERS_REPORT, typed=True)
+        rows = list(report)
+        self.assertEqual(len(rows), 1000)
+        self.assertEqual(report.fieldnames[0], 'amazon-order-id')
+        listings = FlatFileReader(io.BytesIO(b''.join(fixtures.flat_file_report(10, fixtures.LISTINGS_REPORT))))
+        self.assertEqual(len(list(listings)), 10)
@@ -0,0 +1,99 @@
+import base64
+import datetime
+import hashlib
+import hmac
+from unittest import TestCase
+from urllib.parse import quote
+
+import requests
+
+from mws import Feeds, Orders, Products, Reports, ListOrdersResponse, GetCompetitivePricingForAsinResponse
+from mws.parsers import ErrorResponse
+from mws.parsers.feeds import SubmitFeedResponse
+from mws.testing import StandInServer, fixtures
+
+
+class TestStandInServer(TestCase):
+
+    def setUp(self):
+        self.server = StandInServer(volume={'orders': 150}, quotas={'ListOrders': (2, 60)}).start()
+        self.addCleanup(self.server.stop)
+
+    def client(self, cls, secret_key='secret_key'):
+        return cls('access_key', secret_key, 'account_id', domain=self.server.domain)
+
+    def test_list_orders_pages(self):
+        api = self.client(Orders)
+        first = ListOrdersResponse.load(api.list_orders(['ATVPDKIKX0DER'], created_after='2017-01-01').original)
+        self.assertEqual(len(first.orders), 100)
+        self.assertEqual(first.orders[0].amazon_order_id, fixtures.order_id(0))
+        self.assertIsNotNone(first.next_token)
+        second = ListOrdersResponse.load(api.list_orders_by_next_token(first.next_token).original)
+        self.assertEqual(len(second.orders), 50)
+        self.assertIsNone(second.next_token)
+
+    def test_quota_headers_and_throttling(self):
+        api = self.client(Orders)
+        response = api.list_orders(['ATVPDKIKX0DER']).response
+        self.assertEqual(response.headers['x-mws-quota-max'], '2')
+        self.assertEqual(response.headers['x-mws-quota-remaining'], '1')
+        self.assertIn('x-mws-quota-resetsOn', response.headers)
+        api.list_orders(['ATVPDKIKX0DER'])
+        with self.assertRaises(ErrorResponse) as cm:
+            api.list_orders(['ATVPDKIKX0DER'])
+        self.assertEqual(cm.exception.code, 'RequestThrottled')
+        self.assertEqual(cm.exception.response.status_code, 503)
+        self.assertEqual(self.server.throttled['ListOrders'], 1)
+        # Quotas are per seller.
+        other = Orders('access_key', 'secret_key', 'other_account', domain=self.server.domain)
+        other.list_orders(['ATVPDKIKX0DER'])
+
+    def test_signature_mismatch(self):
+        api = self.client(Orders, secret_key='wrong')
+        with self.assertRaises(ErrorResponse) as cm:
+            api.list_order_items('902-3159896-1390916')
+        self.assertEqual(cm.exception.code, 'SignatureDoesNotMatch')
+
+    def test_signature_checked_independently(self):
+        # Signed by hand rather than with the client's signer, so that a signing bug in the client can't match itself.
+        params = {'AWSAccessKeyId': 'access_key', 'Action': 'GetServiceStatus', 'SellerId': 'account_id',
+                  'SignatureMethod': 'HmacSHA256', 'SignatureVersion': '2', 'Version': '2013-09-01',
+                  'Timestamp': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')}
+        query = '&'.join('{}={}'.format(k, quote(params[k], safe='-_.~')) for k in sorted(params))
+        host = self.server.domain.replace('http://', '')
+        string_to_sign = 'POST\n{}\n/Orders/2013-09-01\n{}'.format(host, query)
+        signature = base64.b64encode(hmac.new(b'secret_key', string_to_sign.encode('utf-8'), hashlib.sha256).digest())
+        url = '{}/Orders/2013-09-01?{}&Signature={{}}'.format(self.server.domain, query)
+        response = requests.post(url.format(quote(signature.decode('ascii'), safe='')))
+        self.assertEqual(response.status_code, 200)
+        # The base64 signature must be encoded, '+' would be read as a space.
+        if b'+' in signature:
+            self.assertEqual(requests.post(url.format(signature.decode('ascii'))).status_code, 403)
+        self.assertEqual(requests.post(url.format(quote(base64.b64encode(b'x' * 32), safe=''))).status_code, 403)
+
+    def test_submit_feed(self):
+        api = self.client(Feeds)
+        response = api.submit_feed(b'sku\tquantity\nSKU-1\t1\n', '_POST_FLAT_FILE_INVLOADER_DATA_',
+                                   content_type='text/tab-separated-values')
+        feed_submission_id = SubmitFeedResponse.load(response.original).feed_submission_id
+        listed = api.get_feed_submission_list(feedids=[feed_submission_id]).parsed
+        self.assertEqual(listed.FeedSubmissionInfo.FeedProcessingStatus, '_DONE_')
+        self.assertEqual(listed.FeedSubmissionInfo.FeedType, '_POST_FLAT_FILE_INVLOADER_DATA_')
+
+    def test_report(self):
+        self.server.volume['report_rows'] = 10
+        api = self.client(Reports)
+        report_request_id = api.request_report('_GET_MERCHANT_LISTINGS_DATA_').parsed.ReportRequestInfo.ReportRequestId
+        info = api.get_report_request_list(requestids=[report_request_id]).parsed.ReportRequestInfo
+        self.assertEqual(info.ReportProcessingStatus, '_DONE_')
+        report = api.get_report(info.GeneratedReportId)
+        self.assertEqual(len(report.original.splitlines()), 11)
+
+    def test_redirect(self):
+        with self.server.redirect():
+            api = Products('access_key', 'secret_key', 'account_id')
+            self.assertEqual(api.domain, self.server.domain)
+            response = api.get_competitive_pricing_for_asin('ATVPDKIKX0DER', ['B000000001', 'B000000002'])
+        self.assertNotEqual(Products('access_key', 'secret_key', 'account_id').domain, self.server.domain)
+        results = GetCompetitivePricingForAsinResponse.load(response.original).competitive_pricing_for_asin_results
+        self.assertEqual([r.products[0].asin for r in results], ['B000000001', 'B000000002'])
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Transports send the signed requests of `MWS.make_request` and return the HTTP responses.
+
+`RequestsTransport` sends them with requests, it is the default. `RecordingTransport` saves the responses of
+another transport to a cassette file, which `ReplayTransport` serves without network, ie. to benchmark the parsers
+or test an integration offline:
+
+    >>> MWS.transport = RecordingTransport('orders.cassette')
+    >>> ListOrdersResponse.request('access_key', 'secret_key', 'account_id', ['ATVPDKIKX0DER'], ...)
+    >>> MWS.transport = ReplayTransport('orders.cassette')
+    >>> ListOrdersResponse.request('access_key', 'secret_key', 'account_id', ['ATVPDKIKX0DER'], ...)  # no request
+
+Recorded requests are keyed by their canonical query string without the credentials, timestamp and signature, so
+that they are replayed whatever the credentials and time.
+"""
+import base64
+import io
+import json
+import threading
+import time
+from collections import defaultdict
+
+from requests import request
+from requests.structures import CaseInsensitiveDict
+
+# Parameters which differ between two identical requests.
+VOLATILE_PARAMS = frozenset(['AWSAccessKeyId', 'SellerId', 'Merchant', 'MWSAuthToken', 'Signature',
+                             'SignatureMethod', 'SignatureVersion', 'Timestamp'])
+
+
+def request_key(url):
+    """
+    Key of a request in a cassette: its query string without the volatile parameters.
+
+    The query string built by `MWS.prepare_request` is already sorted and encoded.
+
+    :param url: The signed URL.
+    :return: str
+    """
+    query = url.partition('?')[2]
+    return '&'.join([p for p in query.split('&') if p.partition('=')[0] not in VOLATILE_PARAMS])
+
+
+def action_of(key):
+    """
+    The Action of a request key.
+    """
+    for param in key.split('&'):
+        name, _, value = param.partition('=')
+        if name == 'Action':
+            return value
+
+
+class CannedResponse(object):
+    """
+    A response held in memory, with the attributes of `requests.Response` used by the client.
+    """
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def iter_content(self, chunk_size=1):
+        stream = io.BytesIO(self.content)
+        return iter(lambda: stream.read(chunk_size), b'')
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return '<CannedResponse [{}]>'.format(self.status_code)
+
+
+class Transport(object):
+    """
+    Sends a `PreparedRequest`.
+    """
+
+    def send(self, prepared, stream=False, timeout=15):
+        """
+        Send a request.
+
+        :param prepared: `PreparedRequest`
+        :param stream: Don't read the response body before returning.
+        :param timeout: Seconds to wait for the server.
+        :return: A response with the `status_code`, `headers`, `content`, `ok` and `iter_content` attributes of
+            `requests.Response`.
+        """
+        raise NotImplementedError("method `send` is not implemented")
+
+
+class RequestsTransport(Transport):
+    """
+    Sends the requests with requests.
+    """
+
+    def __init__(self, session=None):
+        """
+
+        :param session: (Optional) `requests.Session`, to reuse connections.
+        """
+        self.session = session
+
+    def send(self, prepared, stream=False, timeout=15):
+        send = self.session.request if self.session is not None else request
+        return send(prepared.method, prepared.url, data=prepared.body, headers=prepared.headers, timeout=timeout,
+                    stream=stream)
+
+
+default_transport = RequestsTransport()
+
+
+class RecordingTransport(Transport):
+    """
+    Sends the requests with another transport and appends the responses to a cassette file.
+
+    Streamed responses are read in full to be recorded.
+    """
+
+    def __init__(self, path, transport=None):
+        """
+
+        :param path: Path of the cassette file. Responses are appended to it.
+        :param transport: Transport sending the requests. Defaults to a `RequestsTransport`.
+        """
+        self.path = path
+        self.transport = transport or RequestsTransport()
+        self._lock = threading.Lock()
+
+    def send(self, prepared, stream=False, timeout=15):
+        response = self.transport.send(prepared, stream=stream, timeout=timeout)
+        key = request_key(prepared.url)
+        record = {
+            'action': action_of(key),
+            'key': key,
+            'status': response.status_code,
+            # The recorded body is already decoded.
+            'headers': {k: v for k, v in response.headers.items()
+                        if k.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')},
+            'body': base64.b64encode(response.content).decode('ascii'),
+        }
+        line = json.dumps(record, sort_keys=True)
+        with self._lock:
+            with io.open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        return CannedResponse(response.status_code, response.headers, response.content)
+
+
+class ReplayTransport(Transport):
+    """
+    Serves the responses of a cassette file from memory.
+
+    Responses recorded for the same request are served in the recording order, the last one is then repeated.
+    """
+
+    def __init__(self, path=None, latency=0, sleep=time.sleep):
+        """
+
+        :param path: (Optional) Path of the cassette file. More can be loaded with `load`.
+        :param latency: Seconds each request is delayed by, to simulate the network.
+        """
+        self.latency = latency
+        self._sleep = sleep
+        self._responses = defaultdict(list)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        if path is not None:
+            self.load(path)
+
+    def load(self, path):
+        """
+        Load the responses of a cassette file.
+
+        :return: Number of responses loaded.
+        """
+        count = 0
+        with io.open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self.add(record['key'], record['status'], record['headers'], base64.b64decode(record['body']))
+                count += 1
+        return count
+
+    def add(self, key, status_code, headers, content):
+        """
+        Add a response.
+
+        :param key: The request key. (see `request_key`)
+        """
+        with self._lock:
+            self._responses[key].append(CannedResponse(status_code, headers, content))
+
+    def __len__(self):
+        return sum(len(responses) for responses in self._responses.values())
+
+    def send(self, prepared, stream=False, timeout=15):
+        key = request_key(prepared.url)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise KeyError('No recorded response for {}'.format(key))
+            served = self._served[key]
+            self._served[key] = served + 1
+        if self.latency:
+            self._sleep(self.latency)
+        return responses[min(served, len(responses) - 1)]
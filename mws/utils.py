@@ -7,6 +7,7 @@ Borrowed from https://github.com/timotheus/ebaysdk-python
 @author: pierre
 """
 
+import io
 import xml.etree.ElementTree as ET
 import re
 
@@ -64,7 +65,7 @@ class xml2dict(object):
             k, v = self._namespace_split(k, object_dict({'value':v}))
             node_tree[k] = v
         #Save childrens
-        for child in node.getchildren():
+        for child in node:
             tag, tree = self._namespace_split(child.tag,
                                               self._parse_node(child))
             if tag not in node_tree:  # the first time, so store it in dict
@@ -100,3 +101,30 @@ class xml2dict(object):
         t = ET.fromstring(s)
         root_tag, root_tree = self._namespace_split(t.tag, self._parse_node(t))
         return object_dict({root_tag: root_tree})
+
+
+class IterStream(io.RawIOBase):
+    """
+    Read only binary file object over an iterator of byte chunks, ie. a streamed response body.
+
+    Wrap it in `io.BufferedReader` and `io.TextIOWrapper` to decode the chunks incrementally.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._leftover = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._leftover
+        while not chunk:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = len(b)
+        data, self._leftover = chunk[:size], chunk[size:]
+        b[:len(data)] = data
+        return len(data)
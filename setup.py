@@ -27,7 +27,7 @@ setup(
     author="Paulo Alvarado",
     author_email="commonzenpython@gmail.com",
     url="http://github.com/czpython/python-amazon-mws",
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     platforms=['OS Independent'],
     license='LICENSE.txt',
     install_requires=REQUIREMENTS,